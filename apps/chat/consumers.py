@@ -1,6 +1,7 @@
 import json
 
 from asgiref.sync import sync_to_async
+from channels.db import database_sync_to_async
 from channels.generic.websocket import AsyncWebsocketConsumer
 
 from apps.core.agent.pipeline import RAGPipeline
@@ -48,8 +49,13 @@ class ChatConsumer(AsyncWebsocketConsumer):
             # Use RAG Pipeline instead of AgentExecutor for simpler, more reliable responses
             pipeline = RAGPipeline()
 
-            # Execute RAG pipeline (sync code needs to be wrapped)
-            response = await sync_to_async(pipeline.run)(message)
+            # Execute RAG pipeline (sync code needs to be wrapped). Run outside the
+            # shared sync thread so concurrent messages can be coalesced into one
+            # embedding call instead of queueing behind each other; database_sync_to_async
+            # closes the worker thread's stale database connections around the call.
+            response = await database_sync_to_async(pipeline.run, thread_sensitive=False)(
+                message
+            )
 
             # Format sources for response
             sources = []
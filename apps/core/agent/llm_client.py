@@ -6,6 +6,9 @@ from django.conf import settings
 from groq import Groq
 from openai import OpenAI
 
+from apps.core.quota import INTERACTIVE, estimate_chat_tokens, provider_slot
+from apps.core.registry import services
+
 
 class LLMClient:
     """
@@ -56,8 +59,19 @@ class LLMClient:
             if json_mode and self.provider == "openai":
                 kwargs["response_format"] = {"type": "json_object"}
 
-            response = self.client.chat.completions.create(**kwargs)
+            with provider_slot(self.provider, estimate_chat_tokens(messages), INTERACTIVE):
+                response = self.client.chat.completions.create(**kwargs)
             return response.choices[0].message.content
 
         except Exception as e:
             raise Exception(f"LLM chat failed: {str(e)}") from e
+
+
+def get_llm_client():
+    """
+    Get the process-wide LLMClient for the default provider.
+
+    Returns:
+        LLMClient: Shared LLM client
+    """
+    return services.get("core.llm_client", LLMClient)
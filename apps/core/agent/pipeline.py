@@ -2,7 +2,7 @@
 RAG Pipeline Implementation.
 """
 
-from apps.core.agent.llm_client import LLMClient
+from apps.core.agent.llm_client import get_llm_client
 from apps.core.agent.router import Router
 from apps.core.tools.local_search import LocalSearchTool
 from apps.core.tools.serper import SerperDevTool
@@ -15,7 +15,7 @@ class RAGPipeline:
 
     def __init__(self):
         self.router = Router()
-        self.llm_client = LLMClient()
+        self.llm_client = get_llm_client()
         self.serper_tool = SerperDevTool()
         self.local_search_tool = LocalSearchTool()
 
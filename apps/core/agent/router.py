@@ -4,7 +4,7 @@ Router for RAG pipeline.
 
 import json
 
-from apps.core.agent.llm_client import LLMClient
+from apps.core.agent.llm_client import get_llm_client
 
 
 class Router:
@@ -13,7 +13,7 @@ class Router:
     """
 
     def __init__(self):
-        self.llm_client = LLMClient()
+        self.llm_client = get_llm_client()
 
     def route(self, query, summary=None):
         """
@@ -1,6 +1,12 @@
 from django.apps import AppConfig
+from django.core.signals import setting_changed
 
 
 class CoreConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "apps.core"
+
+    def ready(self):
+        from apps.core.registry import reset_on_setting_changed
+
+        setting_changed.connect(reset_on_setting_changed)
@@ -0,0 +1,52 @@
+"""
+Helpers for splitting provider requests into size-bounded sub-batches.
+"""
+
+# Average characters per token for English text with OpenAI tokenizers
+CHARS_PER_TOKEN = 4
+
+
+def estimate_tokens(text):
+    """
+    Estimate the number of tokens in a text without loading a tokenizer.
+
+    Args:
+        text: Input text
+
+    Returns:
+        int: Estimated token count (at least 1)
+    """
+    return max(1, len(text) // CHARS_PER_TOKEN + 1)
+
+
+def split_batches(texts, max_items, max_tokens):
+    """
+    Split texts into consecutive sub-batches bounded by item count and estimated tokens.
+
+    A single text larger than max_tokens is placed in a batch of its own.
+
+    Args:
+        texts: List of input texts
+        max_items: Maximum number of texts per sub-batch
+        max_tokens: Maximum estimated tokens per sub-batch
+
+    Returns:
+        list[list[int]]: Indices into texts for each sub-batch, in input order
+    """
+    batches = []
+    current = []
+    current_tokens = 0
+
+    for index, text in enumerate(texts):
+        tokens = estimate_tokens(text)
+        if current and (len(current) >= max_items or current_tokens + tokens > max_tokens):
+            batches.append(current)
+            current = []
+            current_tokens = 0
+        current.append(index)
+        current_tokens += tokens
+
+    if current:
+        batches.append(current)
+
+    return batches
@@ -0,0 +1,97 @@
+"""
+Cross-request micro-batching of single-text embedding requests.
+"""
+
+import threading
+import time
+from concurrent.futures import Future
+
+
+class EmbeddingCoalescer:
+    """
+    Coalesces concurrent single-text requests into one batched provider call.
+
+    The first caller to arrive becomes the batch leader: it waits up to
+    ``max_wait_ms`` for other callers to join, then sends every pending text in
+    one call and hands each caller its own vector. A batch reaching
+    ``max_batch_size`` is flushed immediately by the caller that filled it.
+    No background thread is used, so flushes run on the callers' own threads.
+
+    Each EmbeddingService owns its coalescer, so batches are always sent with
+    that service's cache, client and rate limiter; callers share batches by
+    sharing the service (see get_embedding_service).
+    """
+
+    def __init__(self, batch_fn, max_wait_ms=5, max_batch_size=64):
+        """
+        Initialize the coalescer.
+
+        Args:
+            batch_fn: Callable taking a list of texts and returning vectors in order
+            max_wait_ms: Maximum time the batch leader waits for more requests
+            max_batch_size: Maximum number of texts per batched call
+        """
+        self.batch_fn = batch_fn
+        self.max_wait = max_wait_ms / 1000
+        self.max_batch_size = max_batch_size
+        self._pending = []
+        self._lock = threading.Lock()
+        self._stats = {"requests": 0, "batches": 0}
+
+    def submit(self, text):
+        """
+        Embed a single text as part of the next batch.
+
+        Args:
+            text: Input text
+
+        Returns:
+            np.ndarray: Embedding vector for text
+        """
+        future = Future()
+        batch = None
+
+        with self._lock:
+            self._pending.append((text, future))
+            if len(self._pending) >= self.max_batch_size:
+                batch, self._pending = self._pending, []
+            is_leader = batch is None and len(self._pending) == 1
+
+        if is_leader:
+            time.sleep(self.max_wait)
+            with self._lock:
+                batch, self._pending = self._pending, []
+
+        if batch:
+            self._flush(batch)
+
+        return future.result()
+
+    def stats(self):
+        """
+        Get coalescing counters.
+
+        Returns:
+            dict: Requests served, batches sent and average batch size
+        """
+        with self._lock:
+            stats = dict(self._stats)
+        stats["avg_batch_size"] = stats["requests"] / stats["batches"] if stats["batches"] else 0.0
+        return stats
+
+    def _flush(self, batch):
+        """Send one batched call and resolve every waiting caller."""
+        with self._lock:
+            self._stats["requests"] += len(batch)
+            self._stats["batches"] += 1
+
+        try:
+            vectors = self.batch_fn([text for text, _ in batch])
+        except Exception as e:
+            for _, future in batch:
+                future.set_exception(e)
+            return
+
+        for (_, future), vector in zip(batch, vectors, strict=True):
+            future.set_result(vector)
+
@@ -0,0 +1,265 @@
+"""
+Content-addressed embedding cache.
+
+Embeddings are keyed by (model, dimension, sha256 of normalized text) and kept in
+two tiers: a byte-budgeted in-process LRU in front of the ``embedding_cache``
+Postgres table.
+"""
+
+import hashlib
+import logging
+import threading
+import unicodedata
+from collections import OrderedDict
+
+import numpy as np
+from django.conf import settings
+from django.db import DatabaseError
+
+from apps.core.registry import services
+
+logger = logging.getLogger(__name__)
+
+# Rough per-entry overhead of the key string and OrderedDict slot
+ENTRY_OVERHEAD_BYTES = 200
+
+# Maximum number of keys per SELECT ... WHERE key IN (...) query
+STORE_QUERY_CHUNK = 500
+
+
+def normalize_text(text):
+    """
+    Normalize text before hashing so trivially different inputs share a key.
+
+    Args:
+        text: Input text
+
+    Returns:
+        str: NFC-normalized text without surrounding whitespace
+    """
+    return unicodedata.normalize("NFC", text).strip()
+
+
+def make_cache_key(model, dimension, text):
+    """
+    Build the cache key for a text embedded with a given model and dimension.
+
+    Args:
+        model: Embedding model name
+        dimension: Embedding dimension
+        text: Input text
+
+    Returns:
+        str: Hex sha256 digest
+    """
+    digest = hashlib.sha256()
+    digest.update(f"{model}\x00{dimension}\x00".encode())
+    digest.update(normalize_text(text).encode("utf-8"))
+    return digest.hexdigest()
+
+
+def pack_vector(vector):
+    """Serialize a vector to raw float32 bytes."""
+    return np.asarray(vector, dtype=np.float32).tobytes()
+
+
+def unpack_vector(data):
+    """Deserialize raw float32 bytes to a read-only float32 vector sharing the buffer."""
+    return np.frombuffer(data, dtype=np.float32)
+
+
+class LRUByteCache:
+    """
+    Thread-safe LRU mapping of key -> bytes bounded by total byte size.
+    """
+
+    def __init__(self, max_bytes):
+        """
+        Initialize the LRU cache.
+
+        Args:
+            max_bytes: Byte budget for stored values (including per-entry overhead)
+        """
+        self.max_bytes = max_bytes
+        self.current_bytes = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def get(self, key):
+        """Return the cached bytes for key (marking it recently used) or None."""
+        with self._lock:
+            value = self._entries.get(key)
+            if value is not None:
+                self._entries.move_to_end(key)
+            return value
+
+    def set(self, key, value):
+        """Store bytes for key, evicting least recently used entries over budget."""
+        size = len(value) + ENTRY_OVERHEAD_BYTES
+        if size > self.max_bytes:
+            return
+
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self.current_bytes -= len(previous) + ENTRY_OVERHEAD_BYTES
+
+            self._entries[key] = value
+            self.current_bytes += size
+
+            while self.current_bytes > self.max_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self.current_bytes -= len(evicted) + ENTRY_OVERHEAD_BYTES
+
+    def clear(self):
+        """Drop all entries."""
+        with self._lock:
+            self._entries.clear()
+            self.current_bytes = 0
+
+
+class EmbeddingCache:
+    """
+    Two-tier embedding cache: in-process LRU backed by a durable database table.
+    """
+
+    def __init__(self, max_bytes, persistent=True):
+        """
+        Initialize the embedding cache.
+
+        Args:
+            max_bytes: Byte budget of the in-process LRU tier
+            persistent: Whether to read through to / write to the database tier
+        """
+        self.memory = LRUByteCache(max_bytes)
+        self.persistent = persistent
+        self._lock = threading.Lock()
+        self._stats = {"memory_hits": 0, "store_hits": 0, "misses": 0}
+
+    def get_many(self, keys):
+        """
+        Look up embeddings for the given keys.
+
+        Args:
+            keys: Iterable of cache keys
+
+        Returns:
+            dict: key -> float32 vector for every key found in either tier
+        """
+        found = {}
+        pending = []
+        for key in dict.fromkeys(keys):
+            data = self.memory.get(key)
+            if data is not None:
+                found[key] = unpack_vector(data)
+            else:
+                pending.append(key)
+        memory_hits = len(found)
+
+        store_hits = 0
+        if pending and self.persistent:
+            for key, data in self._load_from_store(pending).items():
+                self.memory.set(key, data)
+                found[key] = unpack_vector(data)
+                store_hits += 1
+
+        with self._lock:
+            self._stats["memory_hits"] += memory_hits
+            self._stats["store_hits"] += store_hits
+            self._stats["misses"] += len(pending) - store_hits
+
+        return found
+
+    def set_many(self, entries, model="", dimension=0):
+        """
+        Store freshly computed embeddings in both tiers.
+
+        Args:
+            entries: dict of key -> float32 vector
+            model: Embedding model name (recorded in the durable tier)
+            dimension: Requested embedding dimension (recorded in the durable tier)
+        """
+        packed = {key: pack_vector(vector) for key, vector in entries.items()}
+        for key, data in packed.items():
+            self.memory.set(key, data)
+
+        if packed and self.persistent:
+            self._save_to_store(packed, model, dimension)
+
+    def stats(self):
+        """
+        Get hit/miss counters.
+
+        Returns:
+            dict: Counters, hit rate and current LRU footprint
+        """
+        with self._lock:
+            stats = dict(self._stats)
+        lookups = stats["memory_hits"] + stats["store_hits"] + stats["misses"]
+        hits = stats["memory_hits"] + stats["store_hits"]
+        stats["hit_rate"] = hits / lookups if lookups else 0.0
+        stats["memory_entries"] = len(self.memory)
+        stats["memory_bytes"] = self.memory.current_bytes
+        return stats
+
+    def clear(self):
+        """Clear the in-process tier and reset counters."""
+        self.memory.clear()
+        with self._lock:
+            self._stats = {"memory_hits": 0, "store_hits": 0, "misses": 0}
+
+    def _load_from_store(self, keys):
+        """Fetch raw vectors for keys from the database tier."""
+        from apps.core.models import EmbeddingCacheEntry
+
+        loaded = {}
+        try:
+            for start in range(0, len(keys), STORE_QUERY_CHUNK):
+                chunk = keys[start : start + STORE_QUERY_CHUNK]
+                rows = EmbeddingCacheEntry.objects.filter(key__in=chunk).values_list(
+                    "key", "vector"
+                )
+                for key, data in rows:
+                    loaded[key] = bytes(data)
+        except DatabaseError as e:
+            logger.warning("Embedding cache read failed, falling back to provider: %s", e)
+        return loaded
+
+    def _save_to_store(self, packed, model, dimension):
+        """Persist raw vectors to the database tier, ignoring existing keys."""
+        from apps.core.models import EmbeddingCacheEntry
+
+        try:
+            EmbeddingCacheEntry.objects.bulk_create(
+                [
+                    EmbeddingCacheEntry(key=key, model=model, dimension=dimension, vector=data)
+                    for key, data in packed.items()
+                ],
+                batch_size=STORE_QUERY_CHUNK,
+                ignore_conflicts=True,
+            )
+        except DatabaseError as e:
+            logger.warning("Embedding cache write failed: %s", e)
+
+
+def get_embedding_cache():
+    """
+    Get the process-wide embedding cache.
+
+    Returns:
+        EmbeddingCache | None: Shared cache, or None when caching is disabled
+    """
+    config = settings.EMBEDDING_CONFIG
+    if not config.get("CACHE_ENABLED", True):
+        return None
+
+    return services.get(
+        "embedding_cache",
+        lambda: EmbeddingCache(
+            max_bytes=config.get("CACHE_MEMORY_BYTES", 64 * 1024 * 1024),
+            persistent=config.get("CACHE_PERSISTENT", True),
+        ),
+    )
@@ -0,0 +1,84 @@
+"""
+Offline, deterministic embedding provider.
+
+Texts are tokenized into lowercase word unigrams and bigrams, each feature is
+hashed with CRC32 (stable across processes, unlike ``hash()``), and the hashes are
+projected into the target dimension with a fixed sparse random projection: every
+feature adds a +/- weight at ``PROJECTIONS`` seeded positions. Rows are L2
+normalized so cosine similarity behaves like it does for provider embeddings.
+"""
+
+import re
+import zlib
+
+import numpy as np
+
+TOKEN_RE = re.compile(r"\w+")
+
+# Bumped whenever the projection changes, so vectors of different versions never mix
+MODEL_NAME = "local-hashing-v2"
+
+# Number of output positions each hashed feature is spread over
+PROJECTIONS = 4
+
+# Odd 32-bit multipliers/offsets for the multiply-shift hash family (fixed for determinism):
+# one set picks each projection's position, an independent set its sign. The sign is the
+# top bit of its hash, since the low bit of h * odd + odd is the same for every projection.
+_MULTIPLIERS = np.array([0x9E3779B1, 0x85EBCA77, 0xC2B2AE3D, 0x27D4EB2F], dtype=np.uint64)
+_OFFSETS = np.array([0x165667B1, 0xD3A2646D, 0xFD7046C5, 0xB55A4F09], dtype=np.uint64)
+_SIGN_MULTIPLIERS = np.array([0xCC9E2D51, 0x1B873593, 0xE6546B65, 0x85EBCA6B], dtype=np.uint64)
+_SIGN_OFFSETS = np.array([0x2545F491, 0x4F6CDD1D, 0x94D049BB, 0x369DEA0F], dtype=np.uint64)
+_MASK = np.uint64(0xFFFFFFFF)
+
+
+class LocalEmbedder:
+    """
+    CPU-only feature-hashing embedder with a fixed random projection.
+    """
+
+    def __init__(self, dimension):
+        """
+        Initialize the local embedder.
+
+        Args:
+            dimension: Output embedding dimension
+        """
+        self.dimension = dimension
+        self.scale = np.float32(1 / np.sqrt(PROJECTIONS))
+
+    def embed(self, texts):
+        """
+        Embed a list of texts.
+
+        Args:
+            texts: List of input texts
+
+        Returns:
+            np.ndarray: L2-normalized float32 array of shape (len(texts), dimension)
+        """
+        rows = []
+        hashes = []
+        for row, text in enumerate(texts):
+            features = self._features(text)
+            hashes.extend(zlib.crc32(f.encode("utf-8")) for f in features)
+            rows.extend([row] * len(features))
+
+        matrix = np.zeros((len(texts), self.dimension), dtype=np.float32)
+        if hashes:
+            h = np.asarray(hashes, dtype=np.uint64)[:, None]
+            columns = ((h * _MULTIPLIERS + _OFFSETS) & _MASK) % np.uint64(self.dimension)
+            sign_bits = ((h * _SIGN_MULTIPLIERS + _SIGN_OFFSETS) & _MASK) >> np.uint64(31)
+            signs = np.where(sign_bits, self.scale, -self.scale)
+            row_index = np.repeat(np.asarray(rows, dtype=np.int64), PROJECTIONS)
+            np.add.at(matrix, (row_index, columns.ravel().astype(np.int64)), signs.ravel())
+
+        norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+        np.divide(matrix, norms, out=matrix, where=norms > 0)
+        return matrix
+
+    @staticmethod
+    def _features(text):
+        """Extract lowercase unigram and bigram features from text."""
+        tokens = TOKEN_RE.findall(text.lower())
+        bigrams = [f"{a} {b}" for a, b in zip(tokens, tokens[1:], strict=False)]
+        return tokens + bigrams
@@ -1 +1,20 @@
-# Create your models here.
+from django.db import models
+
+
+class EmbeddingCacheEntry(models.Model):
+    """
+    Durable tier of the embedding cache.
+    Vectors are stored as raw float32 bytes keyed by sha256(model, dimension, text).
+    """
+
+    key = models.CharField(max_length=64, primary_key=True)
+    model = models.CharField(max_length=100)
+    dimension = models.PositiveIntegerField()
+    vector = models.BinaryField()
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        db_table = "embedding_cache"
+
+    def __str__(self):
+        return f"{self.model}/{self.dimension} - {self.key[:12]}"
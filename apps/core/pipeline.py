@@ -0,0 +1,317 @@
+"""
+Multi-stage processing pipeline connected by bounded queues.
+"""
+
+import queue
+import threading
+import time
+
+# Marks the end of a stage's input
+_DONE = object()
+# Seconds between checks for a halted stage while blocked on a queue
+_POLL_INTERVAL = 0.1
+
+
+class Stage:
+    """
+    One pipeline stage: a function applied by a pool of worker threads.
+
+    The function receives one item and returns an iterable of output items (or
+    None), so a stage can drop, transform or split items. A stage with a single
+    worker may also define ``flush``, called once after its last input, to emit
+    items it buffered (e.g. a partial chunk window).
+    """
+
+    def __init__(self, name, func, workers=1, queue_size=4, flush=None, on_exit=None):
+        """
+        Initialize the stage.
+
+        Args:
+            name: Stage name used in stats
+            func: Callable taking one item and returning an iterable of items or None
+            workers: Worker threads running func concurrently
+            queue_size: Capacity of the stage's input queue; a full queue blocks
+                the previous stage (backpressure)
+            flush: Optional zero-argument callable returning the stage's final items
+            on_exit: Optional zero-argument callable run on each worker thread as it
+                exits, even after an error (e.g. to close thread-local connections)
+        """
+        if flush is not None and workers != 1:
+            raise ValueError(f"Stage '{name}' must have a single worker to use flush")
+        self.name = name
+        self.func = func
+        self.workers = max(1, workers)
+        self.queue_size = max(1, queue_size)
+        self.flush = flush
+        self.on_exit = on_exit
+
+
+class Pipeline:
+    """
+    Runs a source iterable through a chain of stages on separate threads.
+
+    Stages are connected by bounded queues, so each stage works concurrently with
+    the others and at most ``queue_size + workers`` items wait in or are held by a
+    stage at once.
+
+    An exception raised by the source or a stage halts that stage and every stage
+    before it: their workers take no new items, but an item a worker is already
+    processing is finished and its outputs are handed on. The stages after the
+    failed one finish every item handed to them, so work completed before the
+    failure is not lost (e.g. windows embedded by the other workers of a failed
+    embedding stage are still stored). Flush hooks are skipped after a failure,
+    and the first exception is re-raised by run().
+    """
+
+    def __init__(self, source, stages, source_name="source"):
+        """
+        Initialize the pipeline.
+
+        Args:
+            source: Iterable of input items; iterated on its own thread and timed
+                as the first stage
+            stages: List of Stage, in order
+            source_name: Stats name of the source stage
+        """
+        self.source = source
+        self.stages = stages
+        self.source_name = source_name
+        self._queues = [queue.Queue(maxsize=stage.queue_size) for stage in stages]
+        # Stages up to this index (-1 is the source) stop taking new items
+        self._halted_through = -2
+        self._error = None
+        self._lock = threading.Lock()
+        self._active = [stage.workers for stage in stages]
+        self._stats = {
+            name: {"items": 0, "busy_seconds": 0.0, "workers": workers, "max_queue": 0}
+            for name, workers in [(source_name, 1)] + [(s.name, s.workers) for s in stages]
+        }
+        self._queue_samples = {stage.name: [0, 0] for stage in stages}
+        self._wall_seconds = 0.0
+
+    def run(self):
+        """
+        Run the pipeline to completion.
+
+        Returns:
+            dict: Per-stage stats (see stats())
+
+        Raises:
+            Exception: The first error raised by the source or a stage
+        """
+        started = time.monotonic()
+        threads = [threading.Thread(target=self._feed, daemon=True)]
+        for index, stage in enumerate(self.stages):
+            threads.extend(
+                threading.Thread(target=self._work, args=(index,), daemon=True)
+                for _ in range(stage.workers)
+            )
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self._wall_seconds = time.monotonic() - started
+
+        if self._error is not None:
+            raise self._error
+        return self.stats()
+
+    def _fail(self, error, index):
+        """Record an error raised by stage index (-1: the source) and halt it."""
+        with self._lock:
+            if self._error is None:
+                self._error = error
+            self._halted_through = max(self._halted_through, index)
+
+    def _halted(self, index):
+        return index <= self._halted_through
+
+    def _put(self, index, item, owner):
+        """
+        Put an item on stage index's queue, blocking while it is full.
+        Gives up if stage owner halts (the consumer, or the source for its own items).
+        """
+        if index >= len(self._queues):
+            return
+        target = self._queues[index]
+        while not self._halted(owner):
+            try:
+                target.put(item, timeout=_POLL_INTERVAL)
+            except queue.Full:
+                continue
+            if item is not _DONE:
+                depth = target.qsize()
+                name = self.stages[index].name
+                with self._lock:
+                    stats = self._stats[name]
+                    stats["max_queue"] = max(stats["max_queue"], depth)
+                    samples = self._queue_samples[name]
+                    samples[0] += depth
+                    samples[1] += 1
+            return
+
+    def _emit(self, index, items):
+        # Delivered even if stage index has halted, unless the next stage has too
+        for item in items or ():
+            self._put(index + 1, item, owner=index + 1)
+
+    def _record(self, name, busy):
+        with self._lock:
+            self._stats[name]["items"] += 1
+            self._stats[name]["busy_seconds"] += busy
+
+    def _feed(self):
+        """Iterate the source into the first stage's queue."""
+        try:
+            iterator = iter(self.source)
+            while not self._halted(-1):
+                started = time.monotonic()
+                item = next(iterator, _DONE)
+                if item is _DONE:
+                    break
+                self._record(self.source_name, time.monotonic() - started)
+                self._put(0, item, owner=-1)
+        except BaseException as e:
+            self._fail(e, -1)
+        finally:
+            for _ in range(self.stages[0].workers if self.stages else 0):
+                self._put(0, _DONE, owner=0)
+
+    def _work(self, index):
+        """Run a worker of stage index, then its stage's on_exit hook."""
+        stage = self.stages[index]
+        try:
+            self._work_loop(index)
+        finally:
+            if stage.on_exit is not None:
+                try:
+                    stage.on_exit()
+                except BaseException as e:
+                    self._fail(e, index)
+
+    def _work_loop(self, index):
+        """Worker loop of stage index."""
+        stage = self.stages[index]
+        source = self._queues[index]
+        try:
+            while not self._halted(index):
+                try:
+                    item = source.get(timeout=_POLL_INTERVAL)
+                except queue.Empty:
+                    continue
+                if item is _DONE:
+                    break
+                started = time.monotonic()
+                outputs = stage.func(item)
+                outputs = list(outputs) if outputs is not None else []
+                self._record(stage.name, time.monotonic() - started)
+                self._emit(index, outputs)
+        except BaseException as e:
+            self._fail(e, index)
+
+        # The stage's last worker flushes it and ends the next stage's input
+        with self._lock:
+            self._active[index] -= 1
+            last = self._active[index] == 0
+        if not last:
+            return
+        try:
+            if stage.flush is not None and self._error is None:
+                self._emit(index, stage.flush())
+        except BaseException as e:
+            self._fail(e, index)
+        finally:
+            if index + 1 < len(self.stages):
+                for _ in range(self.stages[index + 1].workers):
+                    self._put(index + 1, _DONE, owner=index + 1)
+
+    def stats(self):
+        """
+        Get per-stage throughput and queue depth.
+
+        Returns:
+            dict: Stage name -> stats (see derive_stats)
+        """
+        with self._lock:
+            result = {}
+            for name, stats in self._stats.items():
+                samples = self._queue_samples.get(name, [0, 0])
+                result[name] = derive_stats(
+                    {
+                        **stats,
+                        "wall_seconds": self._wall_seconds,
+                        "queue_depth_total": samples[0],
+                        "queue_samples": samples[1],
+                    }
+                )
+            return result
+
+
+def derive_stats(stats):
+    """
+    Add rates to a stage's raw counters.
+
+    Args:
+        stats: Dict with items, busy_seconds, workers, wall_seconds, max_queue,
+            queue_depth_total and queue_samples
+
+    Returns:
+        dict: stats plus items_per_second (throughput the stage sustains with all
+        its workers busy), utilization (busy share of the wall time across its
+        workers; the bottleneck is the stage closest to 1) and avg_queue (mean
+        depth of its input queue)
+    """
+    busy = stats["busy_seconds"]
+    wall = stats["wall_seconds"] * stats["workers"]
+    samples = stats["queue_samples"]
+    return {
+        **stats,
+        "items_per_second": stats["items"] * stats["workers"] / busy if busy else 0.0,
+        "utilization": busy / wall if wall else 0.0,
+        "avg_queue": stats["queue_depth_total"] / samples if samples else 0.0,
+    }
+
+
+class PipelineStats:
+    """
+    Thread-safe running total of the stats of several pipeline runs.
+    """
+
+    def __init__(self):
+        """Initialize an empty total."""
+        self._lock = threading.Lock()
+        self._total = {}
+
+    def add(self, stats):
+        """
+        Accumulate the stats of one pipeline run.
+
+        Args:
+            stats: Stats returned by Pipeline.run()
+        """
+        with self._lock:
+            for name, stage in stats.items():
+                entry = self._total.get(name)
+                if entry is None:
+                    self._total[name] = dict(stage)
+                    continue
+                for key in (
+                    "items",
+                    "busy_seconds",
+                    "wall_seconds",
+                    "queue_depth_total",
+                    "queue_samples",
+                ):
+                    entry[key] += stage[key]
+                entry["max_queue"] = max(entry["max_queue"], stage["max_queue"])
+                self._total[name] = derive_stats(entry)
+
+    def snapshot(self):
+        """
+        Get the accumulated stats.
+
+        Returns:
+            dict: Stage name -> stats (see derive_stats), rates computed over all runs
+        """
+        with self._lock:
+            return {name: dict(stage) for name, stage in self._total.items()}
@@ -0,0 +1,312 @@
+"""
+Redis-backed provider quota shared by every web and ingestion process.
+
+All processes using one provider key draw from the same request bucket, token
+bucket and concurrency semaphore stored in Redis. Each acquisition runs as one
+Lua script, so the check-and-take is atomic across workers.
+
+Priority classes decide who goes first when quota is short:
+
+- ``interactive`` (chat, agent planning, query embeddings) may use the whole budget.
+- ``bulk`` (ingestion) must leave ``BULK_RESERVE`` of the token budget and of the
+  concurrency slots untouched, and stands aside while any interactive caller is
+  waiting.
+
+If Redis is unreachable the quota fails open: calls proceed and are still
+governed by the in-process rate limiter.
+"""
+
+import logging
+import time
+import uuid
+from contextlib import contextmanager
+
+import redis
+from django.conf import settings
+
+from apps.core.batching import estimate_tokens
+from apps.core.registry import services
+
+logger = logging.getLogger(__name__)
+
+INTERACTIVE = "interactive"
+BULK = "bulk"
+PRIORITIES = (INTERACTIVE, BULK)
+
+# How long an interactive waiter stays visible to bulk callers beyond its current wait
+WAITER_TTL_MS = 2000
+
+# Poll interval when denied for a reason other than bucket refill
+RETRY_INTERVAL_MS = 50
+
+ACQUIRE_SCRIPT = """
+local requests_key, tokens_key, holders_key, waiters_key = KEYS[1], KEYS[2], KEYS[3], KEYS[4]
+local now = tonumber(ARGV[1])
+local rpm = tonumber(ARGV[2])
+local tpm = tonumber(ARGV[3])
+local cost = tonumber(ARGV[4])
+local max_slots = tonumber(ARGV[5])
+local reserve = tonumber(ARGV[6])
+local is_bulk = ARGV[7] == "1"
+local holder = ARGV[8]
+local slot_ttl = tonumber(ARGV[9])
+local retry = tonumber(ARGV[10])
+
+local function refill(key, capacity)
+    local state = redis.call("HMGET", key, "level", "ts")
+    local level = tonumber(state[1]) or capacity
+    local ts = tonumber(state[2]) or now
+    level = math.min(capacity, level + (now - ts) * capacity / 60000)
+    return level
+end
+
+redis.call("ZREMRANGEBYSCORE", holders_key, "-inf", now)
+redis.call("ZREMRANGEBYSCORE", waiters_key, "-inf", now)
+
+if is_bulk and redis.call("ZCARD", waiters_key) > 0 then
+    return retry
+end
+
+local requests = refill(requests_key, rpm)
+local tokens = refill(tokens_key, tpm)
+local token_floor = 0
+local slots = max_slots
+if is_bulk then
+    token_floor = tpm * reserve
+    slots = math.max(1, max_slots - math.floor(max_slots * reserve))
+end
+
+-- Oversized requests may run once the bucket is full
+cost = math.min(cost, tpm - token_floor)
+
+local wait = 0
+if requests < 1 then
+    wait = math.max(wait, math.ceil((1 - requests) * 60000 / rpm))
+end
+if tokens - cost < token_floor then
+    wait = math.max(wait, math.ceil((cost + token_floor - tokens) * 60000 / tpm))
+end
+if wait == 0 and redis.call("ZCARD", holders_key) >= slots then
+    wait = retry
+end
+if wait > 0 then
+    return wait
+end
+
+redis.call("HSET", requests_key, "level", requests - 1, "ts", now)
+redis.call("HSET", tokens_key, "level", tokens - cost, "ts", now)
+redis.call("PEXPIRE", requests_key, 120000)
+redis.call("PEXPIRE", tokens_key, 120000)
+redis.call("ZADD", holders_key, now + slot_ttl, holder)
+redis.call("PEXPIRE", holders_key, slot_ttl * 2)
+return 0
+"""
+
+
+class QuotaTimeout(Exception):
+    """Raised when provider quota could not be acquired in time."""
+
+
+class RedisQuota:
+    """
+    Distributed token bucket and concurrency semaphore for one provider key.
+    """
+
+    def __init__(
+        self,
+        client,
+        name="openai",
+        requests_per_minute=3000,
+        tokens_per_minute=1_000_000,
+        max_concurrency=16,
+        bulk_reserve=0.2,
+        slot_ttl=120,
+    ):
+        """
+        Initialize the quota.
+
+        Args:
+            client: redis.Redis client
+            name: Quota name; processes sharing a name share the budget
+            requests_per_minute: Request budget per minute
+            tokens_per_minute: Token budget per minute
+            max_concurrency: Maximum in-flight requests across all processes
+            bulk_reserve: Fraction of tokens and slots bulk callers must leave free
+            slot_ttl: Seconds after which a slot held by a crashed process expires
+        """
+        self.client = client
+        self.requests_per_minute = requests_per_minute
+        self.tokens_per_minute = tokens_per_minute
+        self.max_concurrency = max_concurrency
+        self.bulk_reserve = bulk_reserve
+        self.slot_ttl_ms = int(slot_ttl * 1000)
+        prefix = f"quota:{name}"
+        self.keys = [f"{prefix}:requests", f"{prefix}:tokens", f"{prefix}:holders"]
+        self.waiters_key = f"{prefix}:waiters"
+        self._acquire = client.register_script(ACQUIRE_SCRIPT)
+
+    @contextmanager
+    def slot(self, tokens=1, priority=INTERACTIVE, timeout=None):
+        """
+        Hold a quota slot for the duration of one provider call.
+
+        Args:
+            tokens: Estimated tokens the call will consume
+            priority: 'interactive' or 'bulk'
+            timeout: Maximum seconds to wait, or None to wait indefinitely
+
+        Yields:
+            None
+        """
+        holder = self.acquire(tokens, priority, timeout)
+        try:
+            yield
+        finally:
+            self.release(holder)
+
+    def acquire(self, tokens=1, priority=INTERACTIVE, timeout=None):
+        """
+        Block until the shared quota admits one call.
+
+        Args:
+            tokens: Estimated tokens the call will consume
+            priority: 'interactive' or 'bulk'
+            timeout: Maximum seconds to wait, or None to wait indefinitely
+
+        Returns:
+            str | None: Holder id to pass to release(), or None when failing open
+        """
+        if priority not in PRIORITIES:
+            raise ValueError(f"Unknown quota priority: {priority}")
+
+        holder = uuid.uuid4().hex
+        is_bulk = priority == BULK
+        deadline = time.monotonic() + timeout if timeout is not None else None
+        waiting = False
+
+        try:
+            while True:
+                now = self._now_ms()
+                wait_ms = self._acquire(
+                    keys=[*self.keys, self.waiters_key],
+                    args=[
+                        now,
+                        self.requests_per_minute,
+                        self.tokens_per_minute,
+                        tokens,
+                        self.max_concurrency,
+                        self.bulk_reserve,
+                        "1" if is_bulk else "0",
+                        holder,
+                        self.slot_ttl_ms,
+                        RETRY_INTERVAL_MS,
+                    ],
+                )
+                if int(wait_ms) == 0:
+                    return holder
+
+                wait = int(wait_ms) / 1000
+                if deadline is not None and time.monotonic() + wait > deadline:
+                    raise QuotaTimeout(f"Provider quota not available within {timeout}s")
+                if not is_bulk:
+                    # Hold bulk callers back only while an interactive call actually waits
+                    self.client.zadd(self.waiters_key, {holder: now + int(wait_ms) + WAITER_TTL_MS})
+                    waiting = True
+                time.sleep(wait)
+        except redis.RedisError as e:
+            logger.warning("Provider quota unavailable, proceeding without it: %s", e)
+            return None
+        finally:
+            if waiting:
+                self._forget_waiter(holder)
+
+    def release(self, holder):
+        """
+        Release a slot returned by acquire().
+
+        Args:
+            holder: Holder id (None when acquire failed open)
+        """
+        if holder is None:
+            return
+        try:
+            self.client.zrem(self.keys[2], holder)
+        except redis.RedisError as e:
+            logger.warning("Failed to release provider quota slot: %s", e)
+
+    def _forget_waiter(self, holder):
+        """Stop advertising an interactive waiter to bulk callers."""
+        try:
+            self.client.zrem(self.waiters_key, holder)
+        except redis.RedisError:
+            pass
+
+    def _now_ms(self):
+        """Current time in milliseconds from the Redis server clock, shared by all workers."""
+        seconds, microseconds = self.client.time()
+        return seconds * 1000 + microseconds // 1000
+
+
+def estimate_chat_tokens(messages):
+    """
+    Estimate the tokens a chat completion will consume.
+
+    Args:
+        messages: List of chat message dicts (role, content)
+
+    Returns:
+        int: Estimated prompt tokens plus the configured completion allowance
+    """
+    prompt = sum(estimate_tokens(message.get("content") or "") for message in messages)
+    return prompt + settings.PROVIDER_QUOTA.get("CHAT_OUTPUT_TOKENS", 1024)
+
+
+@contextmanager
+def provider_slot(provider, tokens=1, priority=INTERACTIVE):
+    """
+    Hold a shared provider quota slot if the distributed quota covers the provider.
+
+    Args:
+        provider: Provider about to be called (e.g. 'openai')
+        tokens: Estimated tokens the call will consume
+        priority: 'interactive' or 'bulk'
+
+    Yields:
+        None
+    """
+    quota = get_provider_quota()
+    if quota is None or provider != settings.PROVIDER_QUOTA.get("NAME", "openai"):
+        yield
+        return
+
+    timeout = (
+        settings.PROVIDER_QUOTA.get("INTERACTIVE_TIMEOUT") if priority == INTERACTIVE else None
+    )
+    with quota.slot(tokens=tokens, priority=priority, timeout=timeout):
+        yield
+
+
+def get_provider_quota():
+    """
+    Get the process-wide RedisQuota.
+
+    Returns:
+        RedisQuota | None: Shared quota, or None when PROVIDER_QUOTA is disabled
+    """
+    config = settings.PROVIDER_QUOTA
+    if not config.get("ENABLED"):
+        return None
+
+    return services.get(
+        "provider_quota",
+        lambda: RedisQuota(
+            client=redis.Redis.from_url(
+                config["REDIS_URL"], socket_timeout=1, socket_connect_timeout=1
+            ),
+            name=config.get("NAME", "openai"),
+            requests_per_minute=config.get("REQUESTS_PER_MINUTE", 3000),
+            tokens_per_minute=config.get("TOKENS_PER_MINUTE", 1_000_000),
+            max_concurrency=config.get("MAX_CONCURRENCY", 16),
+            bulk_reserve=config.get("BULK_RESERVE", 0.2),
+        ),
+    )
@@ -0,0 +1,273 @@
+"""
+Adaptive client-side rate limiting for provider calls.
+
+AdaptiveRateLimiter combines three mechanisms:
+
+- Token buckets for requests and tokens per minute. Their capacity is learned
+  from the provider's ``x-ratelimit-*`` response headers (or seeded from settings),
+  and the remaining budget reported by the provider is tracked on every response.
+- A shared pause after a 429, honouring ``retry-after`` so every caller backs
+  off together instead of each one hammering the API on its own schedule.
+- An AIMD concurrency window: halved on every throttle, grown by one after a
+  full window of successes, so in-flight requests settle at the highest level
+  the provider sustains.
+"""
+
+import random
+import re
+import threading
+import time
+
+from apps.core.registry import services
+
+DURATION_RE = re.compile(r"(\d+(?:\.\d+)?)(ms|s|m|h)")
+DURATION_UNITS = {"ms": 0.001, "s": 1, "m": 60, "h": 3600}
+
+
+def parse_duration(value):
+    """
+    Parse a provider reset duration such as '1s', '6m0s' or '20ms'.
+
+    Args:
+        value: Duration string, or plain seconds
+
+    Returns:
+        float | None: Seconds, or None when value cannot be parsed
+    """
+    if value is None:
+        return None
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        pass
+    parts = DURATION_RE.findall(str(value))
+    if not parts:
+        return None
+    return sum(float(amount) * DURATION_UNITS[unit] for amount, unit in parts)
+
+
+def retry_after_seconds(headers):
+    """
+    Get the server-requested wait from rate-limit response headers.
+
+    Args:
+        headers: Response headers mapping (case-insensitive mappings preferred)
+
+    Returns:
+        float | None: Seconds to wait, or None when the headers do not say
+    """
+    if not headers:
+        return None
+    milliseconds = parse_duration(headers.get("retry-after-ms"))
+    if milliseconds is not None:
+        return milliseconds / 1000
+    for name in ("retry-after", "x-ratelimit-reset-requests", "x-ratelimit-reset-tokens"):
+        seconds = parse_duration(headers.get(name))
+        if seconds is not None:
+            return seconds
+    return None
+
+
+def backoff_delay(attempt, base=1.0, cap=60.0, retry_after=None):
+    """
+    Compute a jittered backoff delay.
+
+    Uses "full jitter" exponential backoff, or the server's retry-after plus a
+    small jitter so that waiting callers do not all retry at the same instant.
+
+    Args:
+        attempt: Retry attempt number, starting at 1
+        base: Base delay in seconds
+        cap: Maximum delay in seconds
+        retry_after: Optional server-requested wait in seconds
+
+    Returns:
+        float: Seconds to sleep
+    """
+    if retry_after is not None:
+        return min(cap, retry_after) + random.uniform(0, base)  # nosec B311
+    return random.uniform(0, min(cap, base * 2**attempt))  # nosec B311
+
+
+class TokenBucket:
+    """
+    Token bucket refilled continuously at ``capacity`` per minute.
+    Not thread-safe on its own; guarded by AdaptiveRateLimiter's lock.
+    """
+
+    def __init__(self, capacity=None):
+        """
+        Initialize the bucket.
+
+        Args:
+            capacity: Budget per minute, or None for unlimited until learned
+        """
+        self.capacity = capacity
+        self.level = capacity
+        self.updated = time.monotonic()
+
+    def refill(self, now):
+        """Add the budget accrued since the last refill."""
+        if self.capacity is not None:
+            self.level = min(self.capacity, self.level + (now - self.updated) * self.capacity / 60)
+        self.updated = now
+
+    def wait_time(self, amount):
+        """Seconds until amount is available (0 when it is available now)."""
+        if self.capacity is None:
+            return 0.0
+        # Requests larger than the whole bucket may run once it is full
+        needed = min(amount, self.capacity) - self.level
+        return max(0.0, needed * 60 / self.capacity)
+
+    def take(self, amount):
+        """Consume amount (the level may go negative for oversized requests)."""
+        if self.capacity is not None:
+            self.level -= amount
+
+    def learn(self, limit, remaining):
+        """Adopt the provider's reported limit and remaining budget."""
+        if limit is not None:
+            if self.capacity is None:
+                self.level = limit
+            self.capacity = limit
+        if remaining is not None and self.level is not None:
+            self.level = min(self.level, remaining)
+
+
+class AdaptiveRateLimiter:
+    """
+    Thread-safe limiter gating provider calls on request/token budgets and concurrency.
+    """
+
+    def __init__(self, max_concurrency=4, requests_per_minute=None, tokens_per_minute=None):
+        """
+        Initialize the limiter.
+
+        Args:
+            max_concurrency: Upper bound for in-flight requests
+            requests_per_minute: Initial request budget, or None to learn from headers
+            tokens_per_minute: Initial token budget, or None to learn from headers
+        """
+        self.max_concurrency = max_concurrency
+        self.concurrency = max_concurrency
+        self.requests = TokenBucket(requests_per_minute)
+        self.tokens = TokenBucket(tokens_per_minute)
+        self._in_flight = 0
+        self._successes = 0
+        self._paused_until = 0.0
+        self._condition = threading.Condition()
+        self._stats = {"requests": 0, "throttled": 0, "failed": 0, "waited_seconds": 0.0}
+
+    def acquire(self, tokens=1):
+        """
+        Block until a request of the given token size may be sent.
+
+        Args:
+            tokens: Estimated tokens the request will consume
+        """
+        started = time.monotonic()
+        with self._condition:
+            while True:
+                now = time.monotonic()
+                self.requests.refill(now)
+                self.tokens.refill(now)
+                wait = max(
+                    self._paused_until - now,
+                    self.requests.wait_time(1),
+                    self.tokens.wait_time(tokens),
+                )
+                if wait <= 0 and self._in_flight < self.concurrency:
+                    break
+                # Wake up on release() or when the budget should have refilled
+                self._condition.wait(timeout=wait if wait > 0 else None)
+
+            self.requests.take(1)
+            self.tokens.take(tokens)
+            self._in_flight += 1
+            self._stats["requests"] += 1
+            self._stats["waited_seconds"] += time.monotonic() - started
+
+    def release(self, headers=None, throttled=False, retry_after=None, failed=False):
+        """
+        Release a slot acquired with acquire() and learn from the response.
+
+        Args:
+            headers: Response headers carrying x-ratelimit-* values, if any
+            throttled: Whether the provider answered with a rate-limit error
+            retry_after: Server-requested wait in seconds after a throttle
+            failed: Whether the request failed otherwise (timeout, connection or
+                server error); it does not shrink the window, but does not grow it either
+        """
+        with self._condition:
+            self._in_flight -= 1
+            if headers:
+                self._learn(headers)
+
+            if throttled:
+                self._stats["throttled"] += 1
+                self._successes = 0
+                self.concurrency = max(1, self.concurrency // 2)
+                if retry_after is not None:
+                    self._paused_until = max(self._paused_until, time.monotonic() + retry_after)
+            elif failed:
+                self._stats["failed"] += 1
+                self._successes = 0
+            else:
+                self._successes += 1
+                if self._successes >= self.concurrency and self.concurrency < self.max_concurrency:
+                    self.concurrency += 1
+                    self._successes = 0
+
+            self._condition.notify_all()
+
+    def stats(self):
+        """
+        Get limiter counters and the currently learned limits.
+
+        Returns:
+            dict: Request, throttle and failure counters, concurrency window and learned budgets
+        """
+        with self._condition:
+            return {
+                **self._stats,
+                "concurrency": self.concurrency,
+                "requests_per_minute": self.requests.capacity,
+                "tokens_per_minute": self.tokens.capacity,
+            }
+
+    def _learn(self, headers):
+        """Update the buckets from x-ratelimit-* headers."""
+
+        def number(name):
+            value = headers.get(name)
+            try:
+                return float(value) if value is not None else None
+            except (TypeError, ValueError):
+                return None
+
+        self.requests.learn(
+            number("x-ratelimit-limit-requests"), number("x-ratelimit-remaining-requests")
+        )
+        self.tokens.learn(
+            number("x-ratelimit-limit-tokens"), number("x-ratelimit-remaining-tokens")
+        )
+
+
+def get_rate_limiter(name, max_concurrency, requests_per_minute=None, tokens_per_minute=None):
+    """
+    Get the process-wide rate limiter for a provider/model, creating it on first use.
+
+    Args:
+        name: Limiter key (e.g. provider/model)
+        max_concurrency: Upper bound for in-flight requests
+        requests_per_minute: Initial request budget, or None to learn from headers
+        tokens_per_minute: Initial token budget, or None to learn from headers
+
+    Returns:
+        AdaptiveRateLimiter: Shared limiter
+    """
+    return services.get(
+        f"rate_limiter:{name}",
+        lambda: AdaptiveRateLimiter(max_concurrency, requests_per_minute, tokens_per_minute),
+    )
@@ -0,0 +1,66 @@
+"""
+Process-wide registry of shared service instances.
+
+Provider clients (OpenAI, Groq, Qdrant) hold HTTP connection pools and some run
+setup round trips when constructed. Building them once per process and sharing
+them across requests keeps connections alive and moves setup cost off the
+request path.
+"""
+
+import threading
+
+
+class ServiceRegistry:
+    """
+    Thread-safe, lazily populated registry of shared service instances.
+    """
+
+    def __init__(self):
+        """Initialize an empty registry."""
+        self._instances = {}
+        self._lock = threading.RLock()
+
+    def get(self, key, factory):
+        """
+        Get the shared instance for key, creating it with factory on first use.
+
+        Args:
+            key: Registry key
+            factory: Zero-argument callable building the instance
+
+        Returns:
+            object: Shared instance
+        """
+        instance = self._instances.get(key)
+        if instance is None:
+            with self._lock:
+                instance = self._instances.get(key)
+                if instance is None:
+                    instance = factory()
+                    self._instances[key] = instance
+        return instance
+
+    def reset(self):
+        """Drop all shared instances so they are rebuilt from current settings."""
+        with self._lock:
+            self._instances.clear()
+
+
+services = ServiceRegistry()
+
+# Settings that shared instances are built from
+TRACKED_SETTINGS = {
+    "LLM_CONFIG",
+    "EMBEDDING_CONFIG",
+    "QDRANT_CONFIG",
+    "SERPER_API_KEY",
+    "PROVIDER_QUOTA",
+    "VECTOR_BACKEND",
+    "LOCAL_VECTOR_STORE",
+}
+
+
+def reset_on_setting_changed(setting, **kwargs):
+    """Signal receiver resetting the registry when a tracked setting is overridden."""
+    if setting in TRACKED_SETTINGS:
+        services.reset()
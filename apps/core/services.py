@@ -2,40 +2,116 @@
 Core Services.
 """
 
+import base64
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from functools import partial
+
+import numpy as np
+import openai
 from django.conf import settings
 from groq import Groq
 from openai import OpenAI
 
+from apps.core.batching import estimate_tokens, split_batches
+from apps.core.coalescer import EmbeddingCoalescer
+from apps.core.embedding_cache import get_embedding_cache, make_cache_key
+from apps.core.local_embedder import MODEL_NAME as LOCAL_MODEL_NAME
+from apps.core.local_embedder import LocalEmbedder
+from apps.core.quota import BULK, INTERACTIVE, provider_slot
+from apps.core.rate_limit import backoff_delay, get_rate_limiter, retry_after_seconds
+from apps.core.registry import services
+
+# OpenAI models that accept a reduced output size via the `dimensions` parameter
+SHORTENABLE_MODELS = {"text-embedding-3-small", "text-embedding-3-large"}
+
+# Transient provider errors worth retrying for a single sub-batch
+RETRYABLE_ERRORS = (
+    openai.APIConnectionError,
+    openai.APITimeoutError,
+    openai.InternalServerError,
+)
+
+
+def decode_embedding(embedding):
+    """
+    Convert a provider embedding to a float32 vector.
+
+    Args:
+        embedding: base64-encoded float32 buffer or list of floats
+
+    Returns:
+        np.ndarray: float32 vector
+    """
+    if isinstance(embedding, str):
+        return np.frombuffer(base64.b64decode(embedding), dtype=np.float32)
+    return np.asarray(embedding, dtype=np.float32)
+
 
 class EmbeddingService:
     """
     Service class for generating text embeddings.
+    Embeddings are served from the shared embedding cache when available.
     """
 
-    def __init__(self, provider=None):
+    def __init__(self, provider=None, cache=None, dimension=None, model=None):
         """
         Initialize the embedding service.
 
         Args:
-            provider: 'openai' or 'groq'. If None, uses DEFAULT_PROVIDER from settings
+            provider: 'openai', 'groq' or 'local'. If None, uses DEFAULT_PROVIDER from settings
+            cache: Optional EmbeddingCache. If None, uses the process-wide cache
+            dimension: Output dimension. If None, uses EMBEDDING_DIMENSION from settings
+            model: Embedding model. If None, uses EMBEDDING_MODEL from settings
+                (the local provider always uses its own model)
         """
         self.provider = provider or settings.EMBEDDING_CONFIG["DEFAULT_PROVIDER"]
-        self.model = settings.EMBEDDING_CONFIG["EMBEDDING_MODEL"]
-        self.dimension = settings.EMBEDDING_CONFIG["EMBEDDING_DIMENSION"]
+        self.model = model or settings.EMBEDDING_CONFIG["EMBEDDING_MODEL"]
+        self.dimension = dimension or settings.EMBEDDING_CONFIG["EMBEDDING_DIMENSION"]
+        self.batch_max_items = settings.EMBEDDING_CONFIG.get("BATCH_MAX_ITEMS", 256)
+        self.batch_max_tokens = settings.EMBEDDING_CONFIG.get("BATCH_MAX_TOKENS", 100_000)
+        self.batch_concurrency = settings.EMBEDDING_CONFIG.get("BATCH_CONCURRENCY", 4)
+        self.batch_max_retries = settings.EMBEDDING_CONFIG.get("BATCH_MAX_RETRIES", 5)
+        self.retry_base_delay = 1.0
 
         if self.provider == "openai":
             api_key = settings.LLM_CONFIG["OPENAI_API_KEY"]
             if not api_key:
                 raise ValueError("OpenAI API key not configured")
-            self.client = OpenAI(api_key=api_key)
+            # Retries go through _request_with_retry, so the rate limiter sees every attempt
+            self.client = OpenAI(api_key=api_key, max_retries=0)
         elif self.provider == "groq":
             api_key = settings.LLM_CONFIG["GROQ_API_KEY"]
             if not api_key:
                 raise ValueError("Groq API key not configured")
             self.client = Groq(api_key=api_key)
+        elif self.provider == "local":
+            self.model = LOCAL_MODEL_NAME
+            self.client = LocalEmbedder(self.dimension)
         else:
             raise ValueError(f"Unsupported provider: {self.provider}")
 
+        # Local embeddings are cheaper to recompute than to cache, coalesce or throttle
+        self.cache = None
+        self.coalescer = None
+        self.rate_limiter = None
+        if self.provider != "local":
+            self.cache = cache if cache is not None else get_embedding_cache()
+            self.rate_limiter = get_rate_limiter(
+                f"{self.provider}:{self.model}",
+                max_concurrency=self.batch_concurrency,
+                requests_per_minute=settings.EMBEDDING_CONFIG.get("RATE_LIMIT_RPM") or None,
+                tokens_per_minute=settings.EMBEDDING_CONFIG.get("RATE_LIMIT_TPM") or None,
+            )
+
+            coalesce_wait_ms = settings.EMBEDDING_CONFIG.get("COALESCE_WAIT_MS", 5)
+            if coalesce_wait_ms > 0:
+                self.coalescer = EmbeddingCoalescer(
+                    partial(self._embed_cached, lookup=False, priority=INTERACTIVE),
+                    max_wait_ms=coalesce_wait_ms,
+                    max_batch_size=settings.EMBEDDING_CONFIG.get("COALESCE_MAX_BATCH", 64),
+                )
+
     def embed(self, text):
         """
         Generate embedding for the given text.
@@ -44,40 +120,240 @@ class EmbeddingService:
             text: Input text to embed
 
         Returns:
-            list[float]: Embedding vector
+            np.ndarray: float32 embedding vector of shape (dimension,)
         """
         if not text or not text.strip():
             raise ValueError("Text cannot be empty")
 
         try:
-            if self.provider == "openai":
-                response = self.client.embeddings.create(model=self.model, input=text)
-                return response.data[0].embedding
-            elif self.provider == "groq":
-                # Note: Groq may not support embeddings directly
-                # This is a placeholder implementation
-                raise NotImplementedError("Groq embedding not yet supported")
+            if self.coalescer is None:
+                return self._embed_cached([text], priority=INTERACTIVE)[0]
+
+            # Serve cache hits directly; only misses wait to be coalesced
+            if self.cache is not None:
+                key = make_cache_key(self.model, self.dimension, text)
+                cached = self.cache.get_many([key]).get(key)
+                if cached is not None:
+                    return cached
+            return self.coalescer.submit(text)
         except Exception as e:
             raise Exception(f"Failed to generate embedding: {str(e)}") from e
 
-    def embed_batch(self, texts):
+    def embed_batch(self, texts, priority=BULK):
         """
         Generate embeddings for multiple texts.
+        Only cache misses are sent to the provider.
 
         Args:
             texts: List of input texts
+            priority: Provider quota class, 'bulk' (default) or 'interactive'
 
         Returns:
-            list[list[float]]: List of embedding vectors
+            np.ndarray: Contiguous float32 array of shape (len(texts), dimension),
+                rows in input order
         """
         if not texts:
-            return []
+            return np.empty((0, self.dimension), dtype=np.float32)
 
         try:
-            if self.provider == "openai":
-                response = self.client.embeddings.create(model=self.model, input=texts)
-                return [item.embedding for item in response.data]
-            elif self.provider == "groq":
-                raise NotImplementedError("Groq embedding not yet supported")
+            return self._embed_cached(texts, priority=priority)
         except Exception as e:
             raise Exception(f"Failed to generate embeddings: {str(e)}") from e
+
+    def cache_stats(self):
+        """
+        Get embedding cache hit/miss counters.
+
+        Returns:
+            dict: Cache statistics, or None when caching is disabled
+        """
+        return self.cache.stats() if self.cache is not None else None
+
+    def _embed_cached(self, texts, lookup=True, priority=BULK):
+        """
+        Resolve embeddings from the cache and fetch the misses from the provider.
+
+        Args:
+            texts: List of input texts
+            lookup: Whether to read the cache first (False when the caller already
+                knows the texts are misses)
+            priority: Provider quota class for the misses
+
+        Returns:
+            np.ndarray: float32 array of shape (len(texts), dimension)
+        """
+        if self.cache is None:
+            return self._create_embeddings(texts, priority=priority)
+
+        keys = [make_cache_key(self.model, self.dimension, text) for text in texts]
+        vectors = self.cache.get_many(keys) if lookup else {}
+
+        # Deduplicate misses so repeated texts are only embedded once
+        missing = {}
+        for key, text in zip(keys, texts, strict=True):
+            if key not in vectors:
+                missing.setdefault(key, text)
+
+        if missing:
+            missing_keys = list(missing)
+
+            def store(indices, batch_vectors):
+                # Cache each sub-batch as soon as it lands so a failed call can resume
+                fresh = {missing_keys[i]: v for i, v in zip(indices, batch_vectors, strict=True)}
+                self.cache.set_many(fresh, model=self.model, dimension=self.dimension)
+                vectors.update(fresh)
+
+            self._create_embeddings(list(missing.values()), on_batch=store, priority=priority)
+
+        return np.stack([vectors[key] for key in keys])
+
+    def _create_embeddings(self, texts, on_batch=None, priority=BULK):
+        """
+        Call the provider for a list of texts.
+
+        Texts are split into sub-batches bounded by item count and estimated tokens,
+        which are sent concurrently through a bounded thread pool. Each sub-batch is
+        retried on its own, so batches that already succeeded are never resent.
+
+        Args:
+            texts: List of input texts
+            on_batch: Optional callback(indices, vectors) invoked in the calling
+                thread as each sub-batch completes
+            priority: Provider quota class for the requests
+
+        Returns:
+            np.ndarray: float32 array of shape (len(texts), dimension)
+        """
+        batches = split_batches(texts, self.batch_max_items, self.batch_max_tokens)
+        if len(batches) == 1:
+            vectors = self._request_with_retry(texts, priority)
+            if on_batch:
+                on_batch(batches[0], vectors)
+            return vectors
+
+        vectors = None
+        errors = []
+        with ThreadPoolExecutor(max_workers=min(self.batch_concurrency, len(batches))) as pool:
+            futures = {
+                pool.submit(
+                    self._request_with_retry, [texts[i] for i in indices], priority
+                ): indices
+                for indices in batches
+            }
+            for future in as_completed(futures):
+                indices = futures[future]
+                try:
+                    batch_vectors = future.result()
+                except Exception as e:
+                    errors.append(e)
+                    continue
+                if vectors is None:
+                    vectors = np.empty((len(texts), batch_vectors.shape[1]), dtype=np.float32)
+                vectors[indices] = batch_vectors
+                if on_batch:
+                    on_batch(indices, batch_vectors)
+
+        if errors:
+            raise errors[0]
+        return vectors
+
+    def _request_with_retry(self, texts, priority=BULK):
+        """
+        Send one sub-batch to the provider, retrying transient failures with backoff.
+
+        Requests pass through the shared rate limiter, which learns the provider's
+        budgets from response headers. Rate-limit errors pause every caller for the
+        server's retry-after and shrink the concurrency window; retries use
+        jittered exponential backoff. When PROVIDER_QUOTA is enabled, every request
+        also holds a slot of the quota shared with other processes, taken after
+        the local limiter admits it and released first.
+
+        Args:
+            texts: List of input texts for a single request
+            priority: Provider quota class, 'interactive' or 'bulk'
+
+        Returns:
+            np.ndarray: float32 array of shape (len(texts), dimension)
+        """
+        if self.rate_limiter is None:
+            return self._request_embeddings(texts)[0]
+
+        tokens = sum(estimate_tokens(text) for text in texts)
+        attempt = 0
+        while True:
+            retry_after = None
+            # Anything short of a response (including a QuotaTimeout before the request
+            # is sent) is released as a failure, so it never widens the window
+            outcome = {"failed": True}
+            # Wait on the local window first, so a throttled process does not hold a
+            # cluster-wide quota slot; the slot is taken just for the request itself
+            self.rate_limiter.acquire(tokens)
+            try:
+                with provider_slot(self.provider, tokens, priority):
+                    vectors, headers = self._request_embeddings(texts)
+            except openai.RateLimitError as e:
+                retry_after = retry_after_seconds(e.response.headers)
+                outcome = {
+                    "headers": e.response.headers,
+                    "throttled": True,
+                    "retry_after": retry_after,
+                }
+                error = e
+            except RETRYABLE_ERRORS as e:
+                error = e
+            else:
+                outcome = {"headers": headers}
+                return vectors
+            finally:
+                self.rate_limiter.release(**outcome)
+
+            attempt += 1
+            if attempt > self.batch_max_retries:
+                raise error
+            time.sleep(backoff_delay(attempt, base=self.retry_base_delay, retry_after=retry_after))
+
+    def _request_embeddings(self, texts):
+        """
+        Make a single provider request.
+
+        Args:
+            texts: List of input texts
+
+        Returns:
+            tuple: (float32 array of shape (len(texts), dimension), response headers)
+        """
+        if self.provider == "openai":
+            # base64 responses decode straight into a float32 buffer, skipping the
+            # JSON float list the SDK would otherwise build per vector
+            kwargs = {"model": self.model, "input": texts, "encoding_format": "base64"}
+            if self.model in SHORTENABLE_MODELS:
+                kwargs["dimensions"] = self.dimension
+            raw = self.client.embeddings.with_raw_response.create(**kwargs)
+            response = raw.parse()
+            vectors = np.stack([decode_embedding(item.embedding) for item in response.data])
+            return vectors, raw.headers
+        elif self.provider == "local":
+            return self.client.embed(texts), None
+        elif self.provider == "groq":
+            # Note: Groq may not support embeddings directly
+            raise NotImplementedError("Groq embedding not yet supported")
+
+
+def get_embedding_service(provider=None, model=None, dimension=None):
+    """
+    Get the process-wide EmbeddingService for a provider, model and dimension.
+
+    Args:
+        provider: Embedding provider. If None, uses DEFAULT_PROVIDER from settings
+        model: Embedding model. If None, uses EMBEDDING_MODEL from settings
+        dimension: Output dimension. If None, uses EMBEDDING_DIMENSION from settings
+
+    Returns:
+        EmbeddingService: Shared embedding service
+    """
+    if provider is None and model is None and dimension is None:
+        return services.get("embedding_service", EmbeddingService)
+    return services.get(
+        f"embedding_service:{provider}:{model}:{dimension}",
+        partial(EmbeddingService, provider=provider, model=model, dimension=dimension),
+    )
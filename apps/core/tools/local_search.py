@@ -2,9 +2,9 @@
 Local Search Tool for retrieving documents from knowledgebase.
 """
 
-from apps.core.services import EmbeddingService
+from apps.core.services import get_embedding_service
 from apps.knowledgebase.models import Document
-from apps.vectorstore.services import QdrantService
+from apps.vectorstore.services import get_qdrant_service
 
 
 class LocalSearchTool:
@@ -13,8 +13,8 @@ class LocalSearchTool:
     """
 
     def __init__(self):
-        self.qdrant_service = QdrantService()
-        self.embedding_service = EmbeddingService()
+        self.qdrant_service = get_qdrant_service()
+        self.embedding_service = get_embedding_service()
 
     def search(self, query, top_k=5):
         """
@@ -29,7 +29,10 @@ class LocalSearchTool:
         """
         # 1. Vector Search
         query_embedding = self.embedding_service.embed(query)
-        vector_results = self.qdrant_service.search_vectors(query_embedding, top_k=top_k)
+        # Only the parent document id is needed; content comes from the Document row
+        vector_results = self.qdrant_service.search_vectors(
+            query_embedding, top_k=top_k, with_payload=["document_id"]
+        )
 
         # 2. Keyword Search
         keyword_results = Document.keyword_search(query, top_k=top_k)
@@ -40,7 +43,8 @@ class LocalSearchTool:
 
         # Add vector results
         for res in vector_results:
-            doc_id = res["id"]
+            # Chunk points store their parent document id; document points use it as their id
+            doc_id = res["payload"].get("document_id") or str(res["id"])
             if doc_id not in seen_ids:
                 try:
                     doc = Document.objects.get(id=doc_id)
@@ -7,6 +7,8 @@ import json
 import requests
 from django.conf import settings
 
+from apps.core.registry import services
+
 
 class SerperDevTool:
     """
@@ -31,7 +33,9 @@ class SerperDevTool:
         headers = {"X-API-KEY": self.api_key, "Content-Type": "application/json"}
 
         try:
-            response = requests.request("POST", self.url, headers=headers, data=payload)
+            # Shared session keeps the HTTPS connection to Serper alive across requests
+            session = services.get("serper.session", requests.Session)
+            response = session.post(self.url, headers=headers, data=payload)
             return response.json()
         except Exception as e:
             return {"error": str(e)}
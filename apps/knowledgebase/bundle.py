@@ -0,0 +1,208 @@
+"""
+Knowledge-base bundle format used by the kb_export and kb_import commands.
+
+A bundle is a gzip stream of length-prefixed records, so both sides can work
+one record at a time without holding the corpus in memory::
+
+    MAGIC, format version (uint16)
+    header    JSON: collection, embedding model, dimension, created_at
+    document  JSON: one Document row
+    point     JSON length (uint32), JSON id/payload, dimension float32 values
+    end       JSON: document and point counts, to detect truncated bundles
+
+Vectors are stored as raw little-endian float32, which is 4 bytes per dimension
+instead of the ~10 a JSON float takes.
+"""
+
+import gzip
+import json
+import struct
+
+import numpy as np
+
+MAGIC = b"KBBUNDLE"
+FORMAT_VERSION = 1
+
+HEADER = b"H"
+DOCUMENT = b"D"
+POINT = b"P"
+END = b"E"
+
+_RECORD = struct.Struct("<cI")
+_UINT16 = struct.Struct("<H")
+_UINT32 = struct.Struct("<I")
+_VECTOR_DTYPE = np.dtype("<f4")
+
+
+class BundleWriter:
+    """
+    Write a knowledge-base bundle record by record.
+    """
+
+    def __init__(self, path, header, compresslevel=6):
+        """
+        Open a bundle for writing and write its header.
+
+        Args:
+            path: Destination file path
+            header: Dict with at least 'dimension'; stored as the header record
+            compresslevel: gzip compression level (1 fastest, 9 smallest)
+        """
+        self.dimension = int(header["dimension"])
+        self.documents = 0
+        self.points = 0
+        self._file = gzip.open(path, "wb", compresslevel=compresslevel)
+        self._file.write(MAGIC + _UINT16.pack(FORMAT_VERSION))
+        self._write_json(HEADER, {**header, "version": FORMAT_VERSION})
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close(complete=exc_type is None)
+
+    def _write_json(self, kind, data):
+        body = json.dumps(data, separators=(",", ":"), default=str).encode()
+        self._file.write(_RECORD.pack(kind, len(body)) + body)
+
+    def write_document(self, document):
+        """
+        Write one Document row.
+
+        Args:
+            document: Dict of the document's fields
+        """
+        self._write_json(DOCUMENT, document)
+        self.documents += 1
+
+    def write_point(self, point_id, vector, payload=None):
+        """
+        Write one vector point.
+
+        Args:
+            point_id: Point id
+            vector: Vector of the bundle's dimension
+            payload: Optional payload dict
+
+        Raises:
+            ValueError: If the vector does not have the bundle's dimension
+        """
+        vector = np.asarray(vector, dtype=_VECTOR_DTYPE)
+        if vector.shape != (self.dimension,):
+            raise ValueError(
+                f"Point {point_id} has shape {vector.shape}, expected ({self.dimension},)"
+            )
+        meta = json.dumps(
+            {"id": str(point_id), "payload": payload or {}}, separators=(",", ":"), default=str
+        ).encode()
+        body = _UINT32.pack(len(meta)) + meta + vector.tobytes()
+        self._file.write(_RECORD.pack(POINT, len(body)) + body)
+        self.points += 1
+
+    def close(self, complete=True):
+        """
+        Close the bundle, writing the end record unless the export failed.
+
+        Args:
+            complete: Whether to mark the bundle as complete
+        """
+        if self._file.closed:
+            return
+        try:
+            if complete:
+                self._write_json(END, {"documents": self.documents, "points": self.points})
+        finally:
+            self._file.close()
+
+
+class BundleReader:
+    """
+    Read a knowledge-base bundle record by record.
+    """
+
+    def __init__(self, path):
+        """
+        Open a bundle and read its header.
+
+        Args:
+            path: Bundle file path
+
+        Raises:
+            ValueError: If the file is not a bundle or has an unsupported version
+        """
+        self._file = gzip.open(path, "rb")
+        try:
+            prefix = self._read_exact(len(MAGIC) + _UINT16.size)
+            if prefix[: len(MAGIC)] != MAGIC:
+                raise ValueError("Not a knowledge-base bundle")
+            (version,) = _UINT16.unpack(prefix[len(MAGIC) :])
+            if version > FORMAT_VERSION:
+                raise ValueError(
+                    f"Bundle format version {version} is newer than supported ({FORMAT_VERSION})"
+                )
+            kind, body = self._read_record()
+            if kind != HEADER:
+                raise ValueError("Bundle is missing its header")
+            self.header = json.loads(body)
+            self.dimension = int(self.header["dimension"])
+        except Exception:
+            self._file.close()
+            raise
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    def close(self):
+        """Close the underlying file."""
+        self._file.close()
+
+    def _read_exact(self, size):
+        data = self._file.read(size)
+        if len(data) != size:
+            raise ValueError("Bundle is truncated")
+        return data
+
+    def _read_record(self):
+        kind, size = _RECORD.unpack(self._read_exact(_RECORD.size))
+        return kind, self._read_exact(size)
+
+    def records(self):
+        """
+        Iterate over the bundle's documents and points in file order.
+
+        Yields:
+            tuple: ('document', dict) or ('point', dict with 'id', 'payload', 'vector')
+
+        Raises:
+            ValueError: If the bundle is truncated, corrupt or its counts do not match
+        """
+        documents = 0
+        points = 0
+        while True:
+            kind, body = self._read_record()
+            if kind == DOCUMENT:
+                documents += 1
+                yield "document", json.loads(body)
+            elif kind == POINT:
+                (meta_size,) = _UINT32.unpack_from(body)
+                meta = json.loads(body[_UINT32.size : _UINT32.size + meta_size])
+                vector = np.frombuffer(
+                    body, dtype=_VECTOR_DTYPE, offset=_UINT32.size + meta_size
+                ).astype(np.float32)
+                if vector.shape != (self.dimension,):
+                    raise ValueError(f"Point {meta['id']} has the wrong dimension")
+                points += 1
+                yield "point", {**meta, "vector": vector}
+            elif kind == END:
+                expected = json.loads(body)
+                if expected != {"documents": documents, "points": points}:
+                    raise ValueError(
+                        f"Bundle counts do not match: expected {expected}, read "
+                        f"{documents} documents and {points} points"
+                    )
+                return
+            else:
+                raise ValueError(f"Unknown bundle record type {kind!r}")
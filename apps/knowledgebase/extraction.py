@@ -0,0 +1,69 @@
+"""
+PDF text extraction.
+
+pypdf is pure Python, so extraction is CPU-bound and holds the GIL; ingest_pdfs
+fans it out to a process pool. The task functions take file paths rather than
+open files so they are cheap to pickle, and this module imports nothing from
+Django so worker processes start quickly.
+"""
+
+import pypdf
+
+
+def page_text(page):
+    """
+    Extract the text of one PDF page.
+
+    Args:
+        page: pypdf page object
+
+    Returns:
+        str: Page text followed by a newline
+    """
+    return (page.extract_text() or "") + "\n"
+
+
+def count_pages(path):
+    """
+    Count the pages of a PDF file.
+
+    Args:
+        path: Path of the PDF file
+
+    Returns:
+        int: Number of pages
+    """
+    return len(pypdf.PdfReader(path).pages)
+
+
+def extract_pages(path, start, stop):
+    """
+    Extract the text of a page range of a PDF file.
+
+    Args:
+        path: Path of the PDF file
+        start: First page index
+        stop: Page index after the last page
+
+    Returns:
+        list: Text of each page, in order
+    """
+    reader = pypdf.PdfReader(path)
+    return [page_text(reader.pages[i]) for i in range(start, min(stop, len(reader.pages)))]
+
+
+def page_ranges(page_count, pages_per_task):
+    """
+    Split a document into page ranges extracted by separate tasks.
+
+    Args:
+        page_count: Number of pages
+        pages_per_task: Maximum pages per range
+
+    Returns:
+        list: (start, stop) tuples covering every page, in order
+    """
+    return [
+        (start, min(start + pages_per_task, page_count))
+        for start in range(0, page_count, pages_per_task)
+    ]
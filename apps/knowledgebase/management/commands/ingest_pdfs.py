@@ -1,12 +1,32 @@
 #!/usr/bin/env python
 """
 Django management command to ingest PDFs.
-Run with: python manage.py ingest_pdfs raw_data
+Run with: python manage.py ingest_pdfs raw_data [--workers 8]
+
+Files already ingested and unchanged since (per the ingestion manifest) are
+skipped; changed files are re-ingested into their existing Document. Progress is
+checkpointed per chunk window, so a file that failed halfway resumes on the next run.
 """
+import multiprocessing
+import time
+import traceback
+import uuid
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
 from pathlib import Path
 
 from django.core.management.base import BaseCommand
+from django.db import connection
 
+from apps.knowledgebase.extraction import count_pages, extract_pages, page_ranges
+from apps.knowledgebase.manifest import (
+    file_sha256,
+    file_signature,
+    is_unchanged,
+    load_manifest,
+    manifest_path,
+    record_ingestion,
+)
+from apps.knowledgebase.models import IngestionJob
 from apps.knowledgebase.services import DocumentService
 
 
@@ -20,6 +40,29 @@ class Command(BaseCommand):
             default="raw_data",
             help="Directory containing PDF files to ingest",
         )
+        parser.add_argument(
+            "--workers",
+            type=int,
+            default=1,
+            help="Processes extracting PDF text in parallel (1 = one file at a time)",
+        )
+        parser.add_argument(
+            "--pages-per-task",
+            type=int,
+            default=50,
+            help="Pages extracted per task; larger PDFs are split across workers",
+        )
+        parser.add_argument(
+            "--io-threads",
+            type=int,
+            default=None,
+            help="Files embedded and upserted concurrently (default: --workers)",
+        )
+        parser.add_argument(
+            "--force",
+            action="store_true",
+            help="Re-ingest every file, even unchanged ones (still in place, no duplicates)",
+        )
 
     def handle(self, *args, **options):
         directory_path = options["directory"]
@@ -41,54 +84,250 @@ class Command(BaseCommand):
         self.stdout.write(self.style.SUCCESS("🚀 PDF Ingestion"))
         self.stdout.write("=" * 60)
         self.stdout.write(f"📁 Directory: {directory_path}")
-        self.stdout.write(f"📚 Found {len(pdf_files)} PDF file(s) to ingest\n")
+        self.stdout.write(f"📚 Found {len(pdf_files)} PDF file(s)")
+
+        started = time.monotonic()
+        # Skip files whose size and mtime match the manifest, without opening them
+        manifest = load_manifest(pdf_files)
+        pending = []
+        for pdf_path in pdf_files:
+            signature = file_signature(pdf_path)
+            entry = manifest.get(manifest_path(pdf_path))
+            if options["force"] or not is_unchanged(entry, signature):
+                pending.append((pdf_path, entry, signature))
+        unchanged_count = len(pdf_files) - len(pending)
+        self.stdout.write(
+            f"🧾 {len(pending)} new or changed, {unchanged_count} unchanged (skipped)\n"
+        )
+
+        if options["workers"] > 1 and pending:
+            success_count, skipped_count, error_count = self._ingest_parallel(
+                doc_service, pending, directory_path, options
+            )
+        else:
+            success_count, skipped_count, error_count = self._ingest_sequential(
+                doc_service, pending, directory_path, options["force"]
+            )
+        unchanged_count += skipped_count
+        elapsed = time.monotonic() - started
+
+        self.stdout.write("=" * 60)
+        self.stdout.write(self.style.SUCCESS(f"✨ Ingestion complete!"))
+        self.stdout.write(f"✅ Successfully ingested: {success_count}")
+        self.stdout.write(f"⏭️  Unchanged: {unchanged_count}")
+        if error_count > 0:
+            self.stdout.write(self.style.WARNING(f"❌ Errors: {error_count}"))
+        self.stdout.write(
+            f"⏱️  {len(pdf_files)} file(s) in {elapsed:.1f}s "
+            f"({len(pdf_files) / elapsed if elapsed else 0:.2f} files/s)"
+        )
+
+        cache_stats = doc_service.embedding_service.cache_stats()
+        if cache_stats:
+            self.stdout.write(
+                f"🗃️  Embedding cache: {cache_stats['memory_hits'] + cache_stats['store_hits']} hits, "
+                f"{cache_stats['misses']} misses ({cache_stats['hit_rate']:.0%} hit rate)"
+            )
+
+        rate_limiter = doc_service.embedding_service.rate_limiter
+        if rate_limiter:
+            limiter_stats = rate_limiter.stats()
+            self.stdout.write(
+                f"🚦 Provider requests: {limiter_stats['requests']}, "
+                f"throttled: {limiter_stats['throttled']}, "
+                f"final concurrency: {limiter_stats['concurrency']}"
+            )
+
+        upsert_stats = doc_service.qdrant_service.upsert_stats()
+        if upsert_stats["points"]:
+            self.stdout.write(
+                f"📤 Upserted {upsert_stats['points']} point(s) in {upsert_stats['requests']} "
+                f"request(s): {upsert_stats['points_per_second']:.0f} points/s"
+            )
+        self._report_pipeline(doc_service.pipeline_stats.snapshot())
+        self.stdout.write("=" * 60)
+
+    def _report_pipeline(self, stats):
+        """Print per-stage throughput and queue depth; the busiest stage is the bottleneck."""
+        if not stats:
+            return
+        bottleneck = max(stats, key=lambda name: stats[name]["utilization"])
+        self.stdout.write("🧵 Pipeline stages (items/s with all workers busy, busy share, queue):")
+        for name, stage in stats.items():
+            marker = "  ⬅ bottleneck" if name == bottleneck else ""
+            self.stdout.write(
+                f"   {name:<8} {stage['items']:>7} item(s) {stage['items_per_second']:>9.1f}/s "
+                f"x{stage['workers']} {stage['utilization']:>5.0%} busy, "
+                f"queue max {stage['max_queue']} avg {stage['avg_queue']:.1f}{marker}"
+            )
+
+    @staticmethod
+    def _file_metadata(pdf_path, directory_path):
+        """Derive the title and metadata of a PDF from its filename."""
+        title = pdf_path.stem.replace("-", " ").replace("_", " ")
+        metadata = {
+            "source": directory_path,
+            "filename": pdf_path.name,
+            "category": "apple_business",
+            "type": "financial_filing" if "10-" in pdf_path.name else "document",
+        }
+        return title, metadata
+
+    @staticmethod
+    def _check_content(pdf_path, entry, signature, force):
+        """
+        Hash a file whose size or mtime changed.
+
+        Returns:
+            str: sha256 of the file to ingest, or None if its content matches the
+            manifest entry (which is refreshed with the new mtime)
+        """
+        sha256 = file_sha256(pdf_path)
+        if entry is not None and entry.sha256 == sha256 and not force:
+            record_ingestion(pdf_path, signature, sha256, entry.document)
+            return None
+        return sha256
+
+    @staticmethod
+    def _start_job(pdf_path, entry, sha256):
+        """Resume the unfinished ingestion job of this content, or start a new one."""
+        document_id = entry.document_id if entry else uuid.uuid4()
+        return IngestionJob.resume_or_create(manifest_path(pdf_path), sha256, document_id)
+
+    def _report_success(self, document, reingested=False):
+        action = "Re-ingested in place" if reingested else "Successfully ingested"
+        self.stdout.write(self.style.SUCCESS(f"   ✅ {action}: {document.title}"))
+        self.stdout.write(f"   📄 Document ID: {document.id}")
+        self.stdout.write(f"   📊 Content length: {len(document.content)} characters\n")
 
-        # Process each PDF
+    def _report_error(self, pdf_path, error):
+        self.stdout.write(self.style.ERROR(f"   ❌ Error processing {pdf_path.name}: {error}\n"))
+        traceback.print_exception(type(error), error, error.__traceback__)
+
+    def _ingest_sequential(self, doc_service, pending, directory_path, force):
+        """Process each new or changed PDF in turn in this process."""
         success_count = 0
+        skipped_count = 0
         error_count = 0
 
-        for i, pdf_path in enumerate(pdf_files, 1):
-            self.stdout.write(f"[{i}/{len(pdf_files)}] Processing: {pdf_path.name}")
+        for i, (pdf_path, entry, signature) in enumerate(pending, 1):
+            self.stdout.write(f"[{i}/{len(pending)}] Processing: {pdf_path.name}")
 
             try:
-                # Open PDF file
+                sha256 = self._check_content(pdf_path, entry, signature, force)
+                if sha256 is None:
+                    self.stdout.write("   ⏭️  Content unchanged\n")
+                    skipped_count += 1
+                    continue
                 with open(pdf_path, "rb") as pdf_file:
-                    # Extract metadata from filename
-                    title = pdf_path.stem.replace("-", " ").replace("_", " ")
-
-                    # Add metadata
-                    metadata = {
-                        "source": directory_path,
-                        "filename": pdf_path.name,
-                        "category": "apple_business",
-                        "type": "financial_filing" if "10-" in pdf_path.name else "document",
-                    }
-
-                    # Process PDF
+                    title, metadata = self._file_metadata(pdf_path, directory_path)
+                    job = self._start_job(pdf_path, entry, sha256)
+                    if job.chunks_done:
+                        self.stdout.write(f"   ⏯️  Resuming from chunk {job.chunks_done}")
                     document = doc_service.process_pdf(
-                        file_obj=pdf_file, title=title, metadata=metadata
+                        file_obj=pdf_file,
+                        title=title,
+                        metadata=metadata,
+                        document=entry.document if entry else None,
+                        job=job,
                     )
+                record_ingestion(pdf_path, signature, sha256, document)
+                self._report_success(document, reingested=entry is not None)
+                success_count += 1
+            except Exception as e:
+                self._report_error(pdf_path, e)
+                error_count += 1
 
-                    self.stdout.write(
-                        self.style.SUCCESS(f"   ✅ Successfully ingested: {document.title}")
-                    )
-                    self.stdout.write(f"   📄 Document ID: {document.id}")
-                    self.stdout.write(
-                        f"   📊 Content length: {len(document.content)} characters\n"
-                    )
+        return success_count, skipped_count, error_count
+
+    def _ingest_parallel(self, doc_service, pending, directory_path, options):
+        """
+        Extract text in a process pool and embed/upsert in I/O threads.
+
+        Each I/O thread handles one file: it fans the file's page ranges out to the
+        process pool and streams the extracted pages, in order, into
+        DocumentService.process_pages, so chunking and embedding start as soon as
+        the first range is extracted.
+        """
+        workers = options["workers"]
+        io_threads = options["io_threads"] or workers
+        self.stdout.write(f"⚙️  {workers} extraction process(es), {io_threads} I/O thread(s)\n")
+
+        success_count = 0
+        skipped_count = 0
+        error_count = 0
+        # Spawned workers do not inherit the parent's DB connections or client threads
+        context = multiprocessing.get_context("spawn")
+        with (
+            ProcessPoolExecutor(max_workers=workers, mp_context=context) as processes,
+            ThreadPoolExecutor(max_workers=io_threads) as threads,
+        ):
+            futures = {
+                threads.submit(
+                    self._ingest_file,
+                    doc_service,
+                    processes,
+                    pdf_path,
+                    entry,
+                    signature,
+                    directory_path,
+                    options,
+                ): (pdf_path, entry)
+                for pdf_path, entry, signature in pending
+            }
+            for i, future in enumerate(as_completed(futures), 1):
+                pdf_path, entry = futures[future]
+                self.stdout.write(f"[{i}/{len(pending)}] Processed: {pdf_path.name}")
+                try:
+                    document, page_count, resumed_from = future.result()
+                    if document is None:
+                        self.stdout.write("   ⏭️  Content unchanged\n")
+                        skipped_count += 1
+                        continue
+                    if resumed_from:
+                        self.stdout.write(f"   ⏯️  Resumed from chunk {resumed_from}")
+                    self.stdout.write(f"   📑 Pages: {page_count}")
+                    self._report_success(document, reingested=entry is not None)
                     success_count += 1
+                except Exception as e:
+                    self._report_error(pdf_path, e)
+                    error_count += 1
 
-            except Exception as e:
-                self.stdout.write(self.style.ERROR(f"   ❌ Error processing {pdf_path.name}: {e}\n"))
-                import traceback
+        return success_count, skipped_count, error_count
 
-                traceback.print_exc()
-                error_count += 1
-                continue
+    def _ingest_file(
+        self, doc_service, processes, pdf_path, entry, signature, directory_path, options
+    ):
+        """
+        Extract one PDF in the process pool and index it (runs in an I/O thread).
 
-        self.stdout.write("=" * 60)
-        self.stdout.write(self.style.SUCCESS(f"✨ Ingestion complete!"))
-        self.stdout.write(f"✅ Successfully ingested: {success_count}")
-        if error_count > 0:
-            self.stdout.write(self.style.WARNING(f"❌ Errors: {error_count}"))
-        self.stdout.write("=" * 60)
+        Returns:
+            tuple: (Document, page count, chunk resumed from), or (None, 0, 0) if
+            its content is unchanged
+        """
+        ranges = []
+        try:
+            sha256 = self._check_content(pdf_path, entry, signature, options["force"])
+            if sha256 is None:
+                return None, 0, 0
+            title, metadata = self._file_metadata(pdf_path, directory_path)
+            page_count = processes.submit(count_pages, str(pdf_path)).result()
+            ranges = [
+                processes.submit(extract_pages, str(pdf_path), start, stop)
+                for start, stop in page_ranges(page_count, options["pages_per_task"])
+            ]
+            pages = (text for future in ranges for text in future.result())
+            job = self._start_job(pdf_path, entry, sha256)
+            resumed_from = job.chunks_done
+            document = doc_service.process_pages(
+                pages, title, metadata, document=entry.document if entry else None, job=job
+            )
+            record_ingestion(pdf_path, signature, sha256, document)
+            return document, page_count, resumed_from
+        except Exception:
+            for future in ranges:
+                future.cancel()
+            raise
+        finally:
+            # Each I/O thread has its own database connection
+            connection.close()
@@ -0,0 +1,88 @@
+"""
+Django management command to export the knowledge base to a bundle.
+Run with: python manage.py kb_export kb.bundle
+"""
+
+import os
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from apps.knowledgebase.bundle import BundleWriter
+from apps.knowledgebase.models import Document
+from apps.vectorstore.services import get_qdrant_service
+
+DOCUMENT_FIELDS = ("id", "title", "content", "metadata", "created_at", "updated_at")
+
+
+class Command(BaseCommand):
+    help = (
+        "Export Documents, chunk payloads and raw vectors to a compressed bundle that "
+        "kb_import can restore without calling the embedding provider"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("output", type=str, help="Bundle file to write")
+        parser.add_argument(
+            "--page-size", type=int, default=1000, help="Rows and points read per page"
+        )
+        parser.add_argument(
+            "--compress-level", type=int, default=6, help="gzip level (1 fastest, 9 smallest)"
+        )
+
+    def handle(self, *args, **options):
+        store = get_qdrant_service()
+        page_size = options["page_size"]
+        header = {
+            "collection": store.collection_name,
+            # Provider, model and dimension of the stored vectors
+            **store.embedding,
+            "created_at": timezone.now().isoformat(),
+        }
+
+        self.stdout.write("=" * 60)
+        self.stdout.write(self.style.SUCCESS("📤 Knowledge-base export"))
+        self.stdout.write("=" * 60)
+        self.stdout.write(f"📦 Collection: {store.collection_name} ({store.dimension} dims)")
+        self.stdout.write(f"💾 Output: {options['output']}\n")
+
+        started = time.monotonic()
+        try:
+            with BundleWriter(
+                options["output"], header, compresslevel=options["compress_level"]
+            ) as writer:
+                # 1. Documents, streamed from the database
+                for row in (
+                    Document.objects.order_by("pk")
+                    .values(*DOCUMENT_FIELDS)
+                    .iterator(chunk_size=page_size)
+                ):
+                    writer.write_document(row)
+                self.stdout.write(f"📄 Exported {writer.documents} document(s)")
+
+                # 2. Points with their vectors, one scroll page at a time
+                offset = None
+                while True:
+                    points, offset = store.scroll_points(
+                        limit=page_size, offset=offset, with_vectors=True
+                    )
+                    for point in points:
+                        writer.write_point(point["id"], point["vector"], point["payload"])
+                    if points:
+                        self.stdout.write(f"   🧮 Exported {writer.points} point(s)")
+                    if not points or offset is None:
+                        break
+        except Exception as e:
+            raise CommandError(f"Export failed: {str(e)}") from e
+
+        elapsed = time.monotonic() - started
+        size_mb = os.path.getsize(options["output"]) / (1024 * 1024)
+        self.stdout.write("\n" + "=" * 60)
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"✅ Exported {writer.documents} document(s) and {writer.points} point(s) "
+                f"in {elapsed:.1f}s ({size_mb:.1f} MB)"
+            )
+        )
+        self.stdout.write("=" * 60)
@@ -0,0 +1,166 @@
+"""
+Django management command to restore the knowledge base from a bundle.
+Run with: python manage.py kb_import kb.bundle
+"""
+
+import itertools
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.utils.dateparse import parse_datetime
+
+from apps.knowledgebase.bundle import BundleReader
+from apps.knowledgebase.models import Document
+from apps.vectorstore.services import get_qdrant_service
+from apps.vectorstore.versioning import embedding_matches
+
+RESTORED_FIELDS = ["title", "content", "metadata"]
+TIMESTAMP_FIELDS = ["created_at", "updated_at"]
+
+
+class Command(BaseCommand):
+    help = (
+        "Restore Documents and vectors from a kb_export bundle with batched inserts and "
+        "parallel vector upserts (no embedding provider calls)"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("input", type=str, help="Bundle file to read")
+        parser.add_argument(
+            "--batch-size", type=int, default=500, help="Documents inserted per bulk_create"
+        )
+        parser.add_argument(
+            "--upsert-batch-size",
+            type=int,
+            default=None,
+            help="Points per upsert request (default: QDRANT_CONFIG UPSERT_BATCH_SIZE)",
+        )
+        parser.add_argument(
+            "--parallel",
+            type=int,
+            default=None,
+            help="Upsert requests in flight (default: QDRANT_CONFIG UPSERT_PARALLEL)",
+        )
+        parser.add_argument(
+            "--force",
+            action="store_true",
+            help="Import even if the bundle was built with another embedding provider or model",
+        )
+
+    def handle(self, *args, **options):
+        store = get_qdrant_service()
+
+        try:
+            reader = BundleReader(options["input"])
+        except (OSError, ValueError) as e:
+            raise CommandError(f"Cannot open bundle: {str(e)}") from e
+
+        with reader:
+            header = reader.header
+            if reader.dimension != store.dimension:
+                raise CommandError(
+                    f"Bundle vectors have {reader.dimension} dims but the collection "
+                    f"uses {store.dimension}"
+                )
+            if not embedding_matches(header, store.embedding) and not options["force"]:
+                raise CommandError(
+                    f"Bundle was embedded with {header.get('embedding_provider')}/"
+                    f"{header.get('embedding_model')} but the collection uses "
+                    f"{store.embedding['embedding_provider']}/"
+                    f"{store.embedding['embedding_model']} (use --force to import anyway)"
+                )
+
+            self.stdout.write("=" * 60)
+            self.stdout.write(self.style.SUCCESS("📥 Knowledge-base import"))
+            self.stdout.write("=" * 60)
+            self.stdout.write(
+                f"💾 Bundle: {options['input']} (exported {header.get('created_at')})"
+            )
+            self.stdout.write(f"📦 Collection: {store.collection_name} ({store.dimension} dims)\n")
+
+            started = time.monotonic()
+            try:
+                documents, points = self._restore(reader, store, options)
+            except Exception as e:
+                raise CommandError(f"Import failed: {str(e)}") from e
+
+        elapsed = time.monotonic() - started
+        stats = store.upsert_stats()
+        self.stdout.write("\n" + "=" * 60)
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"✅ Restored {documents} document(s) and {points} point(s) in {elapsed:.1f}s"
+            )
+        )
+        self.stdout.write(f"⚡ Upsert throughput: {stats['points_per_second']:.0f} points/s")
+        self.stdout.write("=" * 60)
+
+    def _restore(self, reader, store, options):
+        """Load documents in bulk, then stream points into the vector store."""
+        records = reader.records()
+        documents = 0
+        batch = []
+        first_point = None
+
+        # Documents come first in a bundle; the first point ends the document section
+        for kind, record in records:
+            if kind == "point":
+                first_point = record
+                break
+            batch.append(record)
+            if len(batch) >= options["batch_size"]:
+                documents += self._insert_documents(batch)
+                batch = []
+        if batch:
+            documents += self._insert_documents(batch)
+        self.stdout.write(f"📄 Restored {documents} document(s)")
+
+        if first_point is None:
+            # Exhaust the reader so the end record is still verified
+            for _ in records:
+                pass
+            return documents, 0
+
+        points = 0
+
+        def point_stream():
+            nonlocal points
+            for kind, record in itertools.chain([("point", first_point)], records):
+                if kind != "point":
+                    raise ValueError("Document record found after the point section")
+                points += 1
+                yield record
+
+        store.upsert_batch(
+            point_stream(),
+            batch_size=options["upsert_batch_size"],
+            parallel=options["parallel"],
+        )
+        return documents, points
+
+    @staticmethod
+    def _insert_documents(rows):
+        """Insert or overwrite one batch of documents, keeping their original timestamps."""
+        documents = [
+            Document(
+                id=row["id"],
+                title=row["title"],
+                content=row["content"],
+                metadata=row.get("metadata") or {},
+            )
+            for row in rows
+        ]
+        with transaction.atomic():
+            Document.objects.bulk_create(
+                documents,
+                update_conflicts=True,
+                unique_fields=["id"],
+                update_fields=RESTORED_FIELDS,
+            )
+            # bulk_create stamps the auto_now fields; bulk_update writes values as given
+            for doc, row in zip(documents, rows, strict=True):
+                doc.created_at = parse_datetime(row.get("created_at") or "") or doc.created_at
+                doc.updated_at = parse_datetime(row.get("updated_at") or "") or doc.updated_at
+            Document.objects.bulk_update(documents, TIMESTAMP_FIELDS)
+        return len(documents)
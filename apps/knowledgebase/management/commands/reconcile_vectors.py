@@ -0,0 +1,97 @@
+"""
+Django management command to reconcile Document rows with vector points.
+Run with: python manage.py reconcile_vectors [--dry-run]
+"""
+
+from django.core.management.base import BaseCommand
+
+from apps.knowledgebase.models import Document
+from apps.knowledgebase.services import DocumentService, find_orphan_points
+
+
+class Command(BaseCommand):
+    help = (
+        "Delete vector points whose Document no longer exists and re-embed Documents "
+        "that have no vectors"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--page-size", type=int, default=1000, help="Points scrolled per page")
+        parser.add_argument(
+            "--dry-run", action="store_true", help="Report inconsistencies without fixing them"
+        )
+        parser.add_argument("--no-reembed", action="store_true", help="Only delete orphaned points")
+
+    def handle(self, *args, **options):
+        doc_service = DocumentService()
+        store = doc_service.qdrant_service
+        dry_run = options["dry_run"]
+
+        self.stdout.write("=" * 60)
+        self.stdout.write(self.style.SUCCESS("🧹 Vector reconciliation"))
+        self.stdout.write("=" * 60)
+        self.stdout.write(f"📦 Collection: {store.collection_name}")
+        if dry_run:
+            self.stdout.write(self.style.WARNING("🔍 Dry run: nothing will be changed"))
+
+        # 1. Scroll points page by page; only document ids are kept between pages, so
+        # memory grows with the number of documents, not the number of points
+        indexed_documents = set()
+        scanned = 0
+        orphans = 0
+        offset = None
+
+        while True:
+            points, offset = store.scroll_points(
+                limit=options["page_size"], offset=offset, with_payload=["document_id"]
+            )
+            if not points:
+                break
+            scanned += len(points)
+
+            orphan_ids, existing = find_orphan_points(points)
+            indexed_documents.update(doc_id.bytes for doc_id in existing)
+
+            if orphan_ids:
+                orphans += len(orphan_ids)
+                if not dry_run:
+                    store.delete_vectors(orphan_ids)
+
+            self.stdout.write(f"   🔎 Scanned {scanned} point(s), {orphans} orphaned")
+            if offset is None:
+                break
+
+        verb = "Found" if dry_run else "Deleted"
+        self.stdout.write(f"\n🗑️  {verb} {orphans} orphaned point(s) out of {scanned}")
+
+        # 2. Find documents without any vector, streaming ids from the database
+        missing = []
+        for doc_id in Document.objects.values_list("id", flat=True).iterator(
+            chunk_size=options["page_size"]
+        ):
+            if doc_id.bytes not in indexed_documents:
+                missing.append(doc_id)
+        indexed_documents.clear()
+
+        self.stdout.write(f"📄 {len(missing)} document(s) without vectors")
+        if missing and not dry_run and not options["no_reembed"]:
+            reembedded = 0
+            failed = 0
+            for doc_id in missing:
+                try:
+                    document = Document.objects.get(id=doc_id)
+                    chunks = doc_service.index_document(document)
+                except Document.DoesNotExist:
+                    continue
+                except Exception as e:
+                    self.stdout.write(self.style.ERROR(f"   ❌ {doc_id}: {e}"))
+                    failed += 1
+                    continue
+                reembedded += 1
+                self.stdout.write(f"   ✅ Re-embedded {document.title} ({chunks} chunk(s))")
+
+            self.stdout.write(self.style.SUCCESS(f"🔁 Re-embedded {reembedded} document(s)"))
+            if failed:
+                self.stdout.write(self.style.WARNING(f"❌ Failed: {failed}"))
+
+        self.stdout.write("=" * 60)
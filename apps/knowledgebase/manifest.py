@@ -0,0 +1,112 @@
+"""
+Manifest of ingested source files, for incremental ingestion.
+
+A file whose size and mtime match its manifest entry is skipped without being
+opened. Otherwise its sha256 decides: the same content only refreshes the entry,
+new content is re-ingested into the file's existing Document.
+"""
+
+import hashlib
+import os
+from pathlib import Path
+
+from apps.knowledgebase.models import IngestedFile
+
+# Bytes read per hash update
+HASH_BLOCK_SIZE = 1024 * 1024
+
+
+def manifest_path(path):
+    """
+    Get the manifest key of a file.
+
+    Args:
+        path: File path
+
+    Returns:
+        str: Absolute, resolved path
+    """
+    return str(Path(path).resolve())
+
+
+def file_signature(path):
+    """
+    Get the cheap change signature of a file (a stat, no read).
+
+    Args:
+        path: File path
+
+    Returns:
+        tuple: (size in bytes, mtime in nanoseconds)
+    """
+    stat = os.stat(path)
+    return stat.st_size, stat.st_mtime_ns
+
+
+def file_sha256(path):
+    """
+    Hash a file's content.
+
+    Args:
+        path: File path
+
+    Returns:
+        str: Hex sha256 digest
+    """
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        while block := f.read(HASH_BLOCK_SIZE):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def load_manifest(paths):
+    """
+    Fetch the manifest entries of files in one query.
+
+    Args:
+        paths: File paths
+
+    Returns:
+        dict: Manifest key -> IngestedFile (with its document), for files in the manifest
+    """
+    keys = [manifest_path(path) for path in paths]
+    return {
+        entry.path: entry
+        for entry in IngestedFile.objects.filter(path__in=keys).select_related("document")
+    }
+
+
+def is_unchanged(entry, signature):
+    """
+    Check whether a file still matches its manifest entry, without reading it.
+
+    Args:
+        entry: IngestedFile, or None for a file not ingested yet
+        signature: (size, mtime_ns) from file_signature
+
+    Returns:
+        bool: True if the entry exists and has the same size and mtime
+    """
+    return entry is not None and (entry.size, entry.mtime_ns) == tuple(signature)
+
+
+def record_ingestion(path, signature, sha256, document):
+    """
+    Create or refresh the manifest entry of an ingested file.
+
+    Args:
+        path: File path
+        signature: (size, mtime_ns) taken before the file was read
+        sha256: Hex sha256 of the ingested content
+        document: Document the file was ingested into
+
+    Returns:
+        IngestedFile: Manifest entry
+    """
+    size, mtime_ns = signature
+    entry, _ = IngestedFile.objects.update_or_create(
+        path=manifest_path(path),
+        defaults={"size": size, "mtime_ns": mtime_ns, "sha256": sha256, "document": document},
+    )
+    return entry
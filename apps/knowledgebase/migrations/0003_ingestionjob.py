@@ -0,0 +1,58 @@
+# Generated by Django 5.2.18 on 2026-10-17 07:55
+
+import uuid
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("knowledgebase", "0002_ingestedfile"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="IngestionJob",
+            fields=[
+                (
+                    "id",
+                    models.UUIDField(
+                        default=uuid.uuid4, editable=False, primary_key=True, serialize=False
+                    ),
+                ),
+                ("source", models.CharField(max_length=1024)),
+                ("sha256", models.CharField(max_length=64)),
+                ("document_id", models.UUIDField()),
+                (
+                    "status",
+                    models.CharField(
+                        choices=[
+                            ("running", "Running"),
+                            ("failed", "Failed"),
+                            ("completed", "Completed"),
+                            ("abandoned", "Abandoned"),
+                        ],
+                        default="running",
+                        max_length=20,
+                    ),
+                ),
+                ("chunks_done", models.PositiveIntegerField(default=0)),
+                ("batches_done", models.PositiveIntegerField(default=0)),
+                ("attempts", models.PositiveIntegerField(default=1)),
+                ("error", models.TextField(blank=True)),
+                ("created_at", models.DateTimeField(auto_now_add=True)),
+                ("updated_at", models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                "db_table": "ingestion_jobs",
+                "ordering": ["-updated_at"],
+                "indexes": [
+                    models.Index(fields=["source", "sha256"], name="ingestion_j_source_a48ddd_idx"),
+                    models.Index(
+                        fields=["status", "updated_at"], name="ingestion_j_status_187c6b_idx"
+                    ),
+                ],
+            },
+        ),
+    ]
@@ -47,3 +47,118 @@ class Document(models.Model):
             .filter(similarity__gt=0.1)
             .order_by("-similarity")[:top_k]
         )
+
+
+class IngestedFile(models.Model):
+    """
+    Manifest entry of a source file ingested by ingest_pdfs.
+    Unchanged files (same size and mtime) are skipped on the next run; changed
+    files are re-ingested into the same Document.
+    """
+
+    path = models.CharField(max_length=1024, unique=True)
+    size = models.BigIntegerField()
+    mtime_ns = models.BigIntegerField()
+    sha256 = models.CharField(max_length=64)
+    document = models.ForeignKey(Document, on_delete=models.CASCADE, related_name="ingested_files")
+    ingested_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        db_table = "ingested_files"
+
+    def __str__(self):
+        return f"{self.path} - {self.sha256[:12]}"
+
+
+class IngestionJob(models.Model):
+    """
+    Durable progress of one ingestion of a source file.
+    Checkpointed after every stored chunk window, so a failed or interrupted
+    ingestion resumes from its last checkpoint instead of re-embedding everything.
+    """
+
+    class Status(models.TextChoices):
+        RUNNING = "running"
+        FAILED = "failed"
+        COMPLETED = "completed"
+        # Superseded by a job for newer content of the same file, or a failed
+        # ingestion that nothing will resume
+        ABANDONED = "abandoned"
+
+    # Jobs that may still be resumed; their chunks are kept by orphan pruning
+    UNFINISHED = [Status.RUNNING, Status.FAILED]
+
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    source = models.CharField(max_length=1024)
+    sha256 = models.CharField(max_length=64)
+    # Not a foreign key: a new document's row is only saved once it is fully ingested
+    document_id = models.UUIDField()
+    status = models.CharField(max_length=20, choices=Status.choices, default=Status.RUNNING)
+    chunks_done = models.PositiveIntegerField(default=0)
+    batches_done = models.PositiveIntegerField(default=0)
+    attempts = models.PositiveIntegerField(default=1)
+    error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        db_table = "ingestion_jobs"
+        ordering = ["-updated_at"]
+        indexes = [
+            models.Index(fields=["source", "sha256"]),
+            models.Index(fields=["status", "updated_at"]),
+        ]
+
+    def __str__(self):
+        return f"{self.source} - {self.status} ({self.chunks_done} chunks)"
+
+    @classmethod
+    def resume_or_create(cls, source, sha256, document_id):
+        """
+        Get the job ingesting a file's content, resuming an unfinished one.
+
+        Unfinished jobs for other content of the same file are abandoned.
+
+        Args:
+            source: Manifest path of the file
+            sha256: Hex sha256 of the file content
+            document_id: Document id used if a new job is created
+
+        Returns:
+            IngestionJob: Running job; chunks_done is the chunk to resume from
+        """
+        unfinished = cls.objects.filter(source=source, status__in=cls.UNFINISHED)
+        unfinished.exclude(sha256=sha256).update(status=cls.Status.ABANDONED)
+
+        job = unfinished.filter(sha256=sha256).first()
+        if job is None:
+            return cls.objects.create(source=source, sha256=sha256, document_id=document_id)
+        job.status = cls.Status.RUNNING
+        job.attempts += 1
+        job.error = ""
+        job.save(update_fields=["status", "attempts", "error", "updated_at"])
+        return job
+
+    def checkpoint(self, chunks_done, batches_done):
+        """
+        Record that the first chunks_done chunks are stored.
+
+        Args:
+            chunks_done: Chunks stored, counted from the start of the document
+            batches_done: Chunk windows stored by this attempt
+        """
+        self.chunks_done = chunks_done
+        self.batches_done = batches_done
+        self.save(update_fields=["chunks_done", "batches_done", "updated_at"])
+
+    def finish(self, status=Status.COMPLETED, error=""):
+        """
+        Record the outcome of the job.
+
+        Args:
+            status: COMPLETED, FAILED or ABANDONED
+            error: Error message of a failed job
+        """
+        self.status = status
+        self.error = error
+        self.save(update_fields=["status", "error", "updated_at"])
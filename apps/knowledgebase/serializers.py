@@ -4,7 +4,7 @@ Document serializer for RAG.
 
 from rest_framework import serializers
 
-from .models import Document
+from .models import Document, IngestionJob
 
 
 class DocumentSerializer(serializers.ModelSerializer):
@@ -30,3 +30,27 @@ class DocumentUploadSerializer(serializers.Serializer):
         required=False
     )  # Optional if file is provided, but here we use it for direct text or file handling logic in view
     metadata = serializers.JSONField(required=False, default=dict)
+
+
+class IngestionJobSerializer(serializers.ModelSerializer):
+    """
+    Serializer for IngestionJob model.
+    Exposes the checkpointed progress of an ingestion.
+    """
+
+    class Meta:
+        model = IngestionJob
+        fields = [
+            "id",
+            "source",
+            "sha256",
+            "document_id",
+            "status",
+            "chunks_done",
+            "batches_done",
+            "attempts",
+            "error",
+            "created_at",
+            "updated_at",
+        ]
+        read_only_fields = fields
@@ -2,13 +2,208 @@
 Document Service for managing document operations.
 """
 
+import logging
 import uuid
 
 import pypdf
+from django.conf import settings
+from django.db import connections
 
-from apps.core.services import EmbeddingService
-from apps.knowledgebase.models import Document
-from apps.vectorstore.services import QdrantService
+from apps.core.pipeline import Pipeline, PipelineStats, Stage
+from apps.core.services import get_embedding_service
+from apps.knowledgebase.extraction import page_text
+from apps.knowledgebase.models import Document, IngestionJob
+from apps.vectorstore.services import get_qdrant_service
+
+logger = logging.getLogger(__name__)
+
+# Namespace of chunk point ids, so a chunk keeps its id across re-ingests
+CHUNK_ID_NAMESPACE = uuid.uuid5(uuid.NAMESPACE_URL, "agentic-rag:document-chunk")
+
+
+def chunk_point_id(document_id, chunk_index):
+    """
+    Get the deterministic vector point id of a document chunk.
+
+    Args:
+        document_id: UUID of the parent document
+        chunk_index: Position of the chunk within the document
+
+    Returns:
+        uuid.UUID: uuid5 of (document_id, chunk_index)
+    """
+    return uuid.uuid5(CHUNK_ID_NAMESPACE, f"{document_id}:{chunk_index}")
+
+
+def chunk_text(text, chunk_size=1000, overlap=200):
+    """
+    Split text into overlapping character chunks.
+    In a real app, use a proper tokenizer or recursive splitter.
+
+    Args:
+        text: Text to split
+        chunk_size: Characters per chunk
+        overlap: Characters shared by consecutive chunks
+
+    Returns:
+        list: Chunks (very small trailing chunks are skipped)
+    """
+    return list(iter_chunks([text], chunk_size, overlap))
+
+
+def iter_chunks(pieces, chunk_size=1000, overlap=200):
+    """
+    Chunk a stream of text pieces (e.g. PDF pages) as if they were one text.
+
+    Yields exactly the chunks chunk_text would produce for the concatenated
+    pieces, including chunks spanning piece boundaries, while holding at most
+    one chunk plus the current piece in memory.
+
+    Args:
+        pieces: Iterable of text pieces, in order
+        chunk_size: Characters per chunk
+        overlap: Characters shared by consecutive chunks
+
+    Yields:
+        str: Chunks (very small trailing chunks are skipped)
+    """
+    chunker = Chunker(chunk_size, overlap)
+    for piece in pieces:
+        yield from chunker.feed(piece)
+    yield from chunker.finish()
+
+
+class Chunker:
+    """
+    Incremental chunker: text is fed piece by piece and complete chunks are
+    returned as soon as they are available (see iter_chunks).
+    """
+
+    def __init__(self, chunk_size=1000, overlap=200):
+        """
+        Initialize the chunker.
+
+        Args:
+            chunk_size: Characters per chunk
+            overlap: Characters shared by consecutive chunks
+        """
+        self.chunk_size = chunk_size
+        self.step = chunk_size - overlap
+        self._buffer = ""
+
+    def feed(self, piece):
+        """
+        Add the next piece of text.
+
+        Args:
+            piece: Text continuing the previous pieces
+
+        Returns:
+            list: Chunks completed by this piece
+        """
+        buffer = self._buffer + piece
+        chunks = []
+        start = 0
+        while len(buffer) - start >= self.chunk_size:
+            chunks.append(buffer[start : start + self.chunk_size])
+            start += self.step
+        self._buffer = buffer[start:]
+        return chunks
+
+    def finish(self):
+        """
+        End the text.
+
+        Returns:
+            list: The remaining chunks, each shorter than chunk_size
+        """
+        buffer, self._buffer = self._buffer, ""
+        # Every remaining chunk start, each chunk shorter than chunk_size
+        chunks = (
+            buffer[start : start + self.chunk_size] for start in range(0, len(buffer), self.step)
+        )
+        return [chunk for chunk in chunks if len(chunk) >= 5]  # Skip very small chunks
+
+
+def iter_pdf_pages(file_obj):
+    """
+    Extract the text of a PDF one page at a time.
+
+    Args:
+        file_obj: File-like object containing PDF data
+
+    Yields:
+        str: Text of each page, followed by a newline
+    """
+    for page in pypdf.PdfReader(file_obj).pages:
+        yield page_text(page)
+
+
+def chunk_points(document, chunks, embeddings, start=0):
+    """
+    Build the vector points of a document's chunks.
+
+    Args:
+        document: Document instance
+        chunks: Chunk texts, in order
+        embeddings: One embedding per chunk
+        start: Chunk index of the first chunk (for windows of a longer document)
+
+    Returns:
+        list: Point dicts with deterministic ids and the chunk payload
+    """
+    return [
+        {
+            "id": chunk_point_id(document.id, i),
+            "vector": embedding,
+            "payload": {
+                "document_id": str(document.id),
+                "chunk_index": i,
+                "content": chunk,
+                "title": document.title,
+                **(document.metadata or {}),
+            },
+        }
+        for i, (chunk, embedding) in enumerate(zip(chunks, embeddings, strict=True), start)
+    ]
+
+
+def find_orphan_points(points):
+    """
+    Find the points of a page whose document no longer exists.
+    Chunk points name their document in the payload; document points are keyed by it.
+    Points of documents still being ingested (unfinished IngestionJobs) are kept.
+
+    Args:
+        points: Point dicts with 'id' and 'payload'
+
+    Returns:
+        tuple: (ids of orphaned points, set of existing document UUIDs referenced)
+    """
+    point_documents = {
+        p["id"]: _as_uuid(p["payload"].get("document_id") or p["id"]) for p in points
+    }
+    document_ids = {doc_id for doc_id in point_documents.values() if doc_id}
+    existing = set(Document.objects.filter(id__in=document_ids).values_list("id", flat=True))
+    ingesting = set(
+        IngestionJob.objects.filter(
+            document_id__in=document_ids - existing, status__in=IngestionJob.UNFINISHED
+        ).values_list("document_id", flat=True)
+    )
+    orphans = [
+        point_id
+        for point_id, doc_id in point_documents.items()
+        if doc_id not in existing and doc_id not in ingesting
+    ]
+    return orphans, existing
+
+
+def _as_uuid(value):
+    """Parse a document id, returning None for values that are not UUIDs."""
+    try:
+        return uuid.UUID(str(value))
+    except ValueError:
+        return None
 
 
 class DocumentService:
@@ -17,72 +212,330 @@ class DocumentService:
     """
 
     def __init__(self):
-        """Initialize the document service."""
-        self.embedding_service = EmbeddingService()
-        self.qdrant_service = QdrantService()
+        """Initialize the document service with the shared provider clients."""
+        self.embedding_service = get_embedding_service()
+        self.qdrant_service = get_qdrant_service()
+        # Ingestion pipeline stats accumulated over every indexed document
+        self.pipeline_stats = PipelineStats()
 
-    def process_pdf(self, file_obj, title, metadata=None):
+    def process_pdf(self, file_obj, title, metadata=None, document=None, job=None):
         """
         Process a PDF file: extract text, chunk, embed, and store.
 
+        Pages are extracted one at a time and flow through the ingestion pipeline
+        (see index_pages), so memory beyond the document text itself does not
+        grow with the page count.
+
+        Chunk point ids are derived from (document id, chunk index), so processing
+        the same document again overwrites its chunks instead of duplicating them.
+
         Args:
             file_obj: File-like object containing PDF data
             title: Document title
             metadata: Optional metadata dict
+            document: Optional existing Document to re-ingest in place; chunks
+                beyond the new chunk count are pruned
+            job: Optional IngestionJob checkpointing the progress (see process_pages)
 
         Returns:
-            Document: Created document instance
+            Document: Created (or re-ingested) document instance
         """
-        # 1. Extract text from PDF
-        pdf_reader = pypdf.PdfReader(file_obj)
-        text_content = ""
-        for page in pdf_reader.pages:
-            text_content += page.extract_text() + "\n"
+        return self.process_pages(iter_pdf_pages(file_obj), title, metadata, document, job)
 
-        # 2. Create Document record
-        document = Document.objects.create(
-            title=title, content=text_content, metadata=metadata or {}
-        )
+    def process_pages(self, pages, title, metadata=None, document=None, job=None):
+        """
+        Chunk, embed and store a document from a stream of page texts.
 
-        # 3. Chunk text (simple chunking by characters for now)
-        # In a real app, use a proper tokenizer or recursive splitter
-        chunk_size = 1000
-        overlap = 200
-        chunks = []
+        With a job, every stored chunk window is checkpointed: chunks before
+        job.chunks_done are skipped without being embedded, and on failure the
+        stored chunks are kept and the job is marked failed, so the next attempt
+        resumes where this one stopped. A new document ingested without a job gets
+        a job of its own, so orphan pruning keeps its chunks until its row is saved;
+        if that ingestion fails, the job is abandoned and the chunks are discarded.
 
-        for i in range(0, len(text_content), chunk_size - overlap):
-            chunk = text_content[i : i + chunk_size]
-            if len(chunk) < 5:  # Skip very small chunks
-                continue
-            chunks.append(chunk)
-
-        # 4. Generate embeddings for chunks
-        embeddings = self.embedding_service.embed_batch(chunks)
-
-        # 5. Prepare batch for Qdrant
-        points = []
-        for i, (chunk, embedding) in enumerate(zip(chunks, embeddings, strict=True)):
-            chunk_id = uuid.uuid4()
-            points.append(
-                {
-                    "id": chunk_id,
-                    "vector": embedding,
-                    "payload": {
-                        "document_id": str(document.id),
-                        "chunk_index": i,
-                        "content": chunk,
-                        "title": title,
-                        **(metadata or {}),
-                    },
-                }
-            )
+        Args:
+            pages: Iterable of page texts, in order (e.g. extracted by worker processes)
+            title: Document title
+            metadata: Optional metadata dict
+            document: Optional existing Document to re-ingest in place; chunks
+                beyond the new chunk count are pruned
+            job: Optional running IngestionJob (see IngestionJob.resume_or_create)
 
-        # 6. Store in Qdrant
-        if points:
-            self.qdrant_service.upsert_batch(points)
+        Returns:
+            Document: Created (or re-ingested) document instance
+        """
+        reingest = document is not None
+        own_job = not reingest and job is None
+        if not reingest:
+            # The id is assigned now, so chunks can be stored before the row is saved
+            document = Document(title=title, content="", metadata=metadata or {})
+            if own_job:
+                job = IngestionJob.objects.create(source=title, sha256="", document_id=document.id)
+            else:
+                document.id = job.document_id
+        else:
+            document.title = title
+            document.metadata = metadata or {}
+
+        # 1. Consume the text page by page; the pages are kept only for Document.content
+        texts = []
+
+        def page_texts():
+            for text in pages:
+                texts.append(text)
+                yield text
+
+        # 2-5. Chunk across page boundaries, embed and store through the pipeline
+        # (pruning stale chunks when re-ingesting)
+        try:
+            self.index_pages(document, page_texts(), prune=reingest, job=job)
+        except Exception as e:
+            if own_job:
+                # Nothing resumes this job; abandoning it lets orphan pruning reclaim
+                # whatever _discard_vectors leaves behind
+                job.finish(IngestionJob.Status.ABANDONED, error=str(e))
+                self._discard_vectors(document.id)
+            elif job is not None:
+                job.finish(IngestionJob.Status.FAILED, error=str(e))
+            raise
+
+        # 6. Save the Document record once its chunks are searchable
+        document.content = "".join(texts)
+        document.save()
+        if job is not None:
+            job.finish()
 
         return document
 
+    def index_document(self, document, prune=False):
+        """
+        Chunk a document's content, embed the chunks and store them as vectors.
+
+        Args:
+            document: Document instance
+            prune: Delete chunks beyond the new chunk count (for re-indexing)
+
+        Returns:
+            int: Number of chunks stored
+        """
+        return self.index_pages(document, [document.content], prune=prune)
+
+    def index_pages(self, document, pages, prune=False, window=None, job=None):
+        """
+        Chunk a stream of page texts, embed the chunks and store them as vectors.
+
+        Runs the extract -> chunk -> embed -> upsert -> commit pipeline described
+        in _run_pipeline.
+
+        Args:
+            document: Document instance (its id may not be saved yet)
+            pages: Iterable of page texts, in order
+            prune: Delete chunks beyond the new chunk count (for re-indexing)
+            window: Chunks embedded and upserted together. If None, uses
+                INGESTION_CONFIG WINDOW_SIZE
+            job: Optional IngestionJob to resume from and checkpoint
+
+        Returns:
+            int: Number of chunks stored
+        """
+        chunker = Chunker()
+        return self._run_pipeline(document, pages, chunker.feed, chunker.finish, prune, window, job)
+
+    def index_chunks(self, document, chunks, prune=False, window=None):
+        """
+        Embed a stream of already chunked text and store it as vectors.
+
+        Args:
+            document: Document instance (its id may not be saved yet)
+            chunks: Iterable of chunk texts, in order
+            prune: Delete chunks beyond the new chunk count (for re-indexing)
+            window: Chunks embedded and upserted together. If None, uses
+                INGESTION_CONFIG WINDOW_SIZE
+
+        Returns:
+            int: Number of chunks stored
+        """
+        return self._run_pipeline(document, chunks, lambda chunk: [chunk], list, prune, window)
+
+    def _run_pipeline(self, document, pieces, split, finish, prune, window, job=None):
+        """
+        Index a document through pipelined ingestion stages.
+
+        Each stage runs on its own threads and hands windows of chunks to the next
+        through a bounded queue of INGESTION_CONFIG QUEUE_SIZE windows, so
+        extraction, embedding calls and upserts overlap, and a slow stage blocks
+        the ones before it instead of letting windows pile up in memory:
+
+        - extract: iterates pieces (e.g. pages extracted from a PDF)
+        - chunk: splits pieces into chunks and groups them into windows
+        - embed: embeds each window (EMBED_WORKERS concurrent embed_batch calls)
+        - upsert: stores each window's points (UPSERT_WORKERS concurrent writers)
+        - commit: counts stored chunks (checkpointing the job), then prunes stale
+          ones once all are stored
+
+        Per-stage stats are accumulated in self.pipeline_stats.
+
+        Windows may be stored out of order by concurrent writers, so a job's
+        checkpoint is the end of the contiguous run of stored windows from the
+        start of the document.
+
+        Args:
+            document: Document instance (its id may not be saved yet)
+            pieces: Iterable of text pieces, in order
+            split: Callable returning the chunks completed by a piece
+            finish: Callable returning the remaining chunks after the last piece
+            prune: Delete chunks beyond the new chunk count (for re-indexing)
+            window: Chunks per window. If None, uses INGESTION_CONFIG WINDOW_SIZE
+            job: Optional IngestionJob; chunks before job.chunks_done are skipped
+
+        Returns:
+            int: Number of chunks stored
+        """
+        ingestion = settings.INGESTION_CONFIG
+        window = window or ingestion.get("WINDOW_SIZE", 256)
+        queue_size = ingestion.get("QUEUE_SIZE", 4)
+        pending = []
+        position = 0
+        # Chunks already stored by a previous attempt are dropped before embedding
+        skip = job.chunks_done if job is not None else 0
+        stored = skip
+        completed = {}
+        batches = 0
+
+        def windows(complete):
+            # Cut pending chunks into (chunk index of the first chunk, chunks) windows
+            nonlocal position
+            batches = []
+            while len(pending) >= window or (complete and pending):
+                batch = pending[:window]
+                del pending[:window]
+                batches.append((position, batch))
+                position += len(batch)
+            return batches
+
+        def add(chunks):
+            nonlocal position, skip
+            dropped = min(skip, len(chunks))
+            skip -= dropped
+            position += dropped
+            pending.extend(chunks[dropped:])
+
+        def chunk(piece):
+            add(split(piece))
+            return windows(complete=False)
+
+        def flush_chunks():
+            add(finish())
+            return windows(complete=True)
+
+        def embed(item):
+            start, batch = item
+            return [(start, batch, self.embedding_service.embed_batch(batch))]
+
+        def upsert(item):
+            start, batch, embeddings = item
+
+            def write(store, embedder):
+                vectors = embeddings if embedder is None else embedder.embed_batch(batch)
+                store.upsert_batch(chunk_points(document, batch, vectors, start))
+
+            self._write_vectors(write)
+            return [(start, len(batch))]
+
+        def commit(item):
+            nonlocal stored, batches
+            start, size = item
+            completed[start] = size
+            batches += 1
+            advanced = stored
+            while advanced in completed:
+                advanced += completed.pop(advanced)
+            if advanced != stored:
+                stored = advanced
+                if job is not None:
+                    job.checkpoint(stored, batches)
+
+        def flush_commit():
+            # Prune chunks left over from a longer previous version of the document
+            if prune:
+                self._write_vectors(
+                    lambda store, embedder: store.delete_by_filter(
+                        {"document_id": str(document.id), "chunk_index": {"gte": stored}}
+                    )
+                )
+
+        pipeline = Pipeline(
+            pieces,
+            [
+                Stage("chunk", chunk, queue_size=queue_size, flush=flush_chunks),
+                Stage(
+                    "embed",
+                    embed,
+                    ingestion.get("EMBED_WORKERS", 2),
+                    queue_size,
+                    # The embedding cache opens a database connection on each embed thread
+                    on_exit=connections.close_all,
+                ),
+                Stage("upsert", upsert, ingestion.get("UPSERT_WORKERS", 2), queue_size),
+                Stage(
+                    "commit",
+                    commit,
+                    queue_size=queue_size,
+                    flush=flush_commit,
+                    # Checkpoints open a database connection on the commit thread
+                    on_exit=connections.close_all if job is not None else None,
+                ),
+            ],
+            source_name="extract",
+        )
+        stats = pipeline.run()
+        self.pipeline_stats.add(stats)
+        return stored
+
+    def _discard_vectors(self, document_id):
+        """Best-effort removal of the chunks of a document whose ingestion failed."""
+        try:
+            self._write_vectors(
+                lambda store, embedder: store.delete_by_filter({"document_id": str(document_id)})
+            )
+        except Exception:
+            logger.warning("Failed to discard vectors of %s", document_id, exc_info=True)
+
+    def _write_vectors(self, write):
+        """
+        Apply a vector write to the live collection and, while reindex_collection
+        builds its replacement, to the collection being built.
+
+        A failed write to the collection being built is logged, not raised: the
+        live write already succeeded and the re-index catch-up pass re-indexes
+        documents changed during the build.
+
+        Args:
+            write: Callable taking (vector store, embedder). embedder is None when
+                the vectors embedded with self.embedding_service can be reused, else
+                the EmbeddingService matching the target collection
+        """
+        write(self.qdrant_service, None)
+
+        target = self.qdrant_service.build_target()
+        if target is None:
+            return
+        embedding = target.embedding
+        embedder = None
+        if (embedding["embedding_model"], embedding["dimension"]) != (
+            self.embedding_service.model,
+            self.embedding_service.dimension,
+        ):
+            embedder = get_embedding_service(
+                provider=embedding["embedding_provider"],
+                model=embedding["embedding_model"],
+                dimension=embedding["dimension"],
+            )
+        try:
+            write(target, embedder)
+        except Exception:
+            logger.warning("Dual-write to '%s' failed", target.collection_name, exc_info=True)
+
     def create_document(self, title, content, metadata=None):
         """
         Create a new document with embedding.
@@ -102,10 +555,13 @@ class DocumentService:
         document = Document.objects.create(title=title, content=content, metadata=metadata or {})
 
         # Store embedding in Qdrant
-        self.qdrant_service.upsert_vector(
-            document_id=document.id,
-            embedding=embedding,
-            metadata={"title": title, **(metadata or {})},
+        payload = {"title": title, **(metadata or {}), "document_id": str(document.id)}
+        self._write_vectors(
+            lambda store, embedder: store.upsert_vector(
+                document_id=document.id,
+                embedding=embedding if embedder is None else embedder.embed(content),
+                metadata=payload,
+            )
         )
 
         return document
@@ -131,10 +587,17 @@ class DocumentService:
             document.content = content
             # Regenerate embedding if content changed
             embedding = self.embedding_service.embed(content)
-            self.qdrant_service.upsert_vector(
-                document_id=document.id,
-                embedding=embedding,
-                metadata={"title": document.title, **(metadata or document.metadata)},
+            payload = {
+                "title": document.title,
+                **(metadata or document.metadata),
+                "document_id": str(document.id),
+            }
+            self._write_vectors(
+                lambda store, embedder: store.upsert_vector(
+                    document_id=document.id,
+                    embedding=embedding if embedder is None else embedder.embed(content),
+                    metadata=payload,
+                )
             )
         if metadata is not None:
             document.metadata = metadata
@@ -149,8 +612,13 @@ class DocumentService:
         Args:
             document_id: Document ID to delete
         """
-        # Delete from Qdrant
-        self.qdrant_service.delete_vector(document_id)
+
+        # Delete from Qdrant: the document's own point and every chunk point
+        def write(store, embedder):
+            store.delete_vector(document_id)
+            store.delete_by_filter({"document_id": str(document_id)})
+
+        self._write_vectors(write)
 
         # Delete from database
         Document.objects.filter(id=document_id).delete()
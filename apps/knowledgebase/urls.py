@@ -5,10 +5,11 @@ URL configuration for Knowledge Base app.
 from django.urls import include, path
 from rest_framework.routers import DefaultRouter
 
-from apps.knowledgebase.views import DocumentViewSet
+from apps.knowledgebase.views import DocumentViewSet, IngestionJobViewSet
 
 router = DefaultRouter()
 router.register(r"documents", DocumentViewSet, basename="document")
+router.register(r"ingestion-jobs", IngestionJobViewSet, basename="ingestion-job")
 
 urlpatterns = [
     path("", include(router.urls)),
@@ -2,14 +2,23 @@
 Views for Knowledge Base.
 """
 
-from drf_spectacular.utils import extend_schema
+from datetime import timedelta
+
+from django.conf import settings
+from django.db.models import Q
+from django.utils import timezone
+from drf_spectacular.utils import OpenApiParameter, extend_schema
 from rest_framework import status, viewsets
 from rest_framework.decorators import action
 from rest_framework.parsers import FormParser, MultiPartParser
 from rest_framework.response import Response
 
-from apps.knowledgebase.models import Document
-from apps.knowledgebase.serializers import DocumentSerializer, DocumentUploadSerializer
+from apps.knowledgebase.models import Document, IngestionJob
+from apps.knowledgebase.serializers import (
+    DocumentSerializer,
+    DocumentUploadSerializer,
+    IngestionJobSerializer,
+)
 from apps.knowledgebase.services import DocumentService
 
 
@@ -58,3 +67,53 @@ class DocumentViewSet(viewsets.ModelViewSet):
             return Response(serializer.data, status=status.HTTP_201_CREATED)
         except Exception as e:
             return Response({"error": str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+
+class IngestionJobViewSet(viewsets.ReadOnlyModelViewSet):
+    """
+    ViewSet for inspecting ingestion jobs and their checkpoints.
+    """
+
+    queryset = IngestionJob.objects.all()
+    serializer_class = IngestionJobSerializer
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        status_filter = self.request.query_params.get("status")
+        if status_filter:
+            queryset = queryset.filter(status=status_filter)
+        return queryset
+
+    @extend_schema(
+        parameters=[
+            OpenApiParameter(
+                "stale_minutes",
+                int,
+                description="Minutes without a checkpoint after which a running job is stuck",
+            )
+        ],
+        responses={200: IngestionJobSerializer(many=True)},
+    )
+    @action(detail=False, methods=["get"])
+    def stuck(self, request):
+        """
+        List jobs left in a partial state: failed jobs, and running jobs without a
+        recent checkpoint (their process likely died). Rerunning ingest_pdfs resumes them.
+        """
+        try:
+            stale_minutes = int(
+                request.query_params.get(
+                    "stale_minutes", settings.INGESTION_CONFIG.get("STALE_JOB_MINUTES", 15)
+                )
+            )
+        except ValueError:
+            return Response(
+                {"error": "stale_minutes must be an integer"}, status=status.HTTP_400_BAD_REQUEST
+            )
+
+        stale_before = timezone.now() - timedelta(minutes=stale_minutes)
+        jobs = IngestionJob.objects.filter(
+            Q(status=IngestionJob.Status.FAILED)
+            | Q(status=IngestionJob.Status.RUNNING, updated_at__lt=stale_before)
+        )
+        return Response(IngestionJobSerializer(jobs, many=True).data)
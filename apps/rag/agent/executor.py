@@ -4,7 +4,7 @@ Agent Executor implementing ReAct-style reasoning loop.
 
 from django.conf import settings
 
-from apps.rag.agent.llm_client import LLMClient
+from apps.rag.agent.llm_client import get_llm_client
 from apps.rag.agent.prompts import get_system_prompt
 from apps.rag.models import ToolLog
 from apps.rag.tools.registry import ToolRegistry
@@ -17,7 +17,7 @@ class AgentExecutor:
 
     def __init__(self):
         """Initialize the agent executor."""
-        self.llm_client = LLMClient()
+        self.llm_client = get_llm_client()
         self.tool_registry = ToolRegistry()
         self.max_steps = settings.AGENT_CONFIG["MAX_STEPS"]
 
@@ -8,6 +8,9 @@ from django.conf import settings
 from groq import Groq
 from openai import OpenAI
 
+from apps.core.quota import INTERACTIVE, estimate_chat_tokens, provider_slot
+from apps.core.registry import services
+
 
 class LLMClient:
     """
@@ -56,19 +59,20 @@ class LLMClient:
             chat_messages.extend(messages)
 
             # Call LLM
-            if self.provider == "openai":
-                response = self.client.chat.completions.create(
-                    model=self.model,
-                    messages=chat_messages,
-                    temperature=0.7,
-                    response_format={"type": "json_object"},
-                )
-                content = response.choices[0].message.content
-            elif self.provider == "groq":
-                response = self.client.chat.completions.create(
-                    model=self.model, messages=chat_messages, temperature=0.7
-                )
-                content = response.choices[0].message.content
+            with provider_slot(self.provider, estimate_chat_tokens(chat_messages), INTERACTIVE):
+                if self.provider == "openai":
+                    response = self.client.chat.completions.create(
+                        model=self.model,
+                        messages=chat_messages,
+                        temperature=0.7,
+                        response_format={"type": "json_object"},
+                    )
+                    content = response.choices[0].message.content
+                elif self.provider == "groq":
+                    response = self.client.chat.completions.create(
+                        model=self.model, messages=chat_messages, temperature=0.7
+                    )
+                    content = response.choices[0].message.content
 
             # Parse JSON response
             parsed = self._parse_response(content)
@@ -121,3 +125,13 @@ class LLMClient:
                 "tool_input": None,
                 "final_answer": f"Error: Could not parse LLM response: {content}",
             }
+
+
+def get_llm_client():
+    """
+    Get the process-wide agent LLMClient for the default provider.
+
+    Returns:
+        LLMClient: Shared LLM client
+    """
+    return services.get("rag.llm_client", LLMClient)
@@ -2,9 +2,21 @@
 Vector Search Service using Qdrant for similarity search.
 """
 
+from apps.core.quota import INTERACTIVE
 from apps.knowledgebase.models import Document
-from apps.rag.services.embedding_service import EmbeddingService
-from apps.rag.services.qdrant_service import QdrantService
+from apps.rag.services.embedding_service import get_embedding_service
+from apps.rag.services.qdrant_service import get_qdrant_service
+
+# Payload fields read when building results; the rest of the payload is not fetched
+RESULT_PAYLOAD_FIELDS = [
+    "document_id",
+    "content",
+    "title",
+    "source",
+    "filename",
+    "category",
+    "type",
+]
 
 
 class VectorSearchService:
@@ -13,9 +25,9 @@ class VectorSearchService:
     """
 
     def __init__(self):
-        """Initialize the vector search service."""
-        self.embedding_service = EmbeddingService()
-        self.qdrant_service = QdrantService()
+        """Initialize the vector search service with the shared provider clients."""
+        self.embedding_service = get_embedding_service()
+        self.qdrant_service = get_qdrant_service()
 
     def search(self, query, top_k=5, filters=None):
         """
@@ -24,7 +36,7 @@ class VectorSearchService:
         Args:
             query: Search query text
             top_k: Number of results to return
-            filters: Optional metadata filters
+            filters: Optional metadata filter dict (eq/in/range on indexed payload fields)
 
         Returns:
             list: List of documents with similarity scores
@@ -34,9 +46,49 @@ class VectorSearchService:
 
         # Perform vector search in Qdrant
         qdrant_results = self.qdrant_service.search_vectors(
-            query_embedding=query_embedding, top_k=top_k, filters=filters
+            query_embedding=query_embedding,
+            top_k=top_k,
+            filters=filters,
+            with_payload=RESULT_PAYLOAD_FIELDS,
         )
 
+        return self._build_results(qdrant_results)
+
+    def search_many(self, queries, top_k=5, filters=None):
+        """
+        Search for documents similar to each of several queries.
+
+        All queries are embedded in one embed_batch call and searched in one
+        batched Qdrant request.
+
+        Args:
+            queries: List of search query texts
+            top_k: Number of results to return per query
+            filters: Optional metadata filter dict applied to every query, or a
+                list with one filter (or None) per query
+
+        Returns:
+            list: One list of documents with similarity scores per query, in input order
+        """
+        if not queries:
+            return []
+
+        query_embeddings = self.embedding_service.embed_batch(queries, priority=INTERACTIVE)
+        batch_results = self.qdrant_service.search_vectors_batch(
+            query_embeddings, top_k=top_k, filters=filters, with_payload=RESULT_PAYLOAD_FIELDS
+        )
+        return [self._build_results(qdrant_results) for qdrant_results in batch_results]
+
+    def _build_results(self, qdrant_results):
+        """
+        Turn Qdrant hits into document results, one per parent document.
+
+        Args:
+            qdrant_results: Hits returned by QdrantService
+
+        Returns:
+            list: List of documents with similarity scores
+        """
         # Process results - chunks have document_id in payload
         results = []
         seen_docs = set()  # Avoid duplicates
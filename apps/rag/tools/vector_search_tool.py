@@ -12,7 +12,7 @@ def vector_search_tool(query, top_k=5, filters=None):
     Args:
         query (str): Search query text
         top_k (int): Number of results to return (default: 5)
-        filters (dict): Optional metadata filters
+        filters (dict): Optional metadata filters (eq/in/range, see apps.vectorstore.filters)
 
     Returns:
         dict: Search results with documents and metadata
@@ -40,7 +40,11 @@ TOOL_METADATA = {
         },
         "filters": {
             "type": "object",
-            "description": "Optional metadata filters",
+            "description": (
+                "Optional metadata filters on document_id, category, type, filename or "
+                'chunk_index, e.g. {"category": "apple_business"}, '
+                '{"type": {"in": ["financial_filing"]}} or {"chunk_index": {"gte": 0, "lt": 10}}'
+            ),
             "required": False,
         },
     },
@@ -0,0 +1,99 @@
+"""
+Filter DSL for vector search.
+
+Filters are plain dicts keyed by payload field, so they can come straight from
+the agent's tool calls::
+
+    {"category": "apple_business"}                       # eq
+    {"type": {"in": ["financial_filing", "document"]}}   # any of
+    {"chunk_index": {"gte": 0, "lt": 20}}                # range
+    {"document_id": {"eq": "0b7c..."}, "filename": "10-K.pdf"}
+
+Conditions on different fields are combined with AND. Only the fields in
+FILTERABLE_FIELDS are accepted; each of them has a payload index, so filtered
+searches are resolved by the index rather than by post-filtering HNSW results.
+"""
+
+from qdrant_client.models import (
+    FieldCondition,
+    Filter,
+    MatchAny,
+    MatchValue,
+    PayloadSchemaType,
+    Range,
+)
+
+# Filterable payload fields and their index types
+FILTERABLE_FIELDS = {
+    "document_id": PayloadSchemaType.KEYWORD,
+    "category": PayloadSchemaType.KEYWORD,
+    "type": PayloadSchemaType.KEYWORD,
+    "filename": PayloadSchemaType.KEYWORD,
+    "chunk_index": PayloadSchemaType.INTEGER,
+}
+
+RANGE_OPERATORS = ("gt", "gte", "lt", "lte")
+
+
+def build_filter(filters):
+    """
+    Translate a filter dict into a Qdrant Filter.
+
+    Args:
+        filters: Filter dict (see module docstring), a Qdrant Filter, or None
+
+    Returns:
+        Filter | None: Qdrant filter, or None when there is nothing to filter on
+
+    Raises:
+        ValueError: If a field or operator is not supported
+    """
+    if not filters:
+        return None
+    if isinstance(filters, Filter):
+        return filters
+    if not isinstance(filters, dict):
+        raise ValueError("Filters must be an object mapping field names to conditions")
+
+    conditions = [_field_condition(field, spec) for field, spec in filters.items()]
+    return Filter(must=conditions)
+
+
+def _field_condition(field, spec):
+    """Build the condition for one field."""
+    if field not in FILTERABLE_FIELDS:
+        raise ValueError(
+            f"Unsupported filter field '{field}' (allowed: {', '.join(FILTERABLE_FIELDS)})"
+        )
+    is_integer = FILTERABLE_FIELDS[field] == PayloadSchemaType.INTEGER
+
+    def coerce(value):
+        try:
+            return int(value) if is_integer else str(value)
+        except (TypeError, ValueError) as e:
+            raise ValueError(f"Invalid value for filter field '{field}': {value!r}") from e
+
+    if isinstance(spec, list):
+        spec = {"in": spec}
+    elif not isinstance(spec, dict):
+        spec = {"eq": spec}
+
+    if not spec:
+        raise ValueError(f"Empty filter condition for '{field}'")
+    unknown = set(spec) - {"eq", "in", *RANGE_OPERATORS}
+    if unknown:
+        raise ValueError(
+            f"Unsupported filter operator(s) for '{field}': {', '.join(sorted(unknown))}"
+        )
+    if len(spec) > 1 and not set(spec) <= set(RANGE_OPERATORS):
+        raise ValueError(f"Filter on '{field}' must use one of eq, in or a range")
+
+    if "eq" in spec:
+        return FieldCondition(key=field, match=MatchValue(value=coerce(spec["eq"])))
+    if "in" in spec:
+        values = spec["in"] if isinstance(spec["in"], list) else [spec["in"]]
+        return FieldCondition(key=field, match=MatchAny(any=[coerce(v) for v in values]))
+
+    if not is_integer:
+        raise ValueError(f"Range filters are only supported on numeric fields, not '{field}'")
+    return FieldCondition(key=field, range=Range(**{op: coerce(spec[op]) for op in spec}))
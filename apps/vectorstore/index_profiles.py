@@ -0,0 +1,136 @@
+"""
+Named HNSW/quantization profiles for Qdrant collections.
+
+Profiles are plain dicts in ``settings.QDRANT_INDEX_PROFILES``; this module turns
+them into Qdrant config objects and decides whether an existing collection needs
+to be updated to match.
+"""
+
+from django.conf import settings
+from qdrant_client.models import (
+    BinaryQuantization,
+    BinaryQuantizationConfig,
+    Disabled,
+    HnswConfigDiff,
+    QuantizationSearchParams,
+    ScalarQuantization,
+    ScalarQuantizationConfig,
+    ScalarType,
+    SearchParams,
+)
+
+QUANTIZATION_TYPES = ("scalar", "binary")
+
+
+def get_index_profile(name=None):
+    """
+    Look up an index profile.
+
+    Args:
+        name: Profile name. If None, uses QDRANT_CONFIG INDEX_PROFILE
+
+    Returns:
+        dict: Profile with 'hnsw', 'on_disk', 'quantization' and 'search' keys
+    """
+    name = name or settings.QDRANT_CONFIG.get("INDEX_PROFILE", "balanced")
+    profiles = settings.QDRANT_INDEX_PROFILES
+    if name not in profiles:
+        raise ValueError(
+            f"Unknown Qdrant index profile '{name}' (choose from {', '.join(profiles)})"
+        )
+
+    profile = profiles[name]
+    quantization = profile.get("quantization")
+    if quantization and quantization["type"] not in QUANTIZATION_TYPES:
+        raise ValueError(f"Unsupported quantization type: {quantization['type']}")
+    return {"name": name, **profile}
+
+
+def hnsw_config(profile):
+    """
+    Build the HNSW graph config of a profile.
+
+    Args:
+        profile: Index profile dict
+
+    Returns:
+        HnswConfigDiff: HNSW parameters (m, ef_construct, on_disk)
+    """
+    return HnswConfigDiff(**profile.get("hnsw", {}))
+
+
+def quantization_config(profile):
+    """
+    Build the quantization config of a profile.
+
+    Args:
+        profile: Index profile dict
+
+    Returns:
+        ScalarQuantization | BinaryQuantization | Disabled: Quantization settings
+    """
+    quantization = profile.get("quantization")
+    if not quantization:
+        return Disabled.DISABLED
+
+    always_ram = quantization.get("always_ram", True)
+    if quantization["type"] == "scalar":
+        return ScalarQuantization(
+            scalar=ScalarQuantizationConfig(
+                type=ScalarType.INT8,
+                quantile=quantization.get("quantile"),
+                always_ram=always_ram,
+            )
+        )
+    return BinaryQuantization(binary=BinaryQuantizationConfig(always_ram=always_ram))
+
+
+def search_params(profile, hnsw_ef=None, rescore=None, oversampling=None):
+    """
+    Build per-query search parameters, falling back to the profile defaults.
+
+    Args:
+        profile: Index profile dict
+        hnsw_ef: Size of the HNSW candidate list (higher = better recall, slower)
+        rescore: Re-rank quantized candidates with the original vectors
+        oversampling: Candidates fetched per result before rescoring
+
+    Returns:
+        SearchParams: Search parameters for query_points
+    """
+    defaults = profile.get("search", {})
+    hnsw_ef = hnsw_ef if hnsw_ef is not None else defaults.get("hnsw_ef")
+
+    quantization = None
+    if profile.get("quantization"):
+        rescore = rescore if rescore is not None else defaults.get("rescore")
+        oversampling = oversampling if oversampling is not None else defaults.get("oversampling")
+        quantization = QuantizationSearchParams(rescore=rescore, oversampling=oversampling)
+
+    return SearchParams(hnsw_ef=hnsw_ef, quantization=quantization)
+
+
+def profile_matches(collection_config, profile):
+    """
+    Check whether an existing collection already uses a profile.
+
+    Args:
+        collection_config: CollectionConfig from get_collection()
+        profile: Index profile dict
+
+    Returns:
+        bool: True when HNSW, on-disk storage and quantization type match
+    """
+    hnsw = collection_config.hnsw_config
+    for key, value in profile.get("hnsw", {}).items():
+        if getattr(hnsw, key, None) != value:
+            return False
+
+    if bool(collection_config.params.vectors.on_disk) != profile.get("on_disk", False):
+        return False
+
+    current = collection_config.quantization_config
+    wanted = (profile.get("quantization") or {}).get("type")
+    if wanted is None:
+        return current is None
+    return current is not None and getattr(current, wanted, None) is not None
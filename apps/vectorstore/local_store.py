@@ -0,0 +1,682 @@
+"""
+In-process vector store with the QdrantService interface.
+
+Vectors live in one memory-mapped float32 matrix (``vectors.f32``), normalized
+at insert time so cosine similarity is a single matrix-vector product. Point ids
+map to matrix rows; deleted rows are recycled. Payloads and the id map are kept
+in memory and persisted incrementally: writes queue small row records, which a
+background thread appends to a log (``points.<generation>.log``) every
+persist_interval seconds, after flushing the vectors those records refer to.
+When the log outgrows the last snapshot (``points.json``), the same thread
+writes a new snapshot and starts a new log generation. Neither step holds the
+store lock while serializing, so searches and writes are not blocked. The filterable
+payload fields (see apps.vectorstore.filters) are also kept as column arrays, so
+filters are vectorized masks rather than per-point Python checks.
+
+Search is exact: one pass over the matrix, so it is bound by memory bandwidth
+(N x dimension x 4 bytes read per query, ~1 GB for a million 256-dim rows).
+On one core expect single-digit milliseconds up to about 50k 256-dim rows,
+~15 ms at 100k and ~130 ms at a million; use Qdrant's HNSW index beyond that. Batched queries
+share the pass, so search_vectors_batch costs little more than one search.
+"""
+
+import atexit
+import json
+import logging
+import os
+import threading
+import time
+from pathlib import Path
+
+import numpy as np
+from django.conf import settings
+from qdrant_client.models import PayloadSchemaType
+
+from apps.vectorstore.filters import FILTERABLE_FIELDS, build_filter
+from apps.vectorstore.versioning import embedding_metadata
+
+logger = logging.getLogger(__name__)
+
+FORMAT_VERSION = 2
+
+# The log is compacted into a new snapshot once it is larger than the snapshot
+# and at least this many bytes
+COMPACT_MIN_BYTES = 1024 * 1024
+
+# Rows allocated when the store is created; capacity doubles when full
+INITIAL_CAPACITY = 1024
+
+
+class LocalVectorStore:
+    """
+    NumPy vector store exposing the QdrantService methods used by the app.
+    """
+
+    COLLECTION_NAME = "documents"
+
+    def __init__(self, path=None, collection_name=None, dimension=None, persist_interval=None):
+        """
+        Open (or create) a local collection.
+
+        Args:
+            path: Base directory for collections. If None, uses LOCAL_VECTOR_STORE
+                PATH; an empty path keeps the store in memory only
+            collection_name: Collection to operate on. If None, uses QDRANT_CONFIG
+                COLLECTION_NAME
+            dimension: Vector size of the collection. If None, uses EMBEDDING_DIMENSION
+            persist_interval: Seconds between background saves. If None, uses
+                LOCAL_VECTOR_STORE PERSIST_INTERVAL
+        """
+        config = settings.LOCAL_VECTOR_STORE
+        path = config.get("PATH") if path is None else path
+        self.collection_name = collection_name or settings.QDRANT_CONFIG.get(
+            "COLLECTION_NAME", self.COLLECTION_NAME
+        )
+        self.dimension = dimension or settings.EMBEDDING_CONFIG["EMBEDDING_DIMENSION"]
+        self.embedding = embedding_metadata(self.dimension)
+        self.persist_interval = (
+            config.get("PERSIST_INTERVAL", 30) if persist_interval is None else persist_interval
+        )
+        self.directory = Path(path) / self.collection_name if path else None
+
+        self._lock = threading.RLock()
+        self._ids = []
+        self._rows = {}
+        self._payloads = []
+        self._free = []
+        self._upsert_stats = {"points": 0, "requests": 0, "seconds": 0.0}
+
+        # Row records written since the last persist: (row, id, payload), id None
+        # for a deleted row
+        self._pending = []
+        # Serializes persist() calls; never held together with waits on self._lock
+        self._persist_lock = threading.Lock()
+        self._generation = 0
+        self._snapshot_bytes = 0
+        self._log_bytes = 0
+        self._closed = threading.Event()
+
+        self._load()
+        if self.directory is not None:
+            threading.Thread(
+                target=self._persist_loop, name=f"persist-{self.collection_name}", daemon=True
+            ).start()
+            atexit.register(self.close)
+
+    # ------------------------------------------------------------------ storage
+
+    @property
+    def _vectors_path(self):
+        return self.directory / "vectors.f32"
+
+    @property
+    def _points_path(self):
+        return self.directory / "points.json"
+
+    def _log_path(self, generation):
+        return self.directory / f"points.{generation}.log"
+
+    def _load(self):
+        """Load an existing collection from disk (snapshot plus log), or allocate an empty one."""
+        if self.directory is None or not self._points_path.exists():
+            self._allocate(INITIAL_CAPACITY)
+            return
+
+        with open(self._points_path, encoding="utf-8") as f:
+            state = json.load(f)
+        if state["dimension"] != self.dimension:
+            raise ValueError(
+                f"Collection '{self.collection_name}' stores {state['dimension']}-dim vectors "
+                f"but {self.dimension} dimensions are configured"
+            )
+        self._ids = state["ids"]
+        self._payloads = state["payloads"]
+        self._generation = state.get("generation", 0)
+        self._snapshot_bytes = self._points_path.stat().st_size
+        self._replay_log()
+
+        # The vector file is grown before rows beyond the snapshot's capacity are used
+        row_bytes = self.dimension * 4
+        capacity = max(
+            state["capacity"], len(self._ids), self._vectors_path.stat().st_size // row_bytes
+        )
+        self._vectors = np.memmap(
+            self._vectors_path, dtype=np.float32, mode="r+", shape=(capacity, self.dimension)
+        )
+        self._rows = {point_id: row for row, point_id in enumerate(self._ids) if point_id}
+        self._free = [row for row, point_id in enumerate(self._ids) if point_id is None]
+        self._alive = np.zeros(capacity, dtype=bool)
+        self._alive[list(self._rows.values())] = True
+        self._columns = self._empty_columns(capacity)
+        for row in self._rows.values():
+            self._index_payload(row, self._payloads[row])
+
+    def _replay_log(self):
+        """Apply the row records logged since the snapshot."""
+        path = self._log_path(self._generation)
+        if not path.exists():
+            return
+        valid_bytes = 0
+        with open(path, "rb") as f:
+            for line in f:
+                if not line.endswith(b"\n"):
+                    break
+                try:
+                    row, point_id, payload = json.loads(line)
+                except ValueError:
+                    # A record cut short by a crash: drop it so later appends stay readable
+                    break
+                while len(self._ids) <= row:
+                    self._ids.append(None)
+                    self._payloads.append({})
+                self._ids[row] = point_id
+                self._payloads[row] = payload
+                valid_bytes += len(line)
+        if valid_bytes != path.stat().st_size:
+            os.truncate(path, valid_bytes)
+        self._log_bytes = valid_bytes
+
+    def _allocate(self, capacity):
+        """Create empty storage with room for capacity rows."""
+        if self.directory is not None:
+            self.directory.mkdir(parents=True, exist_ok=True)
+            with open(self._vectors_path, "wb") as f:
+                f.truncate(capacity * self.dimension * 4)
+            self._vectors = np.memmap(
+                self._vectors_path, dtype=np.float32, mode="r+", shape=(capacity, self.dimension)
+            )
+        else:
+            self._vectors = np.zeros((capacity, self.dimension), dtype=np.float32)
+        self._alive = np.zeros(capacity, dtype=bool)
+        self._columns = self._empty_columns(capacity)
+
+    @staticmethod
+    def _empty_columns(capacity):
+        """Column arrays for the filterable payload fields."""
+        return {
+            field: (
+                np.full(capacity, np.nan)
+                if schema == PayloadSchemaType.INTEGER
+                else np.full(capacity, None, dtype=object)
+            )
+            for field, schema in FILTERABLE_FIELDS.items()
+        }
+
+    def _grow(self, needed):
+        """Make room for at least needed rows, doubling the capacity."""
+        capacity = len(self._alive)
+        if needed <= capacity:
+            return
+        new_capacity = max(needed, capacity * 2)
+
+        if isinstance(self._vectors, np.memmap):
+            self._vectors.flush()
+            del self._vectors
+            with open(self._vectors_path, "r+b") as f:
+                f.truncate(new_capacity * self.dimension * 4)
+            self._vectors = np.memmap(
+                self._vectors_path,
+                dtype=np.float32,
+                mode="r+",
+                shape=(new_capacity, self.dimension),
+            )
+        else:
+            vectors = np.zeros((new_capacity, self.dimension), dtype=np.float32)
+            vectors[:capacity] = self._vectors
+            self._vectors = vectors
+
+        alive = np.zeros(new_capacity, dtype=bool)
+        alive[:capacity] = self._alive
+        self._alive = alive
+        columns = self._empty_columns(new_capacity)
+        for field, column in self._columns.items():
+            columns[field][:capacity] = column
+        self._columns = columns
+
+    def persist(self):
+        """
+        Save the writes made since the last persist.
+
+        The store lock is only held to take the pending records (or, when
+        compacting, shallow copies of the id and payload lists); flushing and
+        serializing happen outside it.
+        """
+        if self.directory is None:
+            return
+        with self._persist_lock:
+            with self._lock:
+                records, self._pending = self._pending, []
+                compact = not self._points_path.exists() or self._log_bytes > max(
+                    self._snapshot_bytes, COMPACT_MIN_BYTES
+                )
+                if compact:
+                    # Payload dicts are replaced, never mutated, so copying the lists
+                    # is a consistent snapshot
+                    ids, payloads = list(self._ids), list(self._payloads)
+                    capacity = len(self._alive)
+                vectors = self._vectors
+            if not records and not compact:
+                return
+
+            # Vectors first, so every logged row has its vector on disk
+            vectors.flush()
+            if compact:
+                self._write_snapshot(ids, payloads, capacity)
+            else:
+                self._append_log(records)
+
+    def _append_log(self, records):
+        """Append row records to the current log generation and sync it."""
+        data = "".join(json.dumps(record) + "\n" for record in records).encode("utf-8")
+        with open(self._log_path(self._generation), "ab") as f:
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+        self._log_bytes += len(data)
+
+    def _write_snapshot(self, ids, payloads, capacity):
+        """Write a full snapshot that starts a new, empty log generation."""
+        previous = self._generation
+        generation = previous + 1
+        state = {
+            "version": FORMAT_VERSION,
+            "dimension": self.dimension,
+            "capacity": capacity,
+            "generation": generation,
+            "ids": ids,
+            "payloads": payloads,
+        }
+        tmp_path = self._points_path.with_suffix(".json.tmp")
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(state, f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self._points_path)
+
+        self._generation = generation
+        self._snapshot_bytes = self._points_path.stat().st_size
+        self._log_bytes = 0
+        self._log_path(previous).unlink(missing_ok=True)
+
+    def _persist_loop(self):
+        """Persist every persist_interval seconds until the store is closed."""
+        while not self._closed.wait(self.persist_interval):
+            try:
+                self.persist()
+            except OSError as e:
+                logger.warning("Failed to persist local vector store: %s", e)
+
+    def close(self):
+        """Stop background persistence and save pending writes."""
+        self._closed.set()
+        self.persist()
+
+    def _index_payload(self, row, payload):
+        """Copy the filterable payload fields of a row into the column arrays."""
+        for field, column in self._columns.items():
+            value = payload.get(field)
+            if column.dtype == object:
+                column[row] = None if value is None else str(value)
+            else:
+                column[row] = np.nan if value is None else value
+
+    # ------------------------------------------------------------------ writes
+
+    def upsert_vector(self, document_id, embedding, metadata=None):
+        """
+        Insert or update a document vector.
+
+        Args:
+            document_id: UUID of the document
+            embedding: Vector embedding (float32 ndarray or list of floats)
+            metadata: Optional metadata dict
+
+        Returns:
+            bool: Success status
+        """
+        return self.upsert_batch(
+            [{"id": document_id, "vector": embedding, "payload": metadata or {}}]
+        )
+
+    def upsert_batch(self, points, batch_size=None, parallel=None, wait=None):
+        """
+        Insert or update multiple document vectors.
+
+        Args:
+            points: Iterable of dictionaries with 'id', 'vector', and 'payload'
+            batch_size: Accepted for interface compatibility (writes are in-process)
+            parallel: Accepted for interface compatibility
+            wait: Accepted for interface compatibility (writes are visible immediately)
+
+        Returns:
+            bool: Success status
+        """
+        points = list(points)
+        if not points:
+            return True
+
+        started = time.monotonic()
+        try:
+            vectors = np.ascontiguousarray([p["vector"] for p in points], dtype=np.float32)
+            if vectors.shape[1] != self.dimension:
+                raise ValueError(
+                    f"Expected {self.dimension}-dim vectors, got {vectors.shape[1]} dimensions"
+                )
+            norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+            np.divide(vectors, norms, out=vectors, where=norms > 0)
+
+            with self._lock:
+                rows = [self._row_for(str(p["id"])) for p in points]
+                self._vectors[rows] = vectors
+                self._alive[rows] = True
+                for row, point in zip(rows, points, strict=True):
+                    payload = point.get("payload") or {}
+                    self._payloads[row] = payload
+                    self._index_payload(row, payload)
+                    if self.directory is not None:
+                        self._pending.append((row, self._ids[row], payload))
+                self._upsert_stats["points"] += len(points)
+                self._upsert_stats["requests"] += 1
+                self._upsert_stats["seconds"] += time.monotonic() - started
+        except Exception as e:
+            raise Exception(f"Failed to batch upsert vectors: {str(e)}") from e
+
+        return True
+
+    def _row_for(self, point_id):
+        """Get the row of an id, assigning a free or new row to unknown ids."""
+        row = self._rows.get(point_id)
+        if row is not None:
+            return row
+        if self._free:
+            row = self._free.pop()
+            self._ids[row] = point_id
+        else:
+            row = len(self._ids)
+            self._grow(row + 1)
+            self._ids.append(point_id)
+            self._payloads.append({})
+        self._rows[point_id] = row
+        return row
+
+    def upsert_stats(self):
+        """
+        Get cumulative bulk upsert throughput.
+
+        Returns:
+            dict: Points and requests sent, seconds spent and points per second
+        """
+        with self._lock:
+            stats = dict(self._upsert_stats)
+        stats["points_per_second"] = stats["points"] / stats["seconds"] if stats["seconds"] else 0.0
+        return stats
+
+    def build_target(self):
+        """
+        Get the collection being rebuilt alongside this one.
+        The local store is rebuilt in place, so there is never one.
+
+        Returns:
+            None
+        """
+        return None
+
+    def delete_vector(self, document_id):
+        """
+        Delete a document vector.
+
+        Args:
+            document_id: UUID of the document
+        """
+        with self._lock:
+            self._delete_rows([self._rows.get(str(document_id))])
+
+    def delete_vectors(self, point_ids):
+        """
+        Delete several points by id.
+
+        Args:
+            point_ids: Iterable of point ids
+        """
+        with self._lock:
+            self._delete_rows([self._rows.get(str(point_id)) for point_id in point_ids])
+
+    def delete_by_filter(self, filters):
+        """
+        Delete every point matching a payload filter.
+
+        Args:
+            filters: Filter dict (see apps.vectorstore.filters)
+        """
+        query_filter = build_filter(filters)
+        if query_filter is None:
+            raise ValueError("delete_by_filter requires a non-empty filter")
+        with self._lock:
+            size = len(self._ids)
+            mask = self._filter_mask(query_filter, size) & self._alive[:size]
+            self._delete_rows(np.flatnonzero(mask).tolist())
+
+    def _delete_rows(self, rows):
+        """Free rows (None entries are ignored)."""
+        for row in rows:
+            if row is None or self._ids[row] is None:
+                continue
+            del self._rows[self._ids[row]]
+            self._ids[row] = None
+            self._payloads[row] = {}
+            self._alive[row] = False
+            self._vectors[row] = 0
+            self._index_payload(row, {})
+            self._free.append(row)
+            if self.directory is not None:
+                self._pending.append((row, None, {}))
+
+    # ------------------------------------------------------------------ reads
+
+    def search_vectors(
+        self,
+        query_embedding,
+        top_k=5,
+        filters=None,
+        hnsw_ef=None,
+        rescore=None,
+        oversampling=None,
+        with_payload=True,
+        score_threshold=None,
+        with_vectors=False,
+    ):
+        """
+        Search for similar vectors (exact cosine similarity).
+
+        Args:
+            query_embedding: Query vector (float32 ndarray or list of floats)
+            top_k: Number of results
+            filters: Optional filter dict (see apps.vectorstore.filters)
+            hnsw_ef: Ignored (search is exact)
+            rescore: Ignored (vectors are not quantized)
+            oversampling: Ignored
+            with_payload: True, False, or a list of payload fields to return
+            score_threshold: Optional minimum similarity score for returned hits
+            with_vectors: Whether to return each hit's stored vector
+
+        Returns:
+            list: Search results with scores
+        """
+        return self.search_vectors_batch(
+            [query_embedding],
+            top_k=top_k,
+            filters=filters,
+            with_payload=with_payload,
+            score_threshold=score_threshold,
+            with_vectors=with_vectors,
+        )[0]
+
+    def search_vectors_batch(
+        self,
+        embeddings,
+        top_k=5,
+        filters=None,
+        hnsw_ef=None,
+        with_payload=True,
+        score_threshold=None,
+        with_vectors=False,
+    ):
+        """
+        Run several similarity searches with one matrix product.
+
+        Args:
+            embeddings: Query vectors (2-D float32 array or sequence of vectors)
+            top_k: Number of results per query
+            filters: Optional filter applied to every query, or a list with one
+                filter (or None) per query
+            hnsw_ef: Ignored (search is exact)
+            with_payload: True, False, or a list of payload fields to return
+            score_threshold: Optional minimum similarity score for returned hits
+            with_vectors: Whether to return each hit's stored vector
+
+        Returns:
+            list: One list of search results per query, in input order
+        """
+        if len(embeddings) == 0:
+            return []
+
+        try:
+            queries = np.ascontiguousarray(embeddings, dtype=np.float32)
+            norms = np.linalg.norm(queries, axis=1, keepdims=True)
+            np.divide(queries, norms, out=queries, where=norms > 0)
+            if not isinstance(filters, list):
+                filters = [filters] * len(queries)
+            elif len(filters) != len(queries):
+                raise ValueError("filters must have one entry per query embedding")
+
+            # Scan a snapshot without the lock: writes only touch rows in place and
+            # growth swaps in new arrays, so these views stay valid
+            with self._lock:
+                size = len(self._ids)
+                vectors = self._vectors[:size]
+                alive = self._alive[:size].copy() if self._free else None
+                columns = {field: column[:size] for field, column in self._columns.items()}
+            if size == 0:
+                return [[] for _ in queries]
+
+            # (queries, size) scores in one BLAS call
+            scores = queries @ vectors.T
+
+            candidates = []
+            for query_scores, query_filter in zip(scores, filters, strict=True):
+                mask = self._filter_mask(build_filter(query_filter), size, columns)
+                if alive is not None:
+                    mask = alive if mask is None else mask & alive
+                if mask is not None:
+                    query_scores = np.where(mask, query_scores, -np.inf)
+                rows = self._top_rows(query_scores, top_k, score_threshold)
+                candidates.append((rows, query_scores))
+
+            # Rows deleted since the snapshot are dropped (a row reused meanwhile is
+            # returned with the score of its previous vector)
+            with self._lock:
+                return [
+                    [
+                        self._hit_dict(row, query_scores[row], with_payload, with_vectors)
+                        for row in rows
+                        if self._alive[row]
+                    ]
+                    for rows, query_scores in candidates
+                ]
+        except Exception as e:
+            raise Exception(f"Vector search failed: {str(e)}") from e
+
+    @staticmethod
+    def _top_rows(scores, top_k, score_threshold):
+        """Rows of the top_k finite scores, best first."""
+        k = min(top_k, len(scores))
+        if k <= 0:
+            return []
+        if k < len(scores):
+            candidates = np.argpartition(-scores, k - 1)[:k]
+        else:
+            candidates = np.arange(len(scores))
+        rows = candidates[np.argsort(-scores[candidates], kind="stable")]
+        keep = np.isfinite(scores[rows])
+        if score_threshold is not None:
+            keep &= scores[rows] >= score_threshold
+        return rows[keep]
+
+    def _filter_mask(self, query_filter, size, columns=None):
+        """
+        Evaluate a Qdrant Filter built by build_filter() as a boolean row mask.
+
+        Args:
+            query_filter: Filter, or None
+            size: Number of rows
+            columns: Column arrays to evaluate (default: the store's current columns)
+        """
+        if query_filter is None:
+            return None
+
+        columns = self._columns if columns is None else columns
+        mask = np.ones(size, dtype=bool)
+        for condition in query_filter.must or []:
+            column = columns[condition.key][:size]
+            if condition.range is not None:
+                bounds = condition.range
+                with np.errstate(invalid="ignore"):
+                    if bounds.gt is not None:
+                        mask &= column > bounds.gt
+                    if bounds.gte is not None:
+                        mask &= column >= bounds.gte
+                    if bounds.lt is not None:
+                        mask &= column < bounds.lt
+                    if bounds.lte is not None:
+                        mask &= column <= bounds.lte
+            elif hasattr(condition.match, "any"):
+                # Elementwise == is safe on object columns holding None
+                any_mask = np.zeros(size, dtype=bool)
+                for value in condition.match.any:
+                    any_mask |= column == value
+                mask &= any_mask
+            else:
+                mask &= column == condition.match.value
+        return mask
+
+    def _hit_dict(self, row, score, with_payload=True, with_vectors=False):
+        """Build a result dict for a row."""
+        payload = self._payloads[row]
+        if with_payload is False:
+            payload = {}
+        elif with_payload is not True:
+            payload = {k: payload[k] for k in with_payload if k in payload}
+        else:
+            payload = dict(payload)
+
+        result = {"id": self._ids[row], "score": float(score), "payload": payload}
+        if with_vectors:
+            result["vector"] = np.array(self._vectors[row])
+        return result
+
+    def scroll_points(self, limit=256, offset=None, with_payload=True, with_vectors=False):
+        """
+        Read one page of points from the collection.
+
+        Args:
+            limit: Page size
+            offset: Point id to resume from (the next_offset of the previous page)
+            with_payload: Whether to return payloads (or a list of payload fields)
+            with_vectors: Whether to return vectors
+
+        Returns:
+            tuple: (list of dicts with 'id', 'payload' and 'vector', next_offset or None)
+        """
+        with self._lock:
+            start = self._rows.get(str(offset), 0) if offset is not None else 0
+            rows = np.flatnonzero(self._alive[start : len(self._ids)]) + start
+            page, rest = rows[:limit], rows[limit : limit + 1]
+
+            points = []
+            for row in page:
+                hit = self._hit_dict(row, 0.0, with_payload, with_vectors)
+                points.append(
+                    {"id": hit["id"], "payload": hit["payload"], "vector": hit.get("vector")}
+                )
+            next_offset = self._ids[rest[0]] if len(rest) else None
+            return points, next_offset
@@ -0,0 +1,108 @@
+"""
+Django management command to compare Qdrant REST and gRPC transports.
+Run with: python manage.py benchmark_qdrant --points 5000
+"""
+
+import time
+import uuid
+
+import numpy as np
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from apps.vectorstore.services import QdrantService, create_qdrant_client
+
+# Typical chunk produced by DocumentService.process_pdf
+CHUNK_CHARS = 1000
+
+
+class Command(BaseCommand):
+    help = (
+        "Benchmark upsert throughput and search latency over REST and gRPC using "
+        "synthetic vectors and chunk-sized payloads in throwaway collections"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--points", type=int, default=5000, help="Points to upsert")
+        parser.add_argument("--batch-size", type=int, default=256, help="Points per upsert")
+        parser.add_argument("--queries", type=int, default=200, help="Searches to time")
+        parser.add_argument("--top-k", type=int, default=5, help="Results per search")
+        parser.add_argument(
+            "--dimension",
+            type=int,
+            default=None,
+            help="Vector size (default: EMBEDDING_DIMENSION)",
+        )
+        parser.add_argument(
+            "--chunk-chars", type=int, default=CHUNK_CHARS, help="Payload content length"
+        )
+
+    def handle(self, *args, **options):
+        dimension = options["dimension"] or settings.EMBEDDING_CONFIG["EMBEDDING_DIMENSION"]
+        rng = np.random.default_rng(0)
+        vectors = rng.standard_normal((options["points"], dimension), dtype=np.float32)
+        queries = rng.standard_normal((options["queries"], dimension), dtype=np.float32)
+        content = "x" * options["chunk_chars"]
+
+        self.stdout.write("=" * 60)
+        self.stdout.write(self.style.SUCCESS("⚡ Qdrant transport benchmark"))
+        self.stdout.write("=" * 60)
+        self.stdout.write(
+            f"📦 {options['points']} points x {dimension} dims, "
+            f"{options['chunk_chars']}-char payloads, batches of {options['batch_size']}\n"
+        )
+
+        results = {}
+        for transport, prefer_grpc in (("REST", False), ("gRPC", True)):
+            results[transport] = self._run(
+                prefer_grpc, vectors, queries, content, dimension, options
+            )
+            upsert_rate, p50, p95 = results[transport]
+            self.stdout.write(
+                f"   {transport:<5} upsert {upsert_rate:>9.0f} points/s   "
+                f"search p50 {p50:6.2f} ms   p95 {p95:6.2f} ms"
+            )
+
+        rest, grpc = results["REST"], results["gRPC"]
+        summary = f"\n🏁 gRPC vs REST: upsert x{grpc[0] / rest[0]:.2f}"
+        if grpc[1]:
+            summary += f", search p50 x{rest[1] / grpc[1]:.2f}"
+        self.stdout.write(self.style.SUCCESS(summary))
+        self.stdout.write("=" * 60)
+
+    def _run(self, prefer_grpc, vectors, queries, content, dimension, options):
+        """Upsert and search one throwaway collection; return (points/s, p50 ms, p95 ms)."""
+        client = create_qdrant_client(prefer_grpc=prefer_grpc)
+        name = f"benchmark_{uuid.uuid4().hex[:8]}"
+        # A plain collection, not a versioned one behind an alias, so cleanup deletes it
+        service = QdrantService(
+            client=client, collection_name=name, dimension=dimension, versioned=False
+        )
+
+        try:
+            batch_size = options["batch_size"]
+            started = time.perf_counter()
+            for start in range(0, len(vectors), batch_size):
+                service.upsert_batch(
+                    [
+                        {
+                            "id": uuid.uuid4(),
+                            "vector": vector,
+                            "payload": {"chunk_index": start + i, "content": content},
+                        }
+                        for i, vector in enumerate(vectors[start : start + batch_size])
+                    ]
+                )
+            upsert_rate = len(vectors) / (time.perf_counter() - started)
+
+            latencies = []
+            for query in queries:
+                started = time.perf_counter()
+                service.search_vectors(query, top_k=options["top_k"])
+                latencies.append((time.perf_counter() - started) * 1000)
+
+            p50, p95 = np.percentile(latencies, [50, 95]) if latencies else (0.0, 0.0)
+            return upsert_rate, p50, p95
+        finally:
+            client.delete_collection(name)
+            client.close()
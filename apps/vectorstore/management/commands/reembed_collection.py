@@ -0,0 +1,141 @@
+"""
+Django management command to re-embed the corpus into a reduced-dimension collection.
+Run with: python manage.py reembed_collection documents_512 --dimension 512
+"""
+
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.core.services import EmbeddingService
+from apps.knowledgebase.models import Document
+from apps.vectorstore.services import QdrantService
+
+
+class Command(BaseCommand):
+    help = (
+        "Re-embed every point of the source collection into a new collection with a "
+        "smaller embedding dimension and report recall against the source collection"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("target", type=str, help="Name of the collection to create/fill")
+        parser.add_argument(
+            "--dimension", type=int, required=True, help="Embedding dimension of the target"
+        )
+        parser.add_argument(
+            "--source",
+            type=str,
+            default=None,
+            help="Source collection (default: QDRANT_CONFIG COLLECTION_NAME)",
+        )
+        parser.add_argument(
+            "--batch-size", type=int, default=256, help="Points re-embedded per page"
+        )
+        parser.add_argument(
+            "--eval-queries",
+            type=int,
+            default=50,
+            help="Number of sampled chunks used as queries for the recall report (0 to skip)",
+        )
+        parser.add_argument("--top-k", type=int, default=10, help="k for recall@k")
+
+    def handle(self, *args, **options):
+        source_dimension = settings.EMBEDDING_CONFIG["EMBEDDING_DIMENSION"]
+        target_dimension = options["dimension"]
+        if target_dimension <= 0 or target_dimension > source_dimension:
+            raise CommandError(f"--dimension must be between 1 and {source_dimension}")
+
+        source = QdrantService(collection_name=options["source"], dimension=source_dimension)
+        if options["target"] in (source.alias, source.collection_name):
+            raise CommandError("Target collection must differ from the source collection")
+        target = QdrantService(
+            client=source.client, collection_name=options["target"], dimension=target_dimension
+        )
+        embedder = EmbeddingService(dimension=target_dimension)
+
+        self.stdout.write("=" * 60)
+        self.stdout.write(self.style.SUCCESS("🔁 Re-embedding collection"))
+        self.stdout.write("=" * 60)
+        self.stdout.write(f"📦 Source: {source.collection_name} ({source_dimension} dims)")
+        self.stdout.write(f"🎯 Target: {target.collection_name} ({target_dimension} dims)\n")
+
+        started = time.monotonic()
+        total = 0
+        skipped = 0
+        sample_texts = []
+        offset = None
+
+        while True:
+            points, offset = source.scroll_points(limit=options["batch_size"], offset=offset)
+            if not points:
+                break
+
+            texts = self._point_texts(points)
+            batch = [(p, t) for p, t in zip(points, texts, strict=True) if t]
+            skipped += len(points) - len(batch)
+
+            if batch:
+                vectors = embedder.embed_batch([t for _, t in batch])
+                target.upsert_batch(
+                    [
+                        {"id": p["id"], "vector": vector, "payload": p["payload"]}
+                        for (p, _), vector in zip(batch, vectors, strict=True)
+                    ]
+                )
+                total += len(batch)
+                if len(sample_texts) < options["eval_queries"]:
+                    sample_texts.extend(t for _, t in batch[: options["eval_queries"]])
+
+            self.stdout.write(f"   ✅ Re-embedded {total} point(s)")
+            if offset is None:
+                break
+
+        elapsed = time.monotonic() - started
+        self.stdout.write(f"\n⏱️  {total} point(s) in {elapsed:.1f}s")
+        if skipped:
+            self.stdout.write(self.style.WARNING(f"⚠️  Skipped {skipped} point(s) without text"))
+
+        source_bytes = total * source_dimension * 4
+        target_bytes = total * target_dimension * 4
+        self.stdout.write(
+            f"💾 Raw vector memory: {source_bytes / 2**20:.1f} MiB -> {target_bytes / 2**20:.1f} MiB"
+        )
+
+        sample_texts = sample_texts[: options["eval_queries"]]
+        if sample_texts:
+            recall = self._recall(source, target, embedder, sample_texts, options["top_k"])
+            self.stdout.write(
+                self.style.SUCCESS(
+                    f"🎯 recall@{options['top_k']} vs {source.collection_name}: {recall:.3f} "
+                    f"over {len(sample_texts)} queries"
+                )
+            )
+        self.stdout.write("=" * 60)
+
+    def _point_texts(self, points):
+        """Get the text of each point: chunk content, else the parent Document content."""
+        texts = [p["payload"].get("content") for p in points]
+        missing = {str(p["id"]) for p, t in zip(points, texts, strict=True) if not t}
+        if missing:
+            contents = dict(Document.objects.filter(id__in=missing).values_list("id", "content"))
+            contents = {str(k): v for k, v in contents.items()}
+            texts = [t or contents.get(str(p["id"])) for p, t in zip(points, texts, strict=True)]
+        return texts
+
+    def _recall(self, source, target, embedder, queries, top_k):
+        """Average overlap of target top-k with source top-k for the sampled queries."""
+        full_embedder = EmbeddingService(dimension=source.dimension)
+        full_vectors = full_embedder.embed_batch(queries)
+        reduced_vectors = embedder.embed_batch(queries)
+
+        scores = []
+        for full, reduced in zip(full_vectors, reduced_vectors, strict=True):
+            expected = {hit["id"] for hit in source.search_vectors(full, top_k=top_k)}
+            if not expected:
+                continue
+            found = {hit["id"] for hit in target.search_vectors(reduced, top_k=top_k)}
+            scores.append(len(expected & found) / len(expected))
+
+        return sum(scores) / len(scores) if scores else 0.0
@@ -0,0 +1,328 @@
+"""
+Django management command to rebuild the served collection without downtime.
+Run with: python manage.py reindex_collection [--index-profile fast] [--dimension 512]
+"""
+
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+from django.utils import timezone
+from qdrant_client.models import CollectionStatus, OptimizersConfigDiff
+
+from apps.core.pipeline import Pipeline, Stage
+from apps.core.services import EmbeddingService
+from apps.knowledgebase.models import Document
+from apps.knowledgebase.services import chunk_points, chunk_text, find_orphan_points
+from apps.vectorstore.services import QdrantService, get_qdrant_service
+from apps.vectorstore.versioning import (
+    abort_build,
+    build_alias,
+    embedding_matches,
+    embedding_metadata,
+    get_aliases,
+    next_version,
+    start_build,
+    switch_alias,
+    versioned_name,
+)
+
+# Qdrant's default; indexing is deferred (threshold 0) while the new version is loaded
+INDEXING_THRESHOLD = 20000
+
+
+class Command(BaseCommand):
+    help = (
+        "Build a new version of the served collection (new embedding model, dimension or "
+        "index profile) while the current one keeps serving, with dual-writes from "
+        "DocumentService, then switch the alias atomically"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--index-profile",
+            type=str,
+            default=None,
+            help="Index profile of the new version (default: QDRANT_CONFIG INDEX_PROFILE)",
+        )
+        parser.add_argument(
+            "--provider",
+            type=str,
+            default=None,
+            help="Embedding provider of the new version (default: DEFAULT_EMBEDDING_PROVIDER)",
+        )
+        parser.add_argument(
+            "--model",
+            type=str,
+            default=None,
+            help="Embedding model of the new version (default: EMBEDDING_MODEL)",
+        )
+        parser.add_argument(
+            "--dimension",
+            type=int,
+            default=None,
+            help="Embedding dimension of the new version (default: EMBEDDING_DIMENSION)",
+        )
+        parser.add_argument(
+            "--copy-vectors",
+            action="store_true",
+            help="Copy vectors from the served version instead of re-embedding "
+            "(only when the embeddings do not change)",
+        )
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=256,
+            help="Documents fetched per query, or points per page with --copy-vectors "
+            "(re-embedding runs in INGESTION_CONFIG windows)",
+        )
+        parser.add_argument(
+            "--wait-timeout",
+            type=int,
+            default=600,
+            help="Seconds to wait for the new version's index before switching",
+        )
+        parser.add_argument(
+            "--drop-old",
+            action="store_true",
+            help="Delete the previous version after the switch (embeddings unchanged only)",
+        )
+        parser.add_argument(
+            "--replace-legacy",
+            action="store_true",
+            help="Allow replacing an unversioned collection, which is deleted right "
+            "before the alias is created in its place",
+        )
+
+    def handle(self, *args, **options):
+        live = get_qdrant_service()
+        if not isinstance(live, QdrantService):
+            raise CommandError("reindex_collection requires VECTOR_BACKEND = 'qdrant'")
+        client = live.client
+        alias = live.alias
+
+        provider = options["provider"] or settings.EMBEDDING_CONFIG["DEFAULT_PROVIDER"]
+        dimension = options["dimension"] or settings.EMBEDDING_CONFIG["EMBEDDING_DIMENSION"]
+        embedding = embedding_metadata(dimension, provider, options["model"])
+        unchanged = embedding_matches(live.embedding, embedding)
+
+        if options["copy_vectors"] and not unchanged:
+            raise CommandError("--copy-vectors requires the same embedding model and dimension")
+        if options["drop_old"] and not unchanged:
+            raise CommandError(
+                "Keep the previous version until every process runs the new embedding "
+                "settings; processes still configured for it keep serving from it"
+            )
+
+        aliases = get_aliases(client)
+        legacy = alias not in aliases
+        if legacy and not options["replace_legacy"]:
+            raise CommandError(
+                f"'{alias}' is an unversioned collection; rerun with --replace-legacy to "
+                f"replace it by an alias (it is deleted just before the switch)"
+            )
+        if build_alias(alias) in aliases:
+            raise CommandError(
+                f"A re-index of '{alias}' is already running ('{build_alias(alias)}' exists)"
+            )
+
+        target_name = versioned_name(alias, next_version(client, alias))
+        target = QdrantService(
+            client=client,
+            collection_name=target_name,
+            dimension=dimension,
+            index_profile=options["index_profile"],
+            versioned=False,
+            embedding=embedding,
+        )
+
+        self.stdout.write("=" * 60)
+        self.stdout.write(self.style.SUCCESS("🔁 Zero-downtime re-index"))
+        self.stdout.write("=" * 60)
+        self.stdout.write(f"📦 Serving: {live.collection_name} (alias '{alias}')")
+        self.stdout.write(
+            f"🎯 Building: {target_name} ({embedding['embedding_model']}, {dimension} dims, "
+            f"'{target.index_profile['name']}' profile)\n"
+        )
+
+        started_at = timezone.now()
+        try:
+            # Defer HNSW indexing so the bulk load runs at full upsert throughput
+            client.update_collection(
+                collection_name=target_name,
+                optimizers_config=OptimizersConfigDiff(indexing_threshold=0),
+            )
+            start_build(client, alias, target_name)
+            # Give every process time to notice the build alias and start dual-writing
+            time.sleep(live.refresh_interval + 1)
+
+            if options["copy_vectors"]:
+                self._copy_points(live, target, options["batch_size"])
+            else:
+                embedder = EmbeddingService(
+                    provider=provider, dimension=dimension, model=options["model"]
+                )
+                self._index_documents(
+                    target, embedder, Document.objects.order_by("pk"), options["batch_size"]
+                )
+                # Writes made before a process noticed the build alias
+                changed = Document.objects.filter(updated_at__gte=started_at).order_by("pk")
+                self.stdout.write(f"🔄 Catching up {changed.count()} changed document(s)")
+                self._index_documents(target, embedder, changed, options["batch_size"])
+            self._prune_orphans(target, options["batch_size"])
+
+            client.update_collection(
+                collection_name=target_name,
+                optimizers_config=OptimizersConfigDiff(indexing_threshold=INDEXING_THRESHOLD),
+            )
+            self._wait_for_index(client, target_name, options["wait_timeout"])
+        except BaseException as e:
+            abort_build(client, alias)
+            client.delete_collection(target_name)
+            if isinstance(e, KeyboardInterrupt):
+                raise
+            raise CommandError(f"Re-index failed, removed {target_name}: {str(e)}") from e
+
+        previous = live.collection_name
+        if legacy:
+            client.delete_collection(alias)
+        switch_alias(client, alias, target_name)
+        self.stdout.write(self.style.SUCCESS(f"\n🔀 '{alias}' now points to {target_name}"))
+
+        if options["drop_old"] and not legacy:
+            # Let every process re-resolve the alias before its old version disappears
+            time.sleep(2 * live.refresh_interval)
+            client.delete_collection(previous)
+            self.stdout.write(f"🗑️  Deleted {previous}")
+        elif not legacy:
+            self.stdout.write(f"📦 Previous version kept: {previous}")
+        self.stdout.write("=" * 60)
+
+    def _index_documents(self, target, embedder, queryset, batch_size):
+        """
+        Chunk, embed and upsert documents through staged pipeline threads, as ingestion does.
+
+        Chunks of consecutive documents are packed into windows of INGESTION_CONFIG
+        WINDOW_SIZE chunks, so small documents share embedding calls, and up to
+        EMBED_WORKERS windows are embedded and UPSERT_WORKERS stored concurrently
+        behind bounded queues.
+        """
+        ingestion = settings.INGESTION_CONFIG
+        window = ingestion.get("WINDOW_SIZE", 256)
+        queue_size = ingestion.get("QUEUE_SIZE", 4)
+        # (document, chunk index of the first chunk, chunks) not yet cut into a window
+        pending = []
+        totals = {"documents": 0, "windows": 0, "points": 0}
+
+        def documents():
+            try:
+                yield from queryset.iterator(chunk_size=batch_size)
+            finally:
+                connections.close_all()
+
+        def windows(complete):
+            batches = []
+            while sum(len(chunks) for _, _, chunks in pending) >= window or (complete and pending):
+                batch = []
+                size = 0
+                while pending and size < window:
+                    document, start, chunks = pending.pop(0)
+                    taken = chunks[: window - size]
+                    batch.append((document, start, taken))
+                    size += len(taken)
+                    if len(taken) < len(chunks):
+                        pending.insert(0, (document, start + len(taken), chunks[len(taken) :]))
+                batches.append(batch)
+            return batches
+
+        def chunk(document):
+            totals["documents"] += 1
+            chunks = chunk_text(document.content)
+            if chunks:
+                pending.append((document, 0, chunks))
+            return windows(complete=False)
+
+        def embed(batch):
+            texts = [text for _, _, chunks in batch for text in chunks]
+            return [(batch, embedder.embed_batch(texts))]
+
+        def upsert(item):
+            batch, embeddings = item
+            points = []
+            offset = 0
+            for document, start, chunks in batch:
+                vectors = embeddings[offset : offset + len(chunks)]
+                points.extend(chunk_points(document, chunks, vectors, start))
+                offset += len(chunks)
+            target.upsert_batch(points)
+            return [len(points)]
+
+        def count(points):
+            totals["windows"] += 1
+            totals["points"] += points
+            if totals["windows"] % 10 == 0:
+                self.stdout.write(f"   📄 {totals['points']} point(s)")
+
+        Pipeline(
+            documents(),
+            [
+                Stage("chunk", chunk, queue_size=queue_size, flush=lambda: windows(complete=True)),
+                Stage(
+                    "embed",
+                    embed,
+                    ingestion.get("EMBED_WORKERS", 2),
+                    queue_size,
+                    # The embedding cache opens a database connection on each embed thread
+                    on_exit=connections.close_all,
+                ),
+                Stage("upsert", upsert, ingestion.get("UPSERT_WORKERS", 2), queue_size),
+                Stage("count", count, queue_size=queue_size),
+            ],
+            source_name="load",
+        ).run()
+        self.stdout.write(
+            f"✅ Indexed {totals['documents']} document(s) ({totals['points']} points)"
+        )
+
+    def _copy_points(self, live, target, batch_size):
+        """Stream every point of the served version into the new one."""
+
+        def points():
+            offset = None
+            while True:
+                page, offset = live.scroll_points(
+                    limit=batch_size, offset=offset, with_vectors=True
+                )
+                yield from page
+                if not page or offset is None:
+                    return
+
+        target.upsert_batch(points())
+        self.stdout.write(f"✅ Copied {target.upsert_stats()['points']} point(s)")
+
+    def _prune_orphans(self, target, batch_size):
+        """Delete points of documents deleted while they were being indexed."""
+        orphans = 0
+        offset = None
+        while True:
+            page, offset = target.scroll_points(
+                limit=batch_size, offset=offset, with_payload=["document_id"]
+            )
+            orphan_ids, _ = find_orphan_points(page)
+            if orphan_ids:
+                target.delete_vectors(orphan_ids)
+                orphans += len(orphan_ids)
+            if not page or offset is None:
+                break
+        if orphans:
+            self.stdout.write(f"🗑️  Pruned {orphans} point(s) of deleted documents")
+
+    def _wait_for_index(self, client, name, timeout):
+        """Wait until Qdrant reports the collection as fully indexed (green)."""
+        self.stdout.write("⏳ Waiting for the index to be built...")
+        deadline = time.monotonic() + timeout
+        while client.get_collection(name).status != CollectionStatus.GREEN:
+            if time.monotonic() > deadline:
+                raise TimeoutError(f"{name} was not indexed within {timeout}s")
+            time.sleep(2)
@@ -2,9 +2,85 @@
 Vector Store Services.
 """
 
+import itertools
+import logging
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor
+from concurrent.futures import wait as wait_for
+
+import numpy as np
 from django.conf import settings
 from qdrant_client import QdrantClient
-from qdrant_client.models import Distance, PointStruct, VectorParams
+from qdrant_client.models import (
+    Batch,
+    Distance,
+    FilterSelector,
+    PointStruct,
+    QueryRequest,
+    VectorParams,
+    VectorParamsDiff,
+)
+
+from apps.core.registry import services
+from apps.vectorstore.filters import FILTERABLE_FIELDS, build_filter
+from apps.vectorstore.index_profiles import (
+    get_index_profile,
+    hnsw_config,
+    profile_matches,
+    quantization_config,
+    search_params,
+)
+from apps.vectorstore.versioning import (
+    build_alias,
+    embedding_matches,
+    embedding_metadata,
+    get_aliases,
+    list_versions,
+    next_version,
+    switch_alias,
+    versioned_name,
+)
+
+logger = logging.getLogger(__name__)
+
+
+def as_vector_matrix(vectors):
+    """
+    Stack vectors into a contiguous 2-D float32 array.
+
+    Args:
+        vectors: 2-D array, or sequence of 1-D arrays / lists of floats
+
+    Returns:
+        np.ndarray: float32 array of shape (len(vectors), dimension)
+    """
+    return np.ascontiguousarray(vectors, dtype=np.float32)
+
+
+def create_qdrant_client(prefer_grpc=None):
+    """
+    Create a QdrantClient from QDRANT_CONFIG.
+
+    With gRPC preferred, points and queries travel as protobuf over the gRPC port
+    instead of JSON over REST, which is much cheaper for large float vectors.
+    Collection management calls not covered by gRPC still fall back to REST.
+
+    Args:
+        prefer_grpc: Use the gRPC channel. If None, uses QDRANT_CONFIG PREFER_GRPC
+
+    Returns:
+        QdrantClient: New client
+    """
+    config = settings.QDRANT_CONFIG
+    if prefer_grpc is None:
+        prefer_grpc = config.get("PREFER_GRPC", False)
+    return QdrantClient(
+        host=config["HOST"],
+        port=config["PORT"],
+        grpc_port=config.get("GRPC_PORT", 6334),
+        prefer_grpc=prefer_grpc,
+    )
 
 
 class QdrantService:
@@ -14,95 +90,502 @@ class QdrantService:
 
     COLLECTION_NAME = "documents"
 
-    def __init__(self):
-        """Initialize Qdrant client."""
-        self.client = QdrantClient(
-            host=settings.QDRANT_CONFIG["HOST"], port=settings.QDRANT_CONFIG["PORT"]
+    def __init__(
+        self,
+        client=None,
+        collection_name=None,
+        dimension=None,
+        index_profile=None,
+        versioned=True,
+        embedding=None,
+    ):
+        """
+        Initialize Qdrant client.
+
+        Args:
+            client: Optional QdrantClient. If None, connects using QDRANT_CONFIG
+                (over gRPC when PREFER_GRPC is set)
+            collection_name: Collection (or alias) to operate on. If None, uses
+                QDRANT_CONFIG COLLECTION_NAME
+            dimension: Vector size of the collection. If None, uses EMBEDDING_DIMENSION
+            index_profile: Name of a QDRANT_INDEX_PROFILES entry. If None, uses the
+                profile recorded on the collection, else QDRANT_CONFIG INDEX_PROFILE
+            versioned: Serve collection_name as an alias over versioned physical
+                collections; a missing collection is created as '<name>_v1'
+            embedding: Embedding metadata of the vectors (see embedding_metadata).
+                If None, describes the configured embedding provider and model
+        """
+        self.client = client or create_qdrant_client()
+        self.alias = collection_name or settings.QDRANT_CONFIG.get(
+            "COLLECTION_NAME", self.COLLECTION_NAME
         )
-        self._ensure_collection()
-
-    def _ensure_collection(self):
-        """Ensure the documents collection exists."""
-        collections = self.client.get_collections().collections
-        collection_names = [c.name for c in collections]
-
-        if self.COLLECTION_NAME not in collection_names:
-            self.client.create_collection(
-                collection_name=self.COLLECTION_NAME,
-                vectors_config=VectorParams(
-                    size=settings.EMBEDDING_CONFIG["EMBEDDING_DIMENSION"], distance=Distance.COSINE
-                ),
+        self.dimension = dimension or settings.EMBEDDING_CONFIG["EMBEDDING_DIMENSION"]
+        self.embedding = embedding or embedding_metadata(self.dimension)
+        self.index_profile = get_index_profile(index_profile)
+        self.versioned = versioned
+        self.refresh_interval = settings.QDRANT_CONFIG.get("ALIAS_REFRESH_SECONDS", 5)
+        self.upsert_batch_size = settings.QDRANT_CONFIG.get("UPSERT_BATCH_SIZE", 256)
+        self.upsert_parallel = settings.QDRANT_CONFIG.get("UPSERT_PARALLEL", 4)
+        self.upsert_wait = settings.QDRANT_CONFIG.get("UPSERT_WAIT", False)
+        self._upsert_lock = threading.Lock()
+        self._upsert_stats = {"points": 0, "requests": 0, "seconds": 0.0}
+        self._refresh_lock = threading.Lock()
+        self._refresh_at = time.monotonic() + self.refresh_interval
+        self._build_target = None
+        self.collection_name = self._ensure_collection(explicit_profile=index_profile is not None)
+
+    def _ensure_collection(self, explicit_profile=False):
+        """
+        Ensure the collection exists with the configured vector size and index profile.
+
+        A missing versioned collection is created as '<name>_v1' behind the alias
+        '<name>'. For an existing alias, the newest version whose embeddings match
+        this process's settings is served, so processes still configured for a
+        previous embedding model keep querying the version built for it.
+
+        The index profile recorded on the collection is kept unless a profile is
+        passed explicitly; a collection built with another profile is then updated
+        in place and Qdrant rebuilds the affected indexes in the background.
+
+        Args:
+            explicit_profile: Whether the index profile was passed by the caller
+
+        Returns:
+            str: Physical collection served
+        """
+        if not self.client.collection_exists(self.alias):
+            name = self.alias
+            if self.versioned:
+                name = versioned_name(self.alias, next_version(self.client, self.alias))
+            self.create_collection(name)
+            if self.versioned:
+                switch_alias(self.client, self.alias, name)
+            return name
+
+        name = self._serving_collection()
+        info = self.client.get_collection(name)
+        size = info.config.params.vectors.size
+        if size != self.dimension:
+            raise ValueError(
+                f"Collection '{name}' stores {size}-dim vectors "
+                f"but {self.dimension} dimensions are configured"
+            )
+
+        metadata = info.config.metadata or {}
+        recorded = metadata.get("index_profile")
+        if not explicit_profile and recorded in settings.QDRANT_INDEX_PROFILES:
+            self.index_profile = get_index_profile(recorded)
+        elif not profile_matches(info.config, self.index_profile):
+            profile = self.index_profile
+            self.client.update_collection(
+                collection_name=name,
+                vectors_config={"": VectorParamsDiff(on_disk=profile.get("on_disk", False))},
+                hnsw_config=hnsw_config(profile),
+                quantization_config=quantization_config(profile),
+                metadata={**metadata, "index_profile": profile["name"]},
             )
 
+        self._ensure_payload_indexes(name, info.payload_schema)
+        return name
+
+    def create_collection(self, name, optimizers_config=None):
+        """
+        Create a physical collection with this service's vector size and index profile.
+        The embedding metadata and profile name are recorded on the collection.
+
+        Args:
+            name: Collection name
+            optimizers_config: Optional OptimizersConfigDiff (e.g. to defer indexing
+                during a bulk load)
+        """
+        profile = self.index_profile
+        self.client.create_collection(
+            collection_name=name,
+            vectors_config=VectorParams(
+                size=self.dimension,
+                distance=Distance.COSINE,
+                on_disk=profile.get("on_disk", False),
+            ),
+            hnsw_config=hnsw_config(profile),
+            quantization_config=quantization_config(profile),
+            optimizers_config=optimizers_config,
+            metadata={**self.embedding, "index_profile": profile["name"]},
+        )
+        self._ensure_payload_indexes(name)
+
+    def _ensure_payload_indexes(self, name, existing=None):
+        """
+        Index the filterable payload fields so filtered searches use the index.
+
+        Args:
+            name: Physical collection name
+            existing: Payload schema of the collection (fields already indexed)
+        """
+        for field, schema in FILTERABLE_FIELDS.items():
+            if field not in (existing or {}):
+                self.client.create_payload_index(
+                    collection_name=name, field_name=field, field_schema=schema
+                )
+
+    def _collection_metadata(self, name):
+        """Get the metadata recorded on a collection."""
+        return self.client.get_collection(name).config.metadata or {}
+
+    def _serving_collection(self, aliases=None):
+        """
+        Pick the physical collection to serve for the configured name.
+
+        Args:
+            aliases: Alias mapping from get_aliases(). If None, it is fetched
+
+        Returns:
+            str: Physical collection name
+
+        Raises:
+            ValueError: If no version matches the configured embeddings
+        """
+        aliases = get_aliases(self.client) if aliases is None else aliases
+        target = aliases.get(self.alias)
+        if target is None:
+            # A plain collection, e.g. one created before collections were versioned
+            return self.alias
+        if embedding_matches(self._collection_metadata(target), self.embedding):
+            return target
+
+        building = aliases.get(build_alias(self.alias))
+        for _, name in list_versions(self.client, self.alias):
+            if name != building and embedding_matches(
+                self._collection_metadata(name), self.embedding
+            ):
+                return name
+        served = self._collection_metadata(target)
+        raise ValueError(
+            f"Collection '{target}' stores {served.get('dimension')}-dim "
+            f"{served.get('embedding_model')} vectors but {self.dimension}-dim "
+            f"{self.embedding['embedding_model']} embeddings are configured, and no other "
+            f"version of '{self.alias}' matches"
+        )
+
+    def _refresh(self):
+        """Re-resolve the served collection and the build target from the aliases."""
+        try:
+            aliases = get_aliases(self.client)
+            serving = self._serving_collection(aliases)
+            if serving != self.collection_name:
+                logger.info("Collection '%s' now served from '%s'", self.alias, serving)
+                self.collection_name = serving
+
+            building = aliases.get(build_alias(self.alias))
+            if building is None:
+                self._build_target = None
+            elif self._build_target is None or self._build_target.collection_name != building:
+                metadata = self._collection_metadata(building)
+                profile = metadata.get("index_profile")
+                self._build_target = QdrantService(
+                    client=self.client,
+                    collection_name=building,
+                    dimension=int(metadata.get("dimension", self.dimension)),
+                    index_profile=profile if profile in settings.QDRANT_INDEX_PROFILES else None,
+                    versioned=False,
+                    embedding=embedding_metadata(
+                        int(metadata.get("dimension", self.dimension)),
+                        metadata.get("embedding_provider"),
+                        metadata.get("embedding_model"),
+                    ),
+                )
+        except Exception:
+            logger.warning("Failed to refresh aliases of '%s'", self.alias, exc_info=True)
+        finally:
+            self._refresh_at = time.monotonic() + self.refresh_interval
+
+    def _maybe_refresh(self):
+        """Refresh the aliases in the background once ALIAS_REFRESH_SECONDS have passed."""
+        if not self.versioned or time.monotonic() < self._refresh_at:
+            return
+        if not self._refresh_lock.acquire(blocking=False):
+            return
+
+        def refresh():
+            try:
+                self._refresh()
+            finally:
+                self._refresh_lock.release()
+
+        threading.Thread(target=refresh, daemon=True).start()
+
+    def build_target(self):
+        """
+        Get the collection being built by reindex_collection, if any.
+        The aliases are re-read at most every ALIAS_REFRESH_SECONDS.
+
+        Returns:
+            QdrantService | None: Service for the collection being built, whose
+            ``embedding`` describes the vectors it expects
+        """
+        if self.versioned and time.monotonic() >= self._refresh_at:
+            with self._refresh_lock:
+                if time.monotonic() >= self._refresh_at:
+                    self._refresh()
+        return self._build_target
+
     def upsert_vector(self, document_id, embedding, metadata=None):
         """
         Insert or update a document vector.
 
         Args:
             document_id: UUID of the document
-            embedding: Vector embedding
+            embedding: Vector embedding (float32 ndarray or list of floats)
             metadata: Optional metadata dict
 
         Returns:
             bool: Success status
         """
         try:
-            point = PointStruct(id=str(document_id), vector=embedding, payload=metadata or {})
+            point = PointStruct(
+                id=str(document_id),
+                vector=np.asarray(embedding, dtype=np.float32).tolist(),
+                payload=metadata or {},
+            )
 
-            self.client.upsert(collection_name=self.COLLECTION_NAME, points=[point])
+            self.client.upsert(collection_name=self.collection_name, points=[point])
             return True
         except Exception as e:
             raise Exception(f"Failed to upsert vector: {str(e)}") from e
 
-    def upsert_batch(self, points):
+    def upsert_batch(self, points, batch_size=None, parallel=None, wait=None):
         """
         Insert or update multiple document vectors.
 
+        Points are streamed in requests of batch_size, with up to ``parallel``
+        requests in flight, so a large document never becomes one huge request
+        body. With wait=False the requests return before indexing completes and
+        the final request is sent alone with wait=True once all others are
+        acknowledged; since Qdrant applies updates in order, this single barrier
+        makes every point searchable when the call returns.
+
         Args:
-            points: List of dictionaries with 'id', 'vector', and 'payload'
+            points: Iterable of dictionaries with 'id', 'vector', and 'payload'.
+                Vectors may be float32 ndarray rows or lists of floats.
+            batch_size: Points per request. If None, uses QDRANT_CONFIG UPSERT_BATCH_SIZE
+            parallel: Requests in flight. If None, uses QDRANT_CONFIG UPSERT_PARALLEL
+            wait: Wait for indexing on every request. If None, uses QDRANT_CONFIG
+                UPSERT_WAIT
 
         Returns:
             bool: Success status
         """
+        batch_size = batch_size or self.upsert_batch_size
+        parallel = parallel or self.upsert_parallel
+        wait_each = self.upsert_wait if wait is None else wait
+
+        points = iter(points)
+        batches = iter(lambda: list(itertools.islice(points, batch_size)), [])
+        started = time.monotonic()
+        total = 0
+        requests = 0
+
         try:
-            batch_points = [
-                PointStruct(id=str(p["id"]), vector=p["vector"], payload=p.get("payload", {}))
-                for p in points
-            ]
+            # Hold the last batch back so it can act as the consistency barrier
+            pending = next(batches, None)
+            with ThreadPoolExecutor(max_workers=parallel) as pool:
+                in_flight = set()
+                for batch in batches:
+                    if len(in_flight) >= parallel:
+                        done, in_flight = wait_for(in_flight, return_when=FIRST_COMPLETED)
+                        for future in done:
+                            future.result()
+                    in_flight.add(pool.submit(self._upsert_points, pending, wait_each))
+                    total += len(pending)
+                    requests += 1
+                    pending = batch
+                for future in in_flight:
+                    future.result()
 
-            self.client.upsert(collection_name=self.COLLECTION_NAME, points=batch_points)
+            if pending:
+                self._upsert_points(pending, True)
+                total += len(pending)
+                requests += 1
             return True
         except Exception as e:
             raise Exception(f"Failed to batch upsert vectors: {str(e)}") from e
+        finally:
+            with self._upsert_lock:
+                self._upsert_stats["points"] += total
+                self._upsert_stats["requests"] += requests
+                self._upsert_stats["seconds"] += time.monotonic() - started
+
+    def upsert_stats(self):
+        """
+        Get cumulative bulk upsert throughput.
+
+        Returns:
+            dict: Points and requests sent, seconds spent and points per second
+        """
+        with self._upsert_lock:
+            stats = dict(self._upsert_stats)
+        stats["points_per_second"] = stats["points"] / stats["seconds"] if stats["seconds"] else 0.0
+        return stats
 
-    def search_vectors(self, query_embedding, top_k=5, filters=None):
+    def _upsert_points(self, points, wait):
+        """Send one upsert request as a column-oriented batch."""
+        # One float32 matrix converted once at the wire boundary
+        vectors = as_vector_matrix([p["vector"] for p in points])
+        batch = Batch(
+            ids=[str(p["id"]) for p in points],
+            vectors=vectors.tolist(),
+            payloads=[p.get("payload", {}) for p in points],
+        )
+        self.client.upsert(collection_name=self.collection_name, points=batch, wait=wait)
+
+    def search_vectors(
+        self,
+        query_embedding,
+        top_k=5,
+        filters=None,
+        hnsw_ef=None,
+        rescore=None,
+        oversampling=None,
+        with_payload=True,
+        score_threshold=None,
+        with_vectors=False,
+    ):
         """
         Search for similar vectors.
 
         Args:
-            query_embedding: Query vector
+            query_embedding: Query vector (float32 ndarray or list of floats)
             top_k: Number of results
-            filters: Optional metadata filters
+            filters: Optional filter dict (see apps.vectorstore.filters) or Qdrant Filter
+            hnsw_ef: HNSW candidate list size for this query (default: index profile)
+            rescore: Re-rank quantized candidates with original vectors (default: profile)
+            oversampling: Quantized candidates fetched per result (default: profile)
+            with_payload: True for the full payload, False for none, or a list of
+                payload fields to return
+            score_threshold: Optional minimum similarity score for returned hits
+            with_vectors: Whether to return each hit's stored vector
 
         Returns:
-            list: Search results with scores
+            list: Search results with scores ('vector' included when with_vectors)
         """
+        self._maybe_refresh()
         try:
-            search_result = self.client.search(
-                collection_name=self.COLLECTION_NAME,
-                query_vector=query_embedding,
+            response = self.client.query_points(
+                collection_name=self.collection_name,
+                query=np.asarray(query_embedding, dtype=np.float32),
                 limit=top_k,
-                query_filter=filters,
+                query_filter=build_filter(filters),
+                search_params=search_params(
+                    self.index_profile, hnsw_ef=hnsw_ef, rescore=rescore, oversampling=oversampling
+                ),
+                with_payload=with_payload,
+                with_vectors=with_vectors,
+                score_threshold=score_threshold,
             )
 
-            results = []
-            for hit in search_result:
-                results.append({"id": hit.id, "score": hit.score, "payload": hit.payload})
-
-            return results
+            return [self._hit_dict(hit, with_vectors) for hit in response.points]
         except Exception as e:
             raise Exception(f"Vector search failed: {str(e)}") from e
 
+    def search_vectors_batch(
+        self,
+        embeddings,
+        top_k=5,
+        filters=None,
+        hnsw_ef=None,
+        with_payload=True,
+        score_threshold=None,
+        with_vectors=False,
+    ):
+        """
+        Run several similarity searches in one request.
+
+        Args:
+            embeddings: Query vectors (2-D float32 array or sequence of vectors)
+            top_k: Number of results per query
+            filters: Optional filter applied to every query, or a list with one
+                filter (or None) per query
+            hnsw_ef: HNSW candidate list size (default: index profile)
+            with_payload: True, False, or a list of payload fields to return
+            score_threshold: Optional minimum similarity score for returned hits
+            with_vectors: Whether to return each hit's stored vector
+
+        Returns:
+            list: One list of search results per query, in input order
+        """
+        if len(embeddings) == 0:
+            return []
+
+        self._maybe_refresh()
+        try:
+            vectors = as_vector_matrix(embeddings)
+            if isinstance(filters, list):
+                if len(filters) != len(vectors):
+                    raise ValueError("filters must have one entry per query embedding")
+                query_filters = [build_filter(f) for f in filters]
+            else:
+                query_filters = [build_filter(filters)] * len(vectors)
+
+            params = search_params(self.index_profile, hnsw_ef=hnsw_ef)
+            responses = self.client.query_batch_points(
+                collection_name=self.collection_name,
+                requests=[
+                    QueryRequest(
+                        query=vector.tolist(),
+                        filter=query_filter,
+                        params=params,
+                        limit=top_k,
+                        with_payload=with_payload,
+                        with_vector=with_vectors,
+                        score_threshold=score_threshold,
+                    )
+                    for vector, query_filter in zip(vectors, query_filters, strict=True)
+                ],
+            )
+
+            return [
+                [self._hit_dict(hit, with_vectors) for hit in response.points]
+                for response in responses
+            ]
+        except Exception as e:
+            raise Exception(f"Batch vector search failed: {str(e)}") from e
+
+    @staticmethod
+    def _hit_dict(hit, with_vectors=False):
+        """Convert a scored point into a result dict."""
+        result = {"id": hit.id, "score": hit.score, "payload": hit.payload or {}}
+        if with_vectors:
+            result["vector"] = np.asarray(hit.vector, dtype=np.float32)
+        return result
+
+    def scroll_points(self, limit=256, offset=None, with_payload=True, with_vectors=False):
+        """
+        Read one page of points from the collection.
+
+        Args:
+            limit: Page size
+            offset: Point id to resume from (the next_offset of the previous page)
+            with_payload: Whether to return payloads (or a list of payload fields)
+            with_vectors: Whether to return vectors
+
+        Returns:
+            tuple: (list of dicts with 'id', 'payload' and 'vector', next_offset or None)
+        """
+        try:
+            records, next_offset = self.client.scroll(
+                collection_name=self.collection_name,
+                limit=limit,
+                offset=offset,
+                with_payload=with_payload,
+                with_vectors=with_vectors,
+            )
+            points = [
+                {"id": record.id, "payload": record.payload or {}, "vector": record.vector}
+                for record in records
+            ]
+            return points, next_offset
+        except Exception as e:
+            raise Exception(f"Failed to scroll points: {str(e)}") from e
+
     def delete_vector(self, document_id):
         """
         Delete a document vector.
@@ -112,7 +595,59 @@ class QdrantService:
         """
         try:
             self.client.delete(
-                collection_name=self.COLLECTION_NAME, points_selector=[str(document_id)]
+                collection_name=self.collection_name, points_selector=[str(document_id)]
             )
         except Exception as e:
             raise Exception(f"Failed to delete vector: {str(e)}") from e
+
+    def delete_vectors(self, point_ids):
+        """
+        Delete several points by id in one request.
+
+        Args:
+            point_ids: Iterable of point ids
+        """
+        point_ids = [str(point_id) for point_id in point_ids]
+        if not point_ids:
+            return
+        try:
+            self.client.delete(collection_name=self.collection_name, points_selector=point_ids)
+        except Exception as e:
+            raise Exception(f"Failed to delete vectors: {str(e)}") from e
+
+    def delete_by_filter(self, filters):
+        """
+        Delete every point matching a payload filter.
+
+        Args:
+            filters: Filter dict (see apps.vectorstore.filters), e.g.
+                {"document_id": "...", "chunk_index": {"gte": 12}}
+        """
+        query_filter = build_filter(filters)
+        if query_filter is None:
+            raise ValueError("delete_by_filter requires a non-empty filter")
+        try:
+            self.client.delete(
+                collection_name=self.collection_name,
+                points_selector=FilterSelector(filter=query_filter),
+            )
+        except Exception as e:
+            raise Exception(f"Failed to delete vectors: {str(e)}") from e
+
+
+def get_qdrant_service():
+    """
+    Get the process-wide vector store for VECTOR_BACKEND.
+    The collection check runs once, when the shared instance is first created.
+
+    Returns:
+        QdrantService | LocalVectorStore: Shared vector store ('qdrant' or 'local')
+    """
+    backend = settings.VECTOR_BACKEND
+    if backend == "local":
+        from apps.vectorstore.local_store import LocalVectorStore
+
+        return services.get("qdrant_service", LocalVectorStore)
+    if backend != "qdrant":
+        raise ValueError(f"Unsupported vector backend: {backend}")
+    return services.get("qdrant_service", QdrantService)
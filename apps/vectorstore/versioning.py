@@ -0,0 +1,204 @@
+"""
+Versioned Qdrant collections behind an alias.
+
+The configured collection name (QDRANT_CONFIG COLLECTION_NAME) is an alias that
+points at a physical collection ``<name>_v<N>``. Each version records the
+embedding model, dimension and index profile it was built with in its collection
+metadata. While reindex_collection builds the next version it is reachable
+through a second alias, ``<name>_next``, which DocumentService dual-writes to.
+Switching versions is a single atomic alias update.
+"""
+
+import re
+
+from django.conf import settings
+from qdrant_client.models import (
+    CreateAlias,
+    CreateAliasOperation,
+    DeleteAlias,
+    DeleteAliasOperation,
+)
+
+from apps.core.local_embedder import MODEL_NAME as LOCAL_MODEL_NAME
+
+BUILD_ALIAS_SUFFIX = "_next"
+
+
+def versioned_name(alias, version):
+    """
+    Get the physical collection name of one version of an alias.
+
+    Args:
+        alias: Alias (configured collection name)
+        version: Version number
+
+    Returns:
+        str: '<alias>_v<version>'
+    """
+    return f"{alias}_v{version}"
+
+
+def build_alias(alias):
+    """
+    Get the alias of the collection being built for an alias.
+
+    Args:
+        alias: Alias (configured collection name)
+
+    Returns:
+        str: '<alias>_next'
+    """
+    return f"{alias}{BUILD_ALIAS_SUFFIX}"
+
+
+def get_aliases(client):
+    """
+    Get every alias of the Qdrant instance.
+
+    Args:
+        client: QdrantClient
+
+    Returns:
+        dict: Alias name -> physical collection name
+    """
+    return {a.alias_name: a.collection_name for a in client.get_aliases().aliases}
+
+
+def list_versions(client, alias):
+    """
+    List the physical collections that are versions of an alias.
+
+    Args:
+        client: QdrantClient
+        alias: Alias (configured collection name)
+
+    Returns:
+        list: (version, collection name) tuples, newest first
+    """
+    pattern = re.compile(rf"^{re.escape(alias)}_v(\d+)$")
+    versions = []
+    for collection in client.get_collections().collections:
+        match = pattern.match(collection.name)
+        if match:
+            versions.append((int(match.group(1)), collection.name))
+    return sorted(versions, reverse=True)
+
+
+def next_version(client, alias):
+    """
+    Get the next unused version number of an alias.
+
+    Args:
+        client: QdrantClient
+        alias: Alias (configured collection name)
+
+    Returns:
+        int: Version number for a new physical collection
+    """
+    versions = list_versions(client, alias)
+    return versions[0][0] + 1 if versions else 1
+
+
+def embedding_metadata(dimension, provider=None, model=None):
+    """
+    Describe the embeddings stored in a collection.
+
+    Args:
+        dimension: Vector size
+        provider: Embedding provider. If None, uses EMBEDDING_CONFIG DEFAULT_PROVIDER
+        model: Embedding model. If None, uses the provider's configured model
+
+    Returns:
+        dict: 'embedding_provider', 'embedding_model' and 'dimension'
+    """
+    provider = provider or settings.EMBEDDING_CONFIG["DEFAULT_PROVIDER"]
+    if model is None:
+        model = (
+            LOCAL_MODEL_NAME
+            if provider == "local"
+            else settings.EMBEDDING_CONFIG["EMBEDDING_MODEL"]
+        )
+    return {"embedding_provider": provider, "embedding_model": model, "dimension": dimension}
+
+
+def embedding_matches(metadata, expected):
+    """
+    Check whether a collection's vectors can be queried with the expected embeddings.
+    Collections without recorded embedding metadata are assumed to match.
+
+    Args:
+        metadata: Collection metadata (or None)
+        expected: Dict from embedding_metadata()
+
+    Returns:
+        bool: Whether provider (when recorded), model and dimension match
+    """
+    if not metadata or "embedding_model" not in metadata:
+        return True
+    provider = metadata.get("embedding_provider")
+    return (
+        (provider is None or provider == expected["embedding_provider"])
+        and metadata["embedding_model"] == expected["embedding_model"]
+        and int(metadata.get("dimension", expected["dimension"])) == expected["dimension"]
+    )
+
+
+def switch_alias(client, alias, collection):
+    """
+    Point an alias at a collection and retire its build alias, in one atomic update.
+
+    Args:
+        client: QdrantClient
+        alias: Alias (configured collection name)
+        collection: Physical collection to serve
+    """
+    aliases = get_aliases(client)
+    operations = []
+    if alias in aliases:
+        operations.append(DeleteAliasOperation(delete_alias=DeleteAlias(alias_name=alias)))
+    operations.append(
+        CreateAliasOperation(create_alias=CreateAlias(collection_name=collection, alias_name=alias))
+    )
+    if build_alias(alias) in aliases:
+        operations.append(
+            DeleteAliasOperation(delete_alias=DeleteAlias(alias_name=build_alias(alias)))
+        )
+    client.update_collection_aliases(change_aliases_operations=operations)
+
+
+def start_build(client, alias, collection):
+    """
+    Expose a collection under the build alias so writers dual-write to it.
+
+    Args:
+        client: QdrantClient
+        alias: Alias (configured collection name)
+        collection: Physical collection being built
+    """
+    operations = []
+    if build_alias(alias) in get_aliases(client):
+        operations.append(
+            DeleteAliasOperation(delete_alias=DeleteAlias(alias_name=build_alias(alias)))
+        )
+    operations.append(
+        CreateAliasOperation(
+            create_alias=CreateAlias(collection_name=collection, alias_name=build_alias(alias))
+        )
+    )
+    client.update_collection_aliases(change_aliases_operations=operations)
+
+
+def abort_build(client, alias):
+    """
+    Remove the build alias, stopping dual-writes.
+
+    Args:
+        client: QdrantClient
+        alias: Alias (configured collection name)
+    """
+    if build_alias(alias) in get_aliases(client):
+        client.update_collection_aliases(
+            change_aliases_operations=[
+                DeleteAliasOperation(delete_alias=DeleteAlias(alias_name=build_alias(alias)))
+            ]
+        )
@@ -172,9 +172,25 @@ LLM_CONFIG = {
 }
 
 EMBEDDING_CONFIG = {
+    # "openai", "groq" or "local" (offline feature-hashing embedder, no network calls)
     "DEFAULT_PROVIDER": config("DEFAULT_EMBEDDING_PROVIDER", default="openai"),
     "EMBEDDING_MODEL": config("EMBEDDING_MODEL", default="text-embedding-3-small"),
     "EMBEDDING_DIMENSION": config("EMBEDDING_DIMENSION", default=1536, cast=int),
+    # Two-tier embedding cache (in-process LRU in front of the embedding_cache table)
+    "CACHE_ENABLED": config("EMBEDDING_CACHE_ENABLED", default=True, cast=bool),
+    "CACHE_MEMORY_BYTES": config("EMBEDDING_CACHE_MEMORY_BYTES", default=64 * 1024 * 1024, cast=int),
+    "CACHE_PERSISTENT": config("EMBEDDING_CACHE_PERSISTENT", default=True, cast=bool),
+    # Sub-batching of embed_batch requests (provider limits: 2048 inputs, 300k tokens)
+    "BATCH_MAX_ITEMS": config("EMBEDDING_BATCH_MAX_ITEMS", default=256, cast=int),
+    "BATCH_MAX_TOKENS": config("EMBEDDING_BATCH_MAX_TOKENS", default=100000, cast=int),
+    "BATCH_CONCURRENCY": config("EMBEDDING_BATCH_CONCURRENCY", default=4, cast=int),
+    "BATCH_MAX_RETRIES": config("EMBEDDING_BATCH_MAX_RETRIES", default=5, cast=int),
+    # Initial provider budgets per minute (0 = learn from x-ratelimit-* response headers)
+    "RATE_LIMIT_RPM": config("EMBEDDING_RATE_LIMIT_RPM", default=0, cast=int),
+    "RATE_LIMIT_TPM": config("EMBEDDING_RATE_LIMIT_TPM", default=0, cast=int),
+    # Cross-request micro-batching of single-text embed() calls (0 disables)
+    "COALESCE_WAIT_MS": config("EMBEDDING_COALESCE_WAIT_MS", default=5, cast=float),
+    "COALESCE_MAX_BATCH": config("EMBEDDING_COALESCE_MAX_BATCH", default=64, cast=int),
 }
 
 # Agent settings
@@ -186,6 +202,91 @@ AGENT_CONFIG = {
 QDRANT_CONFIG = {
     "HOST": config("QDRANT_HOST", default="qdrant"),
     "PORT": config("QDRANT_PORT", default=6333, cast=int),
+    # gRPC transport for upserts and searches (protobuf instead of JSON vectors)
+    "GRPC_PORT": config("QDRANT_GRPC_PORT", default=6334, cast=int),
+    "PREFER_GRPC": config("QDRANT_PREFER_GRPC", default=False, cast=bool),
+    # Bulk upserts: points per request, requests in flight, and whether each request
+    # waits for indexing (False = one consistency barrier at the end of upsert_batch)
+    "UPSERT_BATCH_SIZE": config("QDRANT_UPSERT_BATCH_SIZE", default=256, cast=int),
+    "UPSERT_PARALLEL": config("QDRANT_UPSERT_PARALLEL", default=4, cast=int),
+    "UPSERT_WAIT": config("QDRANT_UPSERT_WAIT", default=False, cast=bool),
+    # Alias searched and written by the app, pointing at a versioned collection
+    # (<name>_v<N>) whose vector size is EMBEDDING_DIMENSION; see reindex_collection
+    "COLLECTION_NAME": config("QDRANT_COLLECTION", default="documents"),
+    # One of QDRANT_INDEX_PROFILES, applied when a collection is created; existing
+    # versions keep the profile they were built with
+    "INDEX_PROFILE": config("QDRANT_INDEX_PROFILE", default="balanced"),
+    # Seconds between re-reads of the aliases (version switches and dual-write targets)
+    "ALIAS_REFRESH_SECONDS": config("QDRANT_ALIAS_REFRESH_SECONDS", default=5, cast=int),
+}
+
+# Vector store backend: 'qdrant' or 'local' (in-process NumPy store, no server needed)
+VECTOR_BACKEND = config("VECTOR_BACKEND", default="qdrant")
+
+LOCAL_VECTOR_STORE = {
+    # Directory holding one sub-directory per collection (empty = in memory only)
+    "PATH": config("LOCAL_VECTOR_STORE_PATH", default=str(BASE_DIR / "vector_store")),
+    # Seconds between background saves of new writes (also saved at exit)
+    "PERSIST_INTERVAL": config("LOCAL_VECTOR_STORE_PERSIST_INTERVAL", default=30, cast=float),
+}
+
+# HNSW/quantization profiles for the vector collection
+QDRANT_INDEX_PROFILES = {
+    # Full float32 vectors in RAM, default graph
+    "balanced": {
+        "hnsw": {"m": 16, "ef_construct": 100},
+        "on_disk": False,
+        "quantization": None,
+        "search": {"hnsw_ef": 128},
+    },
+    # int8 copies in RAM (4x smaller), float32 originals on disk for rescoring
+    "low_memory": {
+        "hnsw": {"m": 16, "ef_construct": 100},
+        "on_disk": True,
+        "quantization": {"type": "scalar", "quantile": 0.99, "always_ram": True},
+        "search": {"hnsw_ef": 128, "rescore": True, "oversampling": 2.0},
+    },
+    # 1-bit copies in RAM (32x smaller), oversampled and rescored with the originals
+    "fast": {
+        "hnsw": {"m": 32, "ef_construct": 200},
+        "on_disk": False,
+        "quantization": {"type": "binary", "always_ram": True},
+        "search": {"hnsw_ef": 64, "rescore": True, "oversampling": 3.0},
+    },
+}
+
+# Provider quota shared by every process through Redis (one OpenAI key, many workers)
+PROVIDER_QUOTA = {
+    "ENABLED": config("PROVIDER_QUOTA_ENABLED", default=False, cast=bool),
+    "REDIS_URL": config(
+        "PROVIDER_QUOTA_REDIS_URL",
+        default=f"redis://{config('REDIS_HOST', default='redis')}:"
+        f"{config('REDIS_PORT', default=6379, cast=int)}/1",
+    ),
+    "NAME": config("PROVIDER_QUOTA_NAME", default="openai"),
+    "REQUESTS_PER_MINUTE": config("PROVIDER_QUOTA_RPM", default=3000, cast=int),
+    "TOKENS_PER_MINUTE": config("PROVIDER_QUOTA_TPM", default=1000000, cast=int),
+    "MAX_CONCURRENCY": config("PROVIDER_QUOTA_MAX_CONCURRENCY", default=16, cast=int),
+    # Share of tokens and slots bulk ingestion must leave free for interactive traffic
+    "BULK_RESERVE": config("PROVIDER_QUOTA_BULK_RESERVE", default=0.2, cast=float),
+    # Seconds an interactive call waits for quota before failing (bulk waits indefinitely)
+    "INTERACTIVE_TIMEOUT": config("PROVIDER_QUOTA_INTERACTIVE_TIMEOUT", default=30, cast=float),
+    # Completion tokens reserved per chat call on top of the prompt estimate
+    "CHAT_OUTPUT_TOKENS": config("PROVIDER_QUOTA_CHAT_OUTPUT_TOKENS", default=1024, cast=int),
+}
+
+# Document ingestion (PDF extraction, chunking and embedding)
+INGESTION_CONFIG = {
+    # Chunks embedded and upserted together; bounds the chunks and vectors held in memory
+    "WINDOW_SIZE": config("INGEST_WINDOW_SIZE", default=256, cast=int),
+    # Windows buffered between consecutive pipeline stages; a full queue blocks the
+    # stage before it (backpressure)
+    "QUEUE_SIZE": config("INGEST_QUEUE_SIZE", default=4, cast=int),
+    # Concurrent embed_batch calls and vector store writers per document
+    "EMBED_WORKERS": config("INGEST_EMBED_WORKERS", default=2, cast=int),
+    "UPSERT_WORKERS": config("INGEST_UPSERT_WORKERS", default=2, cast=int),
+    # Minutes without a checkpoint after which a running ingestion job is reported stuck
+    "STALE_JOB_MINUTES": config("INGEST_STALE_JOB_MINUTES", default=15, cast=int),
 }
 
 # Serper API settings (for web search)
@@ -0,0 +1,567 @@
+import base64
+import contextlib
+import itertools
+import threading
+import time
+from unittest.mock import Mock
+
+import numpy as np
+import openai
+import pytest
+import redis
+
+from apps.core.batching import split_batches
+from apps.core.coalescer import EmbeddingCoalescer
+from apps.core.embedding_cache import (
+    EmbeddingCache,
+    LRUByteCache,
+    make_cache_key,
+    pack_vector,
+)
+from apps.core.local_embedder import LocalEmbedder
+from apps.core.pipeline import Pipeline, PipelineStats, Stage
+from apps.core.quota import BULK, QuotaTimeout, RedisQuota, get_provider_quota
+from apps.core.rate_limit import AdaptiveRateLimiter, parse_duration, retry_after_seconds
+from apps.core.services import EmbeddingService
+
+
+def fake_embeddings_client(dimension=4):
+    """Build a mock OpenAI client that embeds text as [len(text), 0, 0, ...]."""
+
+    def create(model, input, encoding_format="float", **kwargs):
+        texts = [input] if isinstance(input, str) else input
+        data = []
+        for text in texts:
+            vector = np.zeros(dimension, dtype=np.float32)
+            vector[0] = len(text)
+            if encoding_format == "base64":
+                data.append(Mock(embedding=base64.b64encode(vector.tobytes()).decode()))
+            else:
+                data.append(Mock(embedding=vector.tolist()))
+        return Mock(data=data)
+
+    def create_with_headers(**kwargs):
+        response = client.embeddings.create(**kwargs)
+        return Mock(headers={"x-ratelimit-limit-requests": "3000"}, parse=lambda: response)
+
+    client = Mock()
+    client.embeddings.create = Mock(side_effect=create)
+    client.embeddings.with_raw_response.create = Mock(side_effect=create_with_headers)
+    return client
+
+
+@pytest.fixture
+def embedding_service(settings):
+    """EmbeddingService with a mocked provider and an in-memory cache."""
+    settings.LLM_CONFIG = {**settings.LLM_CONFIG, "OPENAI_API_KEY": "test-key"}
+    settings.EMBEDDING_CONFIG = {**settings.EMBEDDING_CONFIG, "COALESCE_WAIT_MS": 0}
+    service = EmbeddingService(
+        provider="openai", cache=EmbeddingCache(max_bytes=1024 * 1024, persistent=False)
+    )
+    service.client = fake_embeddings_client()
+    return service
+
+
+class TestEmbeddingCacheKeys:
+    """Test cache key derivation."""
+
+    def test_key_ignores_surrounding_whitespace(self):
+        assert make_cache_key("m", 4, "hello") == make_cache_key("m", 4, "  hello\n")
+
+    def test_key_depends_on_model_and_dimension(self):
+        key = make_cache_key("m", 4, "hello")
+        assert key != make_cache_key("other", 4, "hello")
+        assert key != make_cache_key("m", 8, "hello")
+
+
+class TestLRUByteCache:
+    """Test the byte-budgeted LRU tier."""
+
+    def test_evicts_least_recently_used_over_budget(self):
+        entry = pack_vector([0.0] * 16)
+        cache = LRUByteCache(max_bytes=3 * (len(entry) + 200))
+        for key in ("a", "b", "c"):
+            cache.set(key, entry)
+
+        cache.get("a")
+        cache.set("d", entry)
+
+        assert cache.get("b") is None
+        assert cache.get("a") == entry
+        assert len(cache) == 3
+
+
+class TestEmbeddingServiceCache:
+    """Test that EmbeddingService only sends cache misses to the provider."""
+
+    def test_batch_sends_only_misses(self, embedding_service):
+        embedding_service.embed_batch(["one", "three"])
+        embedding_service.client.embeddings.create.reset_mock()
+
+        vectors = embedding_service.embed_batch(["one", "fifteen", "three", "fifteen"])
+
+        call = embedding_service.client.embeddings.create.call_args
+        assert call.kwargs["encoding_format"] == "base64"
+        assert call.kwargs["input"] == ["fifteen"]
+        assert [v[0] for v in vectors] == [3.0, 7.0, 5.0, 7.0]
+
+    def test_returns_float32_arrays(self, embedding_service):
+        vectors = embedding_service.embed_batch(["one", "three"])
+        cached = embedding_service.embed_batch(["one", "three"])
+
+        assert vectors.dtype == np.float32
+        assert vectors.shape == (2, 4)
+        assert vectors.flags["C_CONTIGUOUS"]
+        assert np.array_equal(vectors, cached)
+        assert embedding_service.embed("one").dtype == np.float32
+        assert isinstance(
+            embedding_service.cache.memory.get(
+                make_cache_key(embedding_service.model, embedding_service.dimension, "one")
+            ),
+            bytes,
+        )
+
+    def test_requests_configured_dimension(self, embedding_service):
+        embedding_service.dimension = 512
+        embedding_service.embed_batch(["short"])
+
+        call = embedding_service.client.embeddings.create.call_args
+        assert call.kwargs["dimensions"] == 512
+
+    def test_embed_hits_cache(self, embedding_service):
+        embedding_service.embed("question")
+        embedding_service.embed("question")
+
+        assert embedding_service.client.embeddings.create.call_count == 1
+        stats = embedding_service.cache_stats()
+        assert stats["memory_hits"] == 1
+        assert stats["misses"] == 1
+        assert stats["hit_rate"] == 0.5
+
+
+class TestSubBatching:
+    """Test token-aware sub-batching in embed_batch."""
+
+    def test_split_batches_respects_items_and_tokens(self):
+        texts = ["a" * 40] * 5 + ["b" * 400]
+        batches = split_batches(texts, max_items=2, max_tokens=50)
+
+        assert batches == [[0, 1], [2, 3], [4], [5]]
+
+    def test_batches_reassembled_in_order(self, embedding_service):
+        embedding_service.batch_max_items = 2
+        texts = [f"text {'x' * i}" for i in range(7)]
+
+        vectors = embedding_service.embed_batch(texts)
+
+        assert embedding_service.client.embeddings.create.call_count == 4
+        assert [v[0] for v in vectors] == [float(len(t)) for t in texts]
+
+    def test_failed_batch_retried_alone(self, embedding_service):
+        embedding_service.batch_max_items = 1
+        embedding_service.retry_base_delay = 0
+        create = embedding_service.client.embeddings.create.side_effect
+        failures = {"flaky": 1}
+
+        def flaky_create(model, input, **kwargs):
+            if input[0] in failures and failures[input[0]]:
+                failures[input[0]] -= 1
+                raise openai.APIConnectionError(request=Mock())
+            return create(model=model, input=input, **kwargs)
+
+        embedding_service.client.embeddings.create.side_effect = flaky_create
+
+        embedding_service.embed_batch(["stable", "flaky", "steady"])
+
+        sent = [
+            c.kwargs["input"] for c in embedding_service.client.embeddings.create.call_args_list
+        ]
+        assert sorted(sent) == [["flaky"], ["flaky"], ["stable"], ["steady"]]
+
+
+class TestEmbeddingCoalescer:
+    """Test cross-request micro-batching of single-text embeddings."""
+
+    def test_concurrent_requests_share_one_call(self):
+        batch_fn = Mock(side_effect=lambda texts: [[float(len(t))] for t in texts])
+        coalescer = EmbeddingCoalescer(batch_fn, max_wait_ms=100, max_batch_size=64)
+        texts = ["x" * i for i in range(1, 9)]
+        results = {}
+
+        def worker(text):
+            results[text] = coalescer.submit(text)
+
+        threads = [threading.Thread(target=worker, args=(t,)) for t in texts]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        assert batch_fn.call_count < len(texts)
+        assert all(results[t] == [float(len(t))] for t in texts)
+        assert coalescer.stats()["requests"] == len(texts)
+
+    def test_full_batch_flushes_immediately(self):
+        batch_fn = Mock(side_effect=lambda texts: [[0.0] for _ in texts])
+        coalescer = EmbeddingCoalescer(batch_fn, max_wait_ms=10_000, max_batch_size=1)
+
+        assert coalescer.submit("now") == [0.0]
+        batch_fn.assert_called_once_with(["now"])
+
+    def test_errors_propagate_to_every_caller(self, embedding_service):
+        embedding_service.client.embeddings.create.side_effect = ValueError("boom")
+        embedding_service.coalescer = EmbeddingCoalescer(
+            embedding_service._embed_cached, max_wait_ms=1
+        )
+
+        with pytest.raises(Exception, match="boom"):
+            embedding_service.embed("question")
+
+    def test_services_with_same_model_use_their_own_client(self, settings):
+        settings.LLM_CONFIG = {**settings.LLM_CONFIG, "OPENAI_API_KEY": "test-key"}
+        settings.EMBEDDING_CONFIG = {**settings.EMBEDDING_CONFIG, "COALESCE_WAIT_MS": 1}
+        first, second = (
+            EmbeddingService(
+                provider="openai", cache=EmbeddingCache(max_bytes=1024 * 1024, persistent=False)
+            )
+            for _ in range(2)
+        )
+        first.client = fake_embeddings_client()
+        second.client = fake_embeddings_client()
+
+        first.embed("question")
+        second.embed("another question")
+
+        assert first.coalescer is not second.coalescer
+        assert second.client.embeddings.with_raw_response.create.called
+        assert second.cache.get_many(
+            [make_cache_key(second.model, second.dimension, "another question")]
+        )
+
+
+class TestLocalProvider:
+    """Test the offline local embedding provider."""
+
+    @pytest.fixture
+    def local_service(self, settings):
+        settings.EMBEDDING_CONFIG = {**settings.EMBEDDING_CONFIG, "EMBEDDING_DIMENSION": 256}
+        return EmbeddingService(provider="local")
+
+    def test_deterministic_and_normalized(self, local_service):
+        first = np.array(local_service.embed("Apple reported record revenue"))
+        second = np.array(EmbeddingService(provider="local").embed("Apple reported record revenue"))
+
+        assert first.shape == (256,)
+        assert np.allclose(first, second)
+        assert np.isclose(np.linalg.norm(first), 1.0, atol=1e-5)
+
+    def test_related_texts_score_higher(self, local_service):
+        query, related, unrelated = np.array(
+            local_service.embed_batch(
+                [
+                    "iphone revenue growth in fiscal 2023",
+                    "fiscal 2023 iphone revenue grew strongly",
+                    "the weather in paris is mild in spring",
+                ]
+            )
+        )
+
+        assert query @ related > query @ unrelated
+
+    def test_projection_signs_are_independent(self):
+        # One feature per text: each row holds that feature's projections
+        rows = LocalEmbedder(4096).embed([f"word{i}" for i in range(400)])
+
+        positive = [(row > 0).sum() for row in rows if (row != 0).sum() == 4]
+        # Correlated signs would give every feature the same split (e.g. three to one);
+        # independent ones give 1 in 16 rows all positive and 6 in 16 split two and two
+        assert 0 in positive or 4 in positive
+        assert positive.count(2) / len(positive) > 0.25
+
+    def test_no_cache_or_network(self, local_service):
+        assert local_service.cache is None
+        assert local_service.coalescer is None
+        assert not np.allclose(
+            local_service.embed_batch(["one", "two"])[0], local_service.embed("two")
+        )
+
+
+class TestRateLimiting:
+    """Test adaptive rate limiting of provider calls."""
+
+    def test_parse_reset_durations(self):
+        assert parse_duration("6m0s") == 360
+        assert parse_duration("20ms") == pytest.approx(0.02)
+        assert retry_after_seconds({"retry-after": "2"}) == 2
+        assert retry_after_seconds({"retry-after-ms": "250"}) == 0.25
+
+    def test_rate_limit_retried_and_learned(self, embedding_service):
+        embedding_service.retry_base_delay = 0
+        embedding_service.rate_limiter = AdaptiveRateLimiter(max_concurrency=4)
+        create = embedding_service.client.embeddings.create.side_effect
+        calls = {"count": 0}
+
+        def throttled_once(**kwargs):
+            calls["count"] += 1
+            if calls["count"] == 1:
+                response = Mock(status_code=429, headers={"retry-after": "0"})
+                raise openai.RateLimitError("slow down", response=response, body=None)
+            return create(**kwargs)
+
+        embedding_service.client.embeddings.create.side_effect = throttled_once
+
+        vectors = embedding_service.embed_batch(["again"])
+
+        assert vectors[0][0] == 5.0
+        stats = embedding_service.rate_limiter.stats()
+        assert stats["throttled"] == 1
+        assert stats["concurrency"] == 2
+        assert stats["requests_per_minute"] == 3000
+
+    def test_server_errors_do_not_grow_window(self, embedding_service):
+        embedding_service.retry_base_delay = 0
+        embedding_service.rate_limiter = AdaptiveRateLimiter(max_concurrency=4)
+        embedding_service.rate_limiter.concurrency = 1
+        create = embedding_service.client.embeddings.create.side_effect
+        calls = {"count": 0}
+
+        def failing_twice(**kwargs):
+            calls["count"] += 1
+            if calls["count"] <= 2:
+                raise openai.APITimeoutError(request=Mock())
+            return create(**kwargs)
+
+        embedding_service.client.embeddings.create.side_effect = failing_twice
+
+        embedding_service.embed_batch(["again"])
+
+        stats = embedding_service.rate_limiter.stats()
+        assert stats["failed"] == 2
+        # Only the final success counts towards widening the window
+        assert stats["concurrency"] == 2
+
+    def test_openai_client_leaves_retries_to_limiter(self, settings):
+        settings.LLM_CONFIG = {**settings.LLM_CONFIG, "OPENAI_API_KEY": "test-key"}
+
+        assert EmbeddingService(provider="openai").client.max_retries == 0
+
+    def test_local_limiter_admits_before_quota_slot(self, embedding_service, monkeypatch):
+        events = []
+        limiter = Mock()
+        limiter.acquire.side_effect = lambda tokens: events.append("limiter acquired")
+        limiter.release.side_effect = lambda **kwargs: events.append("limiter released")
+        embedding_service.rate_limiter = limiter
+
+        @contextlib.contextmanager
+        def slot(provider, tokens, priority):
+            events.append("slot acquired")
+            yield
+            events.append("slot released")
+
+        monkeypatch.setattr("apps.core.services.provider_slot", slot)
+
+        embedding_service.embed_batch(["ordered"])
+
+        assert events == ["limiter acquired", "slot acquired", "slot released", "limiter released"]
+
+    def test_quota_timeout_is_not_a_success(self, embedding_service, monkeypatch):
+        embedding_service.rate_limiter = Mock()
+
+        @contextlib.contextmanager
+        def slot(provider, tokens, priority):
+            raise QuotaTimeout("busy")
+            yield
+
+        monkeypatch.setattr("apps.core.services.provider_slot", slot)
+
+        with pytest.raises(Exception, match="busy"):
+            embedding_service.embed_batch(["late"])
+        embedding_service.rate_limiter.release.assert_called_once_with(failed=True)
+
+    def test_token_budget_blocks_until_refilled(self):
+        limiter = AdaptiveRateLimiter(max_concurrency=2, tokens_per_minute=600)
+        limiter.acquire(tokens=595)
+        limiter.release()
+
+        started = time.monotonic()
+        limiter.acquire(tokens=10)
+
+        # 5 missing tokens at 10 tokens/second
+        assert time.monotonic() - started >= 0.4
+
+
+def fake_redis(waits):
+    """Build a mock Redis client whose acquire script returns the given waits (ms) in turn."""
+    client = Mock()
+    client.time.return_value = (1000, 0)
+    client.register_script.return_value = Mock(side_effect=list(waits))
+    return client
+
+
+class TestProviderQuota:
+    """Tests for the Redis-backed provider quota (Redis itself is mocked)."""
+
+    def test_disabled_by_default(self, settings):
+        settings.PROVIDER_QUOTA = {**settings.PROVIDER_QUOTA, "ENABLED": False}
+        assert get_provider_quota() is None
+
+    def test_acquire_retries_until_admitted(self):
+        client = fake_redis([1, 1, 0])
+        quota = RedisQuota(client)
+
+        with quota.slot(tokens=10, priority=BULK):
+            pass
+
+        assert client.register_script.return_value.call_count == 3
+        # Bulk callers never register as interactive waiters
+        client.zadd.assert_not_called()
+        client.zrem.assert_called_once()
+
+    def test_interactive_waiter_is_cleared(self):
+        client = fake_redis([1, 0])
+        quota = RedisQuota(client)
+
+        holder = quota.acquire(tokens=10)
+
+        assert client.zadd.call_args[0][0] == quota.waiters_key
+        client.zrem.assert_called_once_with(quota.waiters_key, holder)
+
+    def test_admitted_interactive_call_does_not_hold_back_bulk(self):
+        client = fake_redis([0])
+
+        RedisQuota(client).acquire(tokens=10)
+
+        client.zadd.assert_not_called()
+
+    def test_timeout(self):
+        quota = RedisQuota(fake_redis([5000]))
+        with pytest.raises(QuotaTimeout):
+            quota.acquire(tokens=10, timeout=0.1)
+
+    def test_fails_open_when_redis_unreachable(self):
+        client = fake_redis([])
+        client.time.side_effect = redis.ConnectionError("refused")
+        quota = RedisQuota(client)
+
+        with quota.slot(tokens=10):
+            pass
+
+        assert quota.acquire(tokens=10) is None
+
+    def test_unknown_priority(self):
+        with pytest.raises(ValueError):
+            RedisQuota(fake_redis([])).acquire(priority="urgent")
+
+
+class TestPipeline:
+    """Test the bounded-queue stage pipeline."""
+
+    def test_stages_transform_and_flush_in_order(self):
+        buffered = []
+
+        def pair(item):
+            buffered.append(item)
+            if len(buffered) == 2:
+                batch = list(buffered)
+                buffered.clear()
+                return [batch]
+
+        results = []
+        pipeline = Pipeline(
+            range(5),
+            [
+                Stage("pair", pair, flush=lambda: [list(buffered)] if buffered else []),
+                Stage("sum", lambda batch: [sum(batch)]),
+                Stage("collect", results.append),
+            ],
+        )
+
+        stats = pipeline.run()
+
+        assert results == [1, 5, 4]
+        assert [stats[name]["items"] for name in ("source", "pair", "sum", "collect")] == [
+            5,
+            5,
+            3,
+            3,
+        ]
+
+    def test_bounded_queues_apply_backpressure(self):
+        def slow(item):
+            time.sleep(0.005)
+
+        stats = Pipeline(range(50), [Stage("slow", slow, queue_size=3)]).run()
+
+        assert stats["slow"]["items"] == 50
+        assert 1 <= stats["slow"]["max_queue"] <= 3
+        assert stats["slow"]["utilization"] > stats["source"]["utilization"]
+
+    def test_first_error_aborts_pipeline(self):
+        def fail(item):
+            if item == 3:
+                raise RuntimeError("bad item")
+            return [item]
+
+        seen = []
+        pipeline = Pipeline(
+            itertools.count(), [Stage("fail", fail, workers=2), Stage("sink", seen.append)]
+        )
+
+        with pytest.raises(RuntimeError, match="bad item"):
+            pipeline.run()
+        assert 3 not in seen
+
+    def test_later_stages_finish_items_before_failure(self):
+        def source():
+            yield from range(5)
+            raise RuntimeError("extraction failed")
+
+        seen = []
+        flushed = []
+        pipeline = Pipeline(
+            source(),
+            [
+                Stage("double", lambda x: [2 * x], workers=2),
+                Stage("sink", seen.append, flush=lambda: flushed.append(True)),
+            ],
+        )
+
+        with pytest.raises(RuntimeError, match="extraction failed"):
+            pipeline.run()
+        assert sorted(seen) == [0, 2, 4, 6, 8]
+        assert flushed == []
+
+    def test_failed_stage_hands_on_items_already_in_progress(self):
+        def work(item):
+            if item == 1:
+                raise RuntimeError("bad item")
+            # Still running when the other worker's failure halts the stage
+            while not pipeline._halted(0):
+                time.sleep(0.01)
+            return [item]
+
+        seen = []
+        pipeline = Pipeline([0, 1], [Stage("work", work, workers=2), Stage("sink", seen.append)])
+
+        with pytest.raises(RuntimeError, match="bad item"):
+            pipeline.run()
+        assert seen == [0]
+
+    def test_on_exit_runs_on_every_worker(self):
+        exits = []
+        stage = Stage("double", lambda x: [2 * x], workers=3, on_exit=lambda: exits.append(1))
+
+        Pipeline(range(10), [stage]).run()
+
+        assert len(exits) == 3
+
+    def test_flush_requires_single_worker(self):
+        with pytest.raises(ValueError):
+            Stage("chunk", list, workers=2, flush=list)
+
+    def test_stats_accumulate_over_runs(self):
+        total = PipelineStats()
+        for _ in range(2):
+            total.add(Pipeline(range(4), [Stage("double", lambda x: [2 * x])]).run())
+
+        assert total.snapshot()["double"]["items"] == 8
@@ -0,0 +1,748 @@
+import hashlib
+import io
+import os
+import time
+from unittest.mock import Mock
+
+import numpy as np
+import pytest
+from qdrant_client import QdrantClient
+
+from apps.knowledgebase.bundle import BundleReader, BundleWriter
+from apps.knowledgebase.extraction import page_ranges
+from apps.knowledgebase.manifest import (
+    HASH_BLOCK_SIZE,
+    file_sha256,
+    file_signature,
+    is_unchanged,
+    manifest_path,
+)
+from apps.knowledgebase.models import Document, IngestionJob
+from apps.knowledgebase.services import DocumentService, chunk_point_id, chunk_text, iter_chunks
+from apps.rag.services.vector_search_service import VectorSearchService
+from apps.vectorstore.filters import build_filter
+from apps.vectorstore.index_profiles import get_index_profile, quantization_config, search_params
+from apps.vectorstore.local_store import INITIAL_CAPACITY, LocalVectorStore
+from apps.vectorstore.management.commands.reindex_collection import Command as ReindexCommand
+from apps.vectorstore.services import QdrantService, create_qdrant_client, get_qdrant_service
+from apps.vectorstore.versioning import (
+    embedding_matches,
+    embedding_metadata,
+    get_aliases,
+    start_build,
+    switch_alias,
+    versioned_name,
+)
+
+
+@pytest.fixture
+def qdrant_service(settings):
+    """QdrantService backed by an in-memory Qdrant client."""
+    settings.EMBEDDING_CONFIG = {**settings.EMBEDDING_CONFIG, "EMBEDDING_DIMENSION": 4}
+    return QdrantService(client=QdrantClient(":memory:"))
+
+
+class TestQdrantService:
+    """Test QdrantService against in-memory Qdrant."""
+
+    def test_upsert_batch_accepts_ndarray_rows(self, qdrant_service):
+        vectors = np.eye(4, dtype=np.float32)
+        points = [
+            {"id": f"00000000-0000-0000-0000-00000000000{i}", "vector": v, "payload": {"i": i}}
+            for i, v in enumerate(vectors)
+        ]
+
+        assert qdrant_service.upsert_batch(points)
+
+        results = qdrant_service.search_vectors(vectors[2], top_k=1)
+        assert results[0]["payload"] == {"i": 2}
+        assert results[0]["score"] == pytest.approx(1.0)
+
+    def test_upsert_vector_accepts_list(self, qdrant_service):
+        doc_id = "00000000-0000-0000-0000-000000000009"
+        qdrant_service.upsert_vector(doc_id, [0.0, 1.0, 0.0, 0.0], {"title": "t"})
+
+        results = qdrant_service.search_vectors(np.array([0, 1, 0, 0], dtype=np.float32))
+        assert results[0]["id"] == doc_id
+
+    def test_rejects_dimension_mismatch(self, qdrant_service):
+        with pytest.raises(ValueError, match="4-dim"):
+            QdrantService(client=qdrant_service.client, dimension=8)
+
+    def test_upsert_batch_streams_in_chunks(self, qdrant_service):
+        vectors = np.eye(4, dtype=np.float32)
+        points = (
+            {"id": f"00000000-0000-0000-0000-00000000000{i}", "vector": vectors[i % 4]}
+            for i in range(7)
+        )
+
+        assert qdrant_service.upsert_batch(points, batch_size=2, parallel=2)
+
+        assert qdrant_service.client.count(qdrant_service.collection_name).count == 7
+        stats = qdrant_service.upsert_stats()
+        assert stats["points"] == 7
+        assert stats["requests"] == 4
+
+    def test_upsert_batch_single_barrier(self, qdrant_service):
+        qdrant_service.client = Mock()
+        points = [{"id": i, "vector": [0.0, 0.0, 0.0, 1.0]} for i in range(5)]
+
+        qdrant_service.upsert_batch(points, batch_size=2, wait=False)
+
+        waits = [call.kwargs["wait"] for call in qdrant_service.client.upsert.call_args_list]
+        assert sorted(waits) == [False, False, True]
+        # The waiting request is sent after all others were acknowledged
+        assert waits[-1] is True
+
+    def test_search_accepts_per_query_params(self, qdrant_service):
+        qdrant_service.upsert_vector("00000000-0000-0000-0000-000000000001", [1.0, 0, 0, 0])
+
+        results = qdrant_service.search_vectors([1.0, 0, 0, 0], top_k=1, hnsw_ef=256, rescore=False)
+
+        assert len(results) == 1
+
+    def test_search_with_filter_dsl(self, qdrant_service):
+        vectors = np.eye(4, dtype=np.float32)
+        qdrant_service.upsert_batch(
+            [
+                {
+                    "id": f"00000000-0000-0000-0000-00000000000{i}",
+                    "vector": vectors[0],
+                    "payload": {"category": "a" if i % 2 else "b", "chunk_index": i},
+                }
+                for i in range(6)
+            ]
+        )
+
+        results = qdrant_service.search_vectors(
+            vectors[0], top_k=10, filters={"category": "a", "chunk_index": {"gte": 3}}
+        )
+
+        assert sorted(hit["payload"]["chunk_index"] for hit in results) == [3, 5]
+
+
+class TestFilterDSL:
+    """Test translation of filter dicts into Qdrant filters."""
+
+    def test_eq_in_and_range(self):
+        query_filter = build_filter(
+            {"category": "apple_business", "type": ["a", "b"], "chunk_index": {"lt": "10"}}
+        )
+
+        eq, any_of, in_range = query_filter.must
+        assert eq.match.value == "apple_business"
+        assert any_of.match.any == ["a", "b"]
+        assert in_range.range.lt == 10
+
+    def test_empty_filters(self):
+        assert build_filter(None) is None
+        assert build_filter({}) is None
+
+    @pytest.mark.parametrize(
+        "filters",
+        [
+            {"title": "x"},
+            {"category": {"like": "x"}},
+            {"category": {"gte": "a"}},
+            {"chunk_index": {"eq": 1, "gte": 0}},
+            {"chunk_index": "first"},
+        ],
+    )
+    def test_rejects_invalid_filters(self, filters):
+        with pytest.raises(ValueError):
+            build_filter(filters)
+
+    def test_search_vectors_batch_keeps_query_order(self, qdrant_service):
+        vectors = np.eye(4, dtype=np.float32)
+        qdrant_service.upsert_batch(
+            [
+                {"id": f"00000000-0000-0000-0000-00000000000{i}", "vector": v, "payload": {"i": i}}
+                for i, v in enumerate(vectors)
+            ]
+        )
+
+        results = qdrant_service.search_vectors_batch(vectors[[3, 0, 2]], top_k=1)
+
+        assert [hits[0]["payload"]["i"] for hits in results] == [3, 0, 2]
+        assert qdrant_service.search_vectors_batch([], top_k=1) == []
+
+    def test_search_vectors_batch_per_query_filters(self, qdrant_service):
+        qdrant_service.upsert_batch(
+            [
+                {
+                    "id": f"00000000-0000-0000-0000-00000000000{i}",
+                    "vector": [1.0, 0, 0, 0],
+                    "payload": {"chunk_index": i},
+                }
+                for i in range(3)
+            ]
+        )
+        queries = np.ones((2, 4), dtype=np.float32)
+
+        results = qdrant_service.search_vectors_batch(
+            queries, top_k=5, filters=[{"chunk_index": 1}, None]
+        )
+
+        assert [hit["payload"]["chunk_index"] for hit in results[0]] == [1]
+        assert len(results[1]) == 3
+
+    def test_search_projection_threshold_and_vectors(self, qdrant_service):
+        vectors = np.eye(4, dtype=np.float32)
+        qdrant_service.upsert_batch(
+            [
+                {
+                    "id": f"00000000-0000-0000-0000-00000000000{i}",
+                    "vector": v,
+                    "payload": {"document_id": str(i), "content": "x" * 1000},
+                }
+                for i, v in enumerate(vectors)
+            ]
+        )
+
+        results = qdrant_service.search_vectors(
+            vectors[1],
+            top_k=4,
+            with_payload=["document_id"],
+            score_threshold=0.5,
+            with_vectors=True,
+        )
+
+        assert len(results) == 1
+        assert results[0]["payload"] == {"document_id": "1"}
+        assert np.allclose(results[0]["vector"], vectors[1])
+
+        bare = qdrant_service.search_vectors(vectors[1], top_k=1, with_payload=False)
+        assert bare[0]["payload"] == {}
+
+
+class TestIndexProfiles:
+    """Test HNSW/quantization profile handling."""
+
+    def test_low_memory_profile(self):
+        profile = get_index_profile("low_memory")
+
+        assert profile["on_disk"] is True
+        assert quantization_config(profile).scalar.always_ram is True
+        params = search_params(profile, hnsw_ef=32)
+        assert params.hnsw_ef == 32
+        assert params.quantization.rescore is True
+        assert params.quantization.oversampling == 2.0
+
+    def test_balanced_profile_has_no_quantization(self):
+        profile = get_index_profile("balanced")
+
+        assert search_params(profile).quantization is None
+
+    def test_unknown_profile(self):
+        with pytest.raises(ValueError):
+            get_index_profile("turbo")
+
+    def test_existing_collection_updated_to_profile(self, qdrant_service):
+        client = qdrant_service.client
+        client.update_collection = Mock()
+
+        QdrantService(client=client, index_profile="fast")
+
+        kwargs = client.update_collection.call_args.kwargs
+        assert kwargs["hnsw_config"].m == 32
+        assert kwargs["quantization_config"].binary is not None
+
+
+class TestQdrantClientTransport:
+    """Test transport selection from QDRANT_CONFIG."""
+
+    def test_prefer_grpc_setting(self, settings):
+        settings.QDRANT_CONFIG = {
+            **settings.QDRANT_CONFIG,
+            "HOST": "localhost",
+            "GRPC_PORT": 6334,
+            "PREFER_GRPC": True,
+        }
+
+        client = create_qdrant_client()
+        assert client._client._prefer_grpc
+        assert client._client._grpc_port == 6334
+        assert not create_qdrant_client(prefer_grpc=False)._client._prefer_grpc
+
+
+class TestVectorSearchService:
+    """Test VectorSearchService batch search without a database."""
+
+    def test_search_many_embeds_once(self, qdrant_service, monkeypatch):
+        def missing(**kwargs):
+            raise Document.DoesNotExist
+
+        monkeypatch.setattr(Document.objects, "get", missing)
+        vectors = np.eye(4, dtype=np.float32)
+        qdrant_service.upsert_batch(
+            [
+                {
+                    "id": f"00000000-0000-0000-0000-00000000000{i}",
+                    "vector": v,
+                    "payload": {"title": f"doc {i}", "content": f"chunk {i}"},
+                }
+                for i, v in enumerate(vectors)
+            ]
+        )
+        service = VectorSearchService.__new__(VectorSearchService)
+        service.qdrant_service = qdrant_service
+        service.embedding_service = Mock()
+        service.embedding_service.embed_batch.return_value = vectors[[1, 3]]
+
+        results = service.search_many(["first", "second"], top_k=1)
+
+        service.embedding_service.embed_batch.assert_called_once()
+        assert [r[0]["title"] for r in results] == ["doc 1", "doc 3"]
+
+
+@pytest.fixture
+def document_service(monkeypatch):
+    """Factory fixture for a DocumentService over a given store and embedding service."""
+
+    def _document_service(qdrant_service, embedding_service):
+        monkeypatch.setattr(
+            "apps.knowledgebase.services.get_qdrant_service", lambda: qdrant_service
+        )
+        monkeypatch.setattr(
+            "apps.knowledgebase.services.get_embedding_service", lambda: embedding_service
+        )
+        return DocumentService()
+
+    return _document_service
+
+
+def local_points(count, dimension=4):
+    """Build points whose vectors cycle through the unit axes."""
+    vectors = np.eye(dimension, dtype=np.float32)
+    return [
+        {
+            "id": f"00000000-0000-0000-0000-{i:012d}",
+            "vector": vectors[i % dimension],
+            "payload": {"chunk_index": i, "category": "a" if i % 2 else "b"},
+        }
+        for i in range(count)
+    ]
+
+
+class TestLocalVectorStore:
+    """Test the in-process NumPy vector store."""
+
+    @pytest.fixture
+    def store(self, settings):
+        settings.EMBEDDING_CONFIG = {**settings.EMBEDDING_CONFIG, "EMBEDDING_DIMENSION": 4}
+        return LocalVectorStore(path="")
+
+    def test_search_matches_cosine_top_k(self, store):
+        store.upsert_batch(local_points(8))
+
+        results = store.search_vectors([0.0, 2.0, 0.1, 0.0], top_k=2, with_payload=["chunk_index"])
+
+        assert [r["payload"]["chunk_index"] for r in results] == [1, 5]
+        assert results[0]["score"] == pytest.approx(2 / np.sqrt(4.01))
+
+    def test_filters_threshold_and_batch(self, store):
+        store.upsert_batch(local_points(8))
+
+        results = store.search_vectors_batch(
+            [[1.0, 0, 0, 0], [0, 1.0, 0, 0]],
+            top_k=10,
+            filters=[{"chunk_index": {"gte": 4}}, {"category": {"in": ["a"]}}],
+            score_threshold=0.5,
+        )
+
+        assert [r["payload"]["chunk_index"] for r in results[0]] == [4]
+        assert sorted(r["payload"]["chunk_index"] for r in results[1]) == [1, 5]
+
+    def test_upsert_overwrites_and_delete_frees_row(self, store):
+        store.upsert_batch(local_points(2))
+        store.upsert_vector(local_points(1)[0]["id"], [0, 0, 1.0, 0], {"chunk_index": 9})
+        store.delete_vector(local_points(2)[1]["id"])
+
+        results = store.search_vectors([0, 0, 1.0, 0], top_k=5)
+
+        assert [r["payload"] for r in results] == [{"chunk_index": 9}]
+        store.upsert_vector("new", [0, 1.0, 0, 0])
+        assert len(store._ids) == 2
+
+    def test_delete_vectors_ignores_unknown_and_duplicate_ids(self, store):
+        points = local_points(4)
+        store.upsert_batch(points)
+
+        store.delete_vectors([points[0]["id"], points[0]["id"], "missing", points[2]["id"]])
+
+        remaining, _ = store.scroll_points(limit=10)
+        assert sorted(p["id"] for p in remaining) == [points[1]["id"], points[3]["id"]]
+
+    def test_grows_past_initial_capacity(self, store):
+        store.upsert_batch(local_points(INITIAL_CAPACITY + 5))
+
+        points, next_offset = store.scroll_points(limit=INITIAL_CAPACITY + 10)
+
+        assert len(points) == INITIAL_CAPACITY + 5
+        assert next_offset is None
+
+    def test_persists_and_reloads(self, settings, tmp_path):
+        settings.EMBEDDING_CONFIG = {**settings.EMBEDDING_CONFIG, "EMBEDDING_DIMENSION": 4}
+        store = LocalVectorStore(path=tmp_path, persist_interval=3600)
+        store.upsert_batch(local_points(3))
+        store.persist()
+
+        reloaded = LocalVectorStore(path=tmp_path)
+
+        hits = reloaded.search_vectors([0, 0, 1.0, 0], top_k=1)
+        assert hits[0]["payload"]["chunk_index"] == 2
+        with pytest.raises(ValueError):
+            LocalVectorStore(path=tmp_path, dimension=8)
+
+    def test_log_replays_writes_after_snapshot(self, settings, tmp_path):
+        settings.EMBEDDING_CONFIG = {**settings.EMBEDDING_CONFIG, "EMBEDDING_DIMENSION": 4}
+        points = local_points(4)
+        store = LocalVectorStore(path=tmp_path, persist_interval=3600)
+        store.upsert_batch(points[:3])
+        store.persist()
+        store.upsert_batch(points[3:])
+        store.delete_vector(points[0]["id"])
+        store.persist()
+
+        # No close(): the writes after the snapshot come back from the log
+        log_path = tmp_path / store.collection_name / "points.1.log"
+        assert log_path.exists()
+        with open(log_path, "a", encoding="utf-8") as f:
+            f.write('[7, "torn')
+
+        reloaded = LocalVectorStore(path=tmp_path, persist_interval=3600)
+        remaining, _ = reloaded.scroll_points(limit=10)
+        assert sorted(p["id"] for p in remaining) == sorted(p["id"] for p in points[1:])
+
+        reloaded.upsert_vector(points[0]["id"], [1.0, 0, 0, 0], {"chunk_index": 0})
+        reloaded.persist()
+        again = LocalVectorStore(path=tmp_path, persist_interval=3600)
+        assert again.search_vectors([1.0, 0, 0, 0], top_k=1)[0]["id"] == points[0]["id"]
+
+    def test_persists_in_background(self, settings, tmp_path):
+        settings.EMBEDDING_CONFIG = {**settings.EMBEDDING_CONFIG, "EMBEDDING_DIMENSION": 4}
+        store = LocalVectorStore(path=tmp_path, persist_interval=0.01)
+        store.upsert_batch(local_points(2))
+
+        snapshot = tmp_path / store.collection_name / "points.json"
+        deadline = time.monotonic() + 5
+        while store._pending or not snapshot.exists():
+            assert time.monotonic() < deadline
+            time.sleep(0.01)
+        store.close()
+
+        assert len(LocalVectorStore(path=tmp_path).scroll_points()[0]) == 2
+
+    def test_selected_by_vector_backend(self, settings):
+        settings.EMBEDDING_CONFIG = {**settings.EMBEDDING_CONFIG, "EMBEDDING_DIMENSION": 4}
+        settings.LOCAL_VECTOR_STORE = {"PATH": "", "PERSIST_INTERVAL": 30}
+        settings.VECTOR_BACKEND = "local"
+
+        assert isinstance(get_qdrant_service(), LocalVectorStore)
+
+
+class TestDocumentChunkIds:
+    """Test deterministic chunk ids and document-scoped deletes."""
+
+    def test_chunk_point_id_is_deterministic(self):
+        assert chunk_point_id("doc", 3) == chunk_point_id("doc", 3)
+        assert chunk_point_id("doc", 3) != chunk_point_id("doc", 4)
+        assert chunk_point_id("doc", 3) != chunk_point_id("other", 3)
+
+    def test_delete_by_filter(self, qdrant_service):
+        qdrant_service.upsert_batch(
+            [
+                {
+                    "id": chunk_point_id(doc, i),
+                    "vector": [1.0, 0, 0, 0],
+                    "payload": {"document_id": doc, "chunk_index": i},
+                }
+                for doc in ("a", "b")
+                for i in range(3)
+            ]
+        )
+
+        qdrant_service.delete_by_filter({"document_id": "a", "chunk_index": {"gte": 1}})
+
+        points, _ = qdrant_service.scroll_points()
+        remaining = sorted(
+            (p["payload"]["document_id"], p["payload"]["chunk_index"]) for p in points
+        )
+        assert remaining == [("a", 0), ("b", 0), ("b", 1), ("b", 2)]
+        with pytest.raises(ValueError):
+            qdrant_service.delete_by_filter({})
+
+    def test_reingest_overwrites_and_prunes_chunks(self, settings, monkeypatch, document_service):
+        settings.EMBEDDING_CONFIG = {**settings.EMBEDDING_CONFIG, "EMBEDDING_DIMENSION": 4}
+        pages = {"text": "x" * 2500}
+        reader = Mock(side_effect=lambda f: Mock(pages=[Mock(extract_text=lambda: pages["text"])]))
+        monkeypatch.setattr("apps.knowledgebase.services.pypdf.PdfReader", reader)
+
+        service = document_service(LocalVectorStore(path=""), Mock())
+        service.embedding_service.embed_batch.side_effect = lambda texts: np.ones(
+            (len(texts), 4), dtype=np.float32
+        )
+        document = Mock(id="doc-1")
+
+        service.process_pdf(None, "Report", document=document)
+        service.process_pdf(None, "Report", document=document)
+        assert len(service.qdrant_service.scroll_points()[0]) == 4
+
+        pages["text"] = "x" * 900
+        service.process_pdf(None, "Report", document=document)
+
+        points, _ = service.qdrant_service.scroll_points()
+        assert [p["id"] for p in points] == [
+            str(chunk_point_id("doc-1", 0)),
+            str(chunk_point_id("doc-1", 1)),
+        ]
+
+
+class TestKnowledgeBaseBundle:
+    """Test the kb_export/kb_import bundle format."""
+
+    def write_bundle(self, path, complete=True):
+        writer = BundleWriter(path, {"dimension": 4, "embedding_model": "test"})
+        writer.write_document({"id": "doc-1", "title": "Doc", "content": "text"})
+        for point in local_points(3):
+            writer.write_point(point["id"], point["vector"], point["payload"])
+        writer.close(complete=complete)
+
+    def test_round_trip_keeps_vectors_exact(self, tmp_path):
+        path = tmp_path / "kb.bundle"
+        self.write_bundle(path)
+
+        with BundleReader(path) as reader:
+            records = list(reader.records())
+
+        assert reader.header["embedding_model"] == "test"
+        assert records[0] == ("document", {"id": "doc-1", "title": "Doc", "content": "text"})
+        kind, point = records[2]
+        assert kind == "point"
+        assert point["payload"] == {"chunk_index": 1, "category": "a"}
+        np.testing.assert_array_equal(point["vector"], local_points(3)[1]["vector"])
+
+    def test_incomplete_bundle_is_rejected(self, tmp_path):
+        path = tmp_path / "kb.bundle"
+        self.write_bundle(path, complete=False)
+
+        with BundleReader(path) as reader, pytest.raises(ValueError, match="truncated"):
+            list(reader.records())
+
+    def test_wrong_dimension_is_rejected(self, tmp_path):
+        with BundleWriter(tmp_path / "kb.bundle", {"dimension": 4}) as writer:
+            with pytest.raises(ValueError):
+                writer.write_point("p", [1.0, 2.0])
+
+    def test_import_check_compares_provider_model_and_dimension(self, settings):
+        settings.EMBEDDING_CONFIG = {
+            **settings.EMBEDDING_CONFIG,
+            "DEFAULT_PROVIDER": "local",
+            "EMBEDDING_DIMENSION": 4,
+        }
+        header = LocalVectorStore(path="").embedding
+        openai = embedding_metadata(4, "openai", "text-embedding-3-small")
+
+        assert header["embedding_model"] != "text-embedding-3-small"
+        assert embedding_matches(header, embedding_metadata(4, "local"))
+        assert not embedding_matches(header, openai)
+        assert not embedding_matches({**openai, "embedding_provider": "groq"}, openai)
+        assert not embedding_matches({**openai, "dimension": 8}, openai)
+
+
+class TestVersionedCollections:
+    """Test versioned collections behind an alias and dual-writes during a re-index."""
+
+    def build_next(self, live, **embedding):
+        target = QdrantService(
+            client=live.client,
+            collection_name=versioned_name(live.alias, 2),
+            versioned=False,
+            embedding={**live.embedding, **embedding},
+        )
+        start_build(live.client, live.alias, target.collection_name)
+        live._refresh_at = 0
+        return target
+
+    def test_new_collection_is_versioned(self, qdrant_service):
+        assert qdrant_service.collection_name == "documents_v1"
+        assert get_aliases(qdrant_service.client) == {"documents": "documents_v1"}
+
+    def test_dual_write_then_atomic_switch(self, qdrant_service, document_service):
+        target = self.build_next(qdrant_service)
+        service = document_service(
+            qdrant_service, Mock(model=qdrant_service.embedding["embedding_model"])
+        )
+        service.embedding_service.dimension = 4
+        service.embedding_service.embed_batch.side_effect = lambda texts: np.ones(
+            (len(texts), 4), dtype=np.float32
+        )
+
+        service.index_document(Mock(id="doc-1", title="Doc", content="x" * 500, metadata={}))
+
+        assert qdrant_service.build_target().collection_name == "documents_v2"
+        assert target.client.count("documents_v2").count == 1
+        assert target.client.count("documents_v1").count == 1
+
+        switch_alias(qdrant_service.client, "documents", "documents_v2")
+        qdrant_service._refresh()
+        assert qdrant_service.collection_name == "documents_v2"
+        assert qdrant_service.build_target() is None
+
+    def test_serves_version_matching_embedding_settings(self, qdrant_service):
+        self.build_next(qdrant_service, embedding_model="other-model")
+        switch_alias(qdrant_service.client, "documents", "documents_v2")
+
+        # A process still configured for the previous model keeps the version built for it
+        assert QdrantService(client=qdrant_service.client).collection_name == "documents_v1"
+
+    def test_rebuild_packs_documents_into_windows(self, settings):
+        settings.EMBEDDING_CONFIG = {**settings.EMBEDDING_CONFIG, "EMBEDDING_DIMENSION": 4}
+        settings.INGESTION_CONFIG = {**settings.INGESTION_CONFIG, "WINDOW_SIZE": 4}
+        target = LocalVectorStore(path="")
+        embedder = Mock()
+        embedder.embed_batch.side_effect = lambda texts: np.ones((len(texts), 4), dtype=np.float32)
+        documents = [
+            Mock(id=f"doc-{i}", title="Doc", content="x" * length, metadata={})
+            for i, length in enumerate([500, 3000, 0, 1200])
+        ]
+        queryset = Mock()
+        queryset.iterator.return_value = iter(documents)
+
+        ReindexCommand(stdout=io.StringIO())._index_documents(target, embedder, queryset, 2)
+
+        expected = {
+            (str(document.id), index)
+            for document in documents
+            for index in range(len(chunk_text(document.content)))
+        }
+        points, _ = target.scroll_points(limit=100)
+        assert {(p["payload"]["document_id"], p["payload"]["chunk_index"]) for p in points} == (
+            expected
+        )
+        sizes = [len(c.args[0]) for c in embedder.embed_batch.call_args_list]
+        assert sum(sizes) == len(expected)
+        assert all(size <= 4 for size in sizes)
+
+
+class TestStreamingIngestion:
+    """Test page-at-a-time chunking and windowed embedding."""
+
+    @pytest.mark.parametrize("split", [1, 7, 333, 1000, 5000])
+    def test_iter_chunks_matches_chunk_text(self, split):
+        text = "".join(chr(65 + i % 26) for i in range(4321))
+        pieces = [text[i : i + split] for i in range(0, len(text), split)]
+
+        assert list(iter_chunks(pieces)) == chunk_text(text)
+
+    def test_index_chunks_embeds_in_windows(self, settings, document_service):
+        settings.EMBEDDING_CONFIG = {**settings.EMBEDDING_CONFIG, "EMBEDDING_DIMENSION": 4}
+        settings.INGESTION_CONFIG = {**settings.INGESTION_CONFIG, "EMBED_WORKERS": 1}
+        service = document_service(LocalVectorStore(path=""), Mock())
+        service.embedding_service.embed_batch.side_effect = lambda texts: np.ones(
+            (len(texts), 4), dtype=np.float32
+        )
+        document = Mock(id="doc-1", title="Doc", metadata={})
+
+        count = service.index_chunks(document, (f"chunk {i}" for i in range(10)), window=4)
+
+        assert count == 10
+        sizes = [len(c.args[0]) for c in service.embedding_service.embed_batch.call_args_list]
+        assert sizes == [4, 4, 2]
+        points, _ = service.qdrant_service.scroll_points(limit=20)
+        assert sorted(p["payload"]["chunk_index"] for p in points) == list(range(10))
+        assert {p["id"] for p in points} == {str(chunk_point_id("doc-1", i)) for i in range(10)}
+
+    def test_page_ranges_cover_every_page(self):
+        assert page_ranges(120, 50) == [(0, 50), (50, 100), (100, 120)]
+        assert page_ranges(0, 50) == []
+
+    def test_failed_ingestion_resumes_from_checkpoint(self, settings, document_service):
+        settings.EMBEDDING_CONFIG = {**settings.EMBEDDING_CONFIG, "EMBEDDING_DIMENSION": 4}
+        settings.INGESTION_CONFIG = {
+            **settings.INGESTION_CONFIG,
+            "EMBED_WORKERS": 1,
+            "UPSERT_WORKERS": 1,
+        }
+        service = document_service(LocalVectorStore(path=""), Mock())
+        embedded = []
+
+        def embed_batch(texts):
+            if failing and len(embedded) == 2:
+                raise RuntimeError("provider unavailable")
+            embedded.append(list(texts))
+            return np.ones((len(texts), 4), dtype=np.float32)
+
+        service.embedding_service.embed_batch.side_effect = embed_batch
+        document = Mock(id="doc-1", title="Doc", metadata={})
+        job = Mock(chunks_done=0)
+        text = "".join(chr(65 + i % 26) for i in range(9000))
+        chunks = chunk_text(text)
+
+        failing = True
+        with pytest.raises(RuntimeError):
+            service.index_pages(document, [text], window=4, job=job)
+        job.checkpoint.assert_called_with(8, 2)
+
+        failing = False
+        embedded.clear()
+        job.chunks_done = 8
+        count = service.index_pages(document, [text], window=4, job=job)
+
+        assert count == len(chunks)
+        assert embedded == [chunks[8:12]]
+        points, _ = service.qdrant_service.scroll_points(limit=20)
+        assert sorted(p["payload"]["chunk_index"] for p in points) == list(range(len(chunks)))
+
+    def test_new_document_is_protected_by_its_own_job(
+        self, settings, monkeypatch, document_service
+    ):
+        settings.EMBEDDING_CONFIG = {**settings.EMBEDDING_CONFIG, "EMBEDDING_DIMENSION": 4}
+        created = []
+
+        def create(**fields):
+            created.append(Mock(chunks_done=0, **fields))
+            return created[-1]
+
+        monkeypatch.setattr(IngestionJob, "objects", Mock(create=create))
+        service = document_service(LocalVectorStore(path=""), Mock())
+        service.embedding_service.embed_batch.side_effect = RuntimeError("provider unavailable")
+
+        with pytest.raises(RuntimeError):
+            service.process_pages(["Uploaded text. " * 50], "Upload")
+
+        (job,) = created
+        assert job.source == "Upload"
+        job.finish.assert_called_once_with(
+            IngestionJob.Status.ABANDONED, error="provider unavailable"
+        )
+
+
+class TestIngestionManifest:
+    """Test the change detection of incremental ingestion."""
+
+    def test_unchanged_requires_same_size_and_mtime(self, tmp_path):
+        path = tmp_path / "report.pdf"
+        path.write_bytes(b"%PDF-1.4 original")
+        signature = file_signature(path)
+        entry = Mock(size=signature[0], mtime_ns=signature[1])
+
+        assert is_unchanged(entry, signature)
+        assert not is_unchanged(None, signature)
+
+        os.utime(path, ns=(signature[1], signature[1] + 1_000_000_000))
+        assert not is_unchanged(entry, file_signature(path))
+
+    def test_sha256_detects_content_changes(self, tmp_path):
+        path = tmp_path / "report.pdf"
+        path.write_bytes(b"x" * (HASH_BLOCK_SIZE + 1))
+        digest = file_sha256(path)
+
+        assert digest == hashlib.sha256(b"x" * (HASH_BLOCK_SIZE + 1)).hexdigest()
+        path.write_bytes(b"y" * (HASH_BLOCK_SIZE + 1))
+        assert file_sha256(path) != digest
+
+    def test_manifest_path_is_absolute(self, tmp_path, monkeypatch):
+        monkeypatch.chdir(tmp_path)
+
+        assert manifest_path("raw_data/../report.pdf") == str(tmp_path.resolve() / "report.pdf")